@@ -0,0 +1,241 @@
+"""Load generator for the LangGraph agent server.
+
+Replays the scripted multi-turn conversations in `scenarios.json` against a
+running server and reports latency, throughput and error metrics as JSON.
+Start the server with the deterministic offline model so results do not
+depend on a provider:
+
+    FAKE_LLM=true langgraph dev --no-browser
+    python -m benchmarks.agent_load --concurrency 8 --rate 4 \
+        --conversations 50 --output load_report.json
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+from langgraph_sdk import get_client
+
+DEFAULT_SCENARIOS = Path(__file__).with_name("scenarios.json")
+
+
+@dataclass
+class TurnResult:
+    """Measurements for one user message and the streamed reply."""
+
+    scenario: str
+    turn: int
+    latency: float
+    ttft: float | None = None
+    tokens: int = 0
+    tool_calls: Counter[str] = field(default_factory=Counter)
+    error: str | None = None
+
+    @property
+    def tokens_per_second(self) -> float | None:
+        """Streaming rate after the first token arrived."""
+        if self.ttft is None or self.tokens == 0:
+            return None
+        streaming = self.latency - self.ttft
+        return self.tokens / streaming if streaming > 0 else None
+
+
+def percentile(values: list[float], q: float) -> float | None:
+    """Return the q-th percentile of values with linear interpolation."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    weight = position - lower
+    return ordered[lower] * (1 - weight) + ordered[upper] * weight
+
+
+def distribution(values: list[float]) -> dict[str, float | None]:
+    """Summarise values with the percentiles tracked for regressions."""
+    return {
+        "count": len(values),
+        "mean": sum(values) / len(values) if values else None,
+        "p50": percentile(values, 50),
+        "p95": percentile(values, 95),
+        "p99": percentile(values, 99),
+        "max": max(values) if values else None,
+    }
+
+
+async def run_turn(client: Any, thread_id: str, assistant_id: str,
+                   scenario: str, turn: int, text: str) -> TurnResult:
+    """Send one message on a thread and time the streamed reply."""
+    start = time.perf_counter()
+    result = TurnResult(scenario=scenario, turn=turn, latency=0.0)
+    usage_tokens = 0
+    chunk_tokens = 0
+
+    try:
+        async for part in client.runs.stream(
+                thread_id,
+                assistant_id,
+                input={"messages": [{"role": "human", "content": text}]},
+                stream_mode="messages-tuple",
+        ):
+            if part.event == "error":
+                result.error = str(part.data)
+                continue
+            if part.event != "messages":
+                continue
+
+            message_chunk, _metadata = part.data
+            if message_chunk.get("type") != "AIMessageChunk":
+                continue
+            if message_chunk.get("content"):
+                if result.ttft is None:
+                    result.ttft = time.perf_counter() - start
+                chunk_tokens += 1
+            usage = message_chunk.get("usage_metadata") or {}
+            usage_tokens += usage.get("output_tokens", 0)
+            for call in message_chunk.get("tool_call_chunks") or []:
+                if call.get("name"):
+                    result.tool_calls[call["name"]] += 1
+    except Exception as e:
+        result.error = f"{type(e).__name__}: {e}"
+
+    result.latency = time.perf_counter() - start
+    # Prefer the provider's token count; fall back to streamed chunks.
+    result.tokens = usage_tokens or chunk_tokens
+    return result
+
+
+async def run_conversation(client: Any, assistant_id: str,
+                           scenario: dict[str, Any], think_time: float,
+                           semaphore: asyncio.Semaphore) -> list[TurnResult]:
+    """Replay one scripted conversation on a fresh thread."""
+    async with semaphore:
+        results = []
+        try:
+            thread = await client.threads.create()
+        except Exception as e:
+            return [TurnResult(scenario=scenario["name"], turn=0,
+                               latency=0.0,
+                               error=f"{type(e).__name__}: {e}")]
+
+        for turn, text in enumerate(scenario["turns"]):
+            results.append(await run_turn(
+                client, thread["thread_id"], assistant_id,
+                scenario["name"], turn, text))
+            if think_time:
+                await asyncio.sleep(think_time)
+        return results
+
+
+async def run_load_test(url: str, scenarios: list[dict[str, Any]],
+                        conversations: int, concurrency: int, rate: float,
+                        think_time: float = 0.0, seed: int = 0,
+                        assistant_id: str = "agent") -> dict[str, Any]:
+    """Run the load test and return the JSON-serialisable report.
+
+    Args:
+        url: Base URL of the LangGraph server.
+        scenarios: Scripted conversations, replayed round-robin.
+        conversations: Total number of conversations to start.
+        concurrency: Maximum number of conversations in flight.
+        rate: Mean conversation arrival rate per second (Poisson); 0 starts
+            all conversations immediately.
+        think_time: Pause between turns of one conversation in seconds.
+        seed: Seed for the arrival process.
+        assistant_id: Graph to run on the server.
+    """
+    rng = random.Random(seed)
+    semaphore = asyncio.Semaphore(concurrency)
+    client = get_client(url=url)
+    tasks = []
+
+    start = time.perf_counter()
+    try:
+        for index in range(conversations):
+            scenario = scenarios[index % len(scenarios)]
+            tasks.append(asyncio.create_task(run_conversation(
+                client, assistant_id, scenario, think_time, semaphore)))
+            if rate > 0:
+                await asyncio.sleep(rng.expovariate(rate))
+        per_conversation = await asyncio.gather(*tasks)
+    finally:
+        await client.aclose()
+    wall_time = time.perf_counter() - start
+
+    turns = [turn for results in per_conversation for turn in results]
+    ok = [turn for turn in turns if turn.error is None]
+    errors = Counter(turn.error.split(":")[0] for turn in turns
+                     if turn.error is not None)
+    # Calls made before a turn failed still reached the tools
+    tool_calls: Counter[str] = Counter()
+    for turn in turns:
+        tool_calls.update(turn.tool_calls)
+
+    return {
+        "config": {
+            "url": url,
+            "assistant_id": assistant_id,
+            "conversations": conversations,
+            "concurrency": concurrency,
+            "rate": rate,
+            "think_time": think_time,
+            "seed": seed,
+        },
+        "wall_time_s": wall_time,
+        "turns": len(turns),
+        "errors": sum(errors.values()),
+        "error_rate": sum(errors.values()) / len(turns) if turns else 0.0,
+        "errors_by_type": dict(errors),
+        "throughput_turns_per_s": len(ok) / wall_time if wall_time else 0.0,
+        "ttft_s": distribution(
+            [turn.ttft for turn in ok if turn.ttft is not None]),
+        "turn_latency_s": distribution([turn.latency for turn in ok]),
+        "tokens_per_s": distribution(
+            [rate for turn in ok
+             if (rate := turn.tokens_per_second) is not None]),
+        "tool_calls": {
+            "total": sum(tool_calls.values()),
+            "per_turn": (sum(tool_calls.values()) / len(turns)
+                         if turns else 0.0),
+            "by_name": dict(tool_calls),
+        },
+    }
+
+
+def main() -> None:
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="http://localhost:2024")
+    parser.add_argument("--assistant", default="agent")
+    parser.add_argument("--scenarios", type=Path, default=DEFAULT_SCENARIOS)
+    parser.add_argument("--conversations", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--rate", type=float, default=0.0,
+                        help="conversation arrivals per second (0: burst)")
+    parser.add_argument("--think-time", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path,
+                        help="write the JSON report to this file")
+    args = parser.parse_args()
+
+    scenarios = json.loads(args.scenarios.read_text())
+    report = asyncio.run(run_load_test(
+        args.url, scenarios, args.conversations, args.concurrency,
+        args.rate, think_time=args.think_time, seed=args.seed,
+        assistant_id=args.assistant))
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        args.output.write_text(output + "\n")
+    print(output)  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
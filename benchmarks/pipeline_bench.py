@@ -0,0 +1,217 @@
+"""Benchmarks for the geo_service pipeline stages.
+
+Times every stage of `process_semantic_pointcloud_to_usd` and records its
+peak traced memory on the bundled labelled CSV files and on synthetic
+scenes, then compares the results with a stored baseline:
+
+    python -m benchmarks.pipeline_bench                  # quick tier
+    python -m benchmarks.pipeline_bench --tier full      # up to 10M points
+    python -m benchmarks.pipeline_bench --update-baseline
+
+The run fails with exit code 1 when a stage is slower or uses more memory
+than the baseline by more than the threshold. Timings are machine specific:
+refresh the baseline on the machine that runs the comparison.
+"""
+
+import argparse
+import json
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from benchmarks.synthetic import make_scene, write_scene_csv
+from geo_service import app
+from utils.scene_graph_store import load_scene_graph, save_scene_graph
+
+ROOT = Path(__file__).resolve().parents[1]
+DATA_DIR = ROOT / "DATA"
+DEFAULT_BASELINE = Path(__file__).with_name("pipeline_baseline.json")
+DEFAULT_OUTPUT = ROOT / "benchmark_results.json"
+
+BUNDLED_SCENES = ["indoor_room_labelled_minimal.csv",
+                  "indoor_room_labelled_sparse.csv"]
+# (points, objects) per synthetic scene; every tier includes the smaller ones
+TIERS = {
+    "quick": [(10_000, 10), (100_000, 100)],
+    "full": [(10_000, 10), (100_000, 100), (1_000_000, 1_000),
+             (10_000_000, 10_000)],
+}
+# Clustering parameters of the module-level demo run in app.py
+BUNDLED_PARAMS = {'eps': 0.2, 'min_samples': 20, 'distance_threshold': 3.0}
+SYNTHETIC_PARAMS = {'eps': 0.35, 'min_samples': 10,
+                    'distance_threshold': 3.0}
+
+# Stages shorter than this are dominated by timer noise and never fail.
+MIN_TIME_S = 0.1
+MIN_MEMORY_MB = 1.0
+
+
+class StageRecorder:
+    """Collect wall time and peak traced memory per pipeline stage."""
+
+    def __init__(self):
+        """Start with no recorded stages."""
+        self.stages = {}
+
+    def run(self, name, func, *args, **kwargs):
+        """Run func, record its cost under name and return its result."""
+        tracemalloc.reset_peak()
+        start_memory = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1] - start_memory
+        self.stages[name] = {'time_s': elapsed,
+                             'peak_mb': max(peak, 0) / 2 ** 20}
+        return result
+
+
+def benchmark_scene(csv_path, params, workdir):
+    """Run every pipeline stage on one CSV file and return the records."""
+    recorder = StageRecorder()
+    tracemalloc.start()
+    try:
+        df = recorder.run('load_semantic_point_cloud',
+                          app.load_semantic_point_cloud, csv_path,
+                          sample_size=None)
+        objects = recorder.run('extract_semantic_objects',
+                               app.extract_semantic_objects, df,
+                               eps=params['eps'],
+                               min_samples=params['min_samples'])
+        features = recorder.run('compute_object_features',
+                                app.compute_object_features, objects)
+        relationships = recorder.run('compute_spatial_relationships',
+                                     app.compute_spatial_relationships,
+                                     objects, params['distance_threshold'])
+        scene_graph = recorder.run('build_scene_graph',
+                                   app.build_scene_graph, objects,
+                                   relationships, features)
+        if app.USD_AVAILABLE:
+            recorder.run('create_usd_stage', app.create_usd_stage,
+                         scene_graph, str(Path(workdir) / 'scene.usda'))
+        graph_path = Path(workdir) / 'scene.sgraph'
+        recorder.run('save_scene_graph', save_scene_graph, scene_graph,
+                     graph_path)
+        arrays = recorder.run('load_scene_graph', load_scene_graph,
+                              graph_path)
+        recorder.run('analyze_scene_graph', app.analyze_scene_graph, arrays)
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'points': len(df),
+        'objects': len(objects),
+        'relationships': len(relationships),
+        'stages': recorder.stages,
+    }
+
+
+def run_benchmarks(tier='quick', seed=0, repeat=3):
+    """Benchmark bundled and synthetic scenes; keep the fastest repeat."""
+    scenes = {}
+    with tempfile.TemporaryDirectory(prefix='geodata_bench_') as workdir:
+        inputs = []
+        for name in BUNDLED_SCENES:
+            path = DATA_DIR / name
+            if path.exists():
+                inputs.append((Path(name).stem, path, BUNDLED_PARAMS))
+        for n_points, n_objects in TIERS[tier]:
+            name = f"synthetic_{n_points}p_{n_objects}o"
+            path = Path(workdir) / f"{name}.csv"
+            write_scene_csv(make_scene(n_points, n_objects, seed=seed), path)
+            inputs.append((name, path, SYNTHETIC_PARAMS))
+
+        for name, path, params in inputs:
+            print(f"Benchmarking {name}...", file=sys.stderr)  # noqa: T201
+            runs = [benchmark_scene(path, params, workdir)
+                    for _ in range(repeat)]
+            best = runs[0]
+            for stage in best['stages']:
+                best['stages'][stage] = min(
+                    (run['stages'][stage] for run in runs),
+                    key=lambda record: record['time_s'])
+            scenes[name] = best
+
+    return {
+        'meta': {
+            'tier': tier,
+            'seed': seed,
+            'repeat': repeat,
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+        },
+        'scenes': scenes,
+    }
+
+
+def compare_to_baseline(results, baseline, threshold):
+    """Return a message for every stage that regressed beyond threshold."""
+    regressions = []
+    for scene, current in results['scenes'].items():
+        reference = baseline.get('scenes', {}).get(scene)
+        if reference is None:
+            continue
+        for stage, record in current['stages'].items():
+            base = reference['stages'].get(stage)
+            if base is None:
+                continue
+            for metric, floor in (('time_s', MIN_TIME_S),
+                                  ('peak_mb', MIN_MEMORY_MB)):
+                limit = max(base[metric] * (1 + threshold), floor)
+                if record[metric] > limit:
+                    regressions.append(
+                        f"{scene}/{stage}: {metric} {record[metric]:.3f} > "
+                        f"{limit:.3f} (baseline {base[metric]:.3f})")
+    return regressions
+
+
+def format_table(results):
+    """Render the per-stage results as a plain text table."""
+    lines = [f"{'scene':<40} {'stage':<32} {'time [s]':>10} "
+             f"{'peak [MB]':>10}"]
+    for scene, record in results['scenes'].items():
+        for stage, cost in record['stages'].items():
+            lines.append(f"{scene:<40} {stage:<32} {cost['time_s']:>10.3f} "
+                         f"{cost['peak_mb']:>10.1f}")
+    return "\n".join(lines)
+
+
+def main():
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tier', choices=sorted(TIERS), default='quick')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--baseline', type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument('--output', type=Path, default=DEFAULT_OUTPUT)
+    parser.add_argument('--threshold', type=float, default=0.5,
+                        help='allowed relative slowdown before failing')
+    parser.add_argument('--update-baseline', action='store_true')
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.tier, seed=args.seed, repeat=args.repeat)
+    args.output.write_text(json.dumps(results, indent=2) + "\n")
+    print(format_table(results))  # noqa: T201
+
+    if args.update_baseline:
+        args.baseline.write_text(json.dumps(results, indent=2) + "\n")
+        print(f"Baseline written to {args.baseline}")  # noqa: T201
+        return 0
+
+    if not args.baseline.exists():
+        print(f"No baseline at {args.baseline}; "  # noqa: T201
+              "run with --update-baseline")
+        return 0
+
+    regressions = compare_to_baseline(
+        results, json.loads(args.baseline.read_text()), args.threshold)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")  # noqa: T201
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,149 @@
+"""Synthetic labelled indoor scenes for pipeline benchmarks.
+
+Scenes mimic the bundled `DATA/indoor_room_labelled_*.csv` files: a room
+with floor, ceiling and walls plus box-shaped chairs, tables and furniture
+on a grid. Point density per object and per square metre of floor stays
+constant as scenes grow, so DBSCAN parameters tuned on a small scene keep
+working on large ones.
+"""
+
+import numpy as np
+import pandas as pd
+
+# Numeric codes used in the labelled CSV files.
+CEILING, FLOOR, WALL, CHAIR, FURNITURE, TABLE = range(6)
+OBJECT_LABELS = (CHAIR, FURNITURE, TABLE)
+OBJECT_SIZES = {
+    CHAIR: (0.5, 0.5, 0.9),
+    FURNITURE: (0.8, 0.5, 1.2),
+    TABLE: (1.0, 0.7, 0.75),
+}
+
+# Floor area per object and share of points on the room structure.
+CELL_SIZE = 1.6
+STRUCTURE_SHARE = 0.6
+ROOM_HEIGHT = 2.8
+
+
+def _box_surface(rng, n, origin, size):
+    """Sample n points uniformly on the faces of an axis-aligned box."""
+    size = np.asarray(size, dtype=float)
+    points = rng.random((n, 3)) * size
+    # Snap one coordinate per point to a face, weighted by face area.
+    areas = np.array([size[1] * size[2], size[0] * size[2],
+                      size[0] * size[1]])
+    axis = rng.choice(3, size=n, p=areas / areas.sum())
+    side = rng.integers(0, 2, size=n)
+    points[np.arange(n), axis] = side * size[axis]
+    return points + origin
+
+
+def _walls(rng, n, width, depth):
+    """Sample n points on the four vertical walls of the room."""
+    perimeter = 2 * (width + depth)
+    # Position along the perimeter, unrolled wall by wall.
+    t = rng.random(n) * perimeter
+    points = np.empty((n, 3))
+    points[:, 2] = rng.random(n) * ROOM_HEIGHT
+    edges = np.cumsum([0, width, depth, width])
+    wall = np.searchsorted(edges, t, side='right') - 1
+    offset = t - edges[wall]
+    points[:, 0] = np.select(
+        [wall == 0, wall == 1, wall == 2], [offset, width, width - offset],
+        0.0)
+    points[:, 1] = np.select(
+        [wall == 0, wall == 1, wall == 2], [0.0, offset, depth],
+        depth - offset)
+    return points
+
+
+def make_scene(n_points, n_objects, seed=0):
+    """Create a labelled scene with the column layout of the CSV files."""
+    rng = np.random.default_rng(seed)
+    columns = int(np.ceil(np.sqrt(n_objects)))
+    rows = int(np.ceil(n_objects / columns))
+    width, depth = columns * CELL_SIZE, rows * CELL_SIZE
+
+    # Spread the structure points evenly over floor, ceiling and walls.
+    n_structure = int(n_points * STRUCTURE_SHARE)
+    floor_area = width * depth
+    wall_area = 2 * (width + depth) * ROOM_HEIGHT
+    n_floor = n_ceiling = int(
+        n_structure * floor_area / (2 * floor_area + wall_area))
+    n_wall = n_structure - n_floor - n_ceiling
+    per_object = (n_points - n_structure) // max(n_objects, 1)
+
+    parts, labels = [], []
+
+    floor = rng.random((n_floor, 3)) * [width, depth, 0]
+    ceiling = rng.random((n_ceiling, 3)) * [width, depth, 0]
+    ceiling[:, 2] = ROOM_HEIGHT
+    walls = _walls(rng, n_wall, width, depth)
+    for block, label in ((floor, FLOOR), (ceiling, CEILING), (walls, WALL)):
+        parts.append(block)
+        labels.append(np.full(len(block), label))
+
+    for index in range(n_objects):
+        label = OBJECT_LABELS[index % len(OBJECT_LABELS)]
+        size = OBJECT_SIZES[label]
+        row, column = divmod(index, columns)
+        # Centre the object in its cell, slightly above the floor so it does
+        # not merge with the floor cluster.
+        origin = ((column + 0.5) * CELL_SIZE - size[0] / 2,
+                  (row + 0.5) * CELL_SIZE - size[1] / 2, 0.05)
+        parts.append(_box_surface(rng, per_object, origin, size))
+        labels.append(np.full(per_object, label))
+
+    xyz = np.concatenate(parts)
+    rgb = rng.integers(40, 220, size=(len(xyz), 3), dtype=np.uint8)
+    df = pd.DataFrame(xyz, columns=['x', 'y', 'z'])
+    df[['R', 'G', 'B']] = rgb
+    df['semantic_label'] = np.concatenate(labels).astype(float)
+    return df.sample(frac=1.0, random_state=seed).reset_index(drop=True)
+
+
+def make_tunnel_scan(n_points, length=60.0, width=4.0, height=3.0,
+                     branch_length=26.0, seed=0):
+    """Create a scan of a straight drive with one crosscut at its middle.
+
+    The drive runs along x from 0 to `length`; the crosscut leaves its
+    left wall along y. Floor and roof points cover the footprint, wall
+    points the side walls, so cross-sections are `width` x `height`.
+    """
+    rng = np.random.default_rng(seed)
+    cut = (length - width) / 2
+    footprint = [((0.0, 0.0), (length, width)),
+                 ((cut, width), (width, branch_length))]
+    areas = np.array([size[0] * size[1] for _, size in footprint])
+    n_surface = n_points // 2
+    which = rng.choice(len(footprint), n_surface, p=areas / areas.sum())
+    origins = np.array([origin for origin, _ in footprint])[which]
+    sizes = np.array([size for _, size in footprint])[which]
+    surface = np.column_stack([
+        origins + rng.random((n_surface, 2)) * sizes,
+        rng.integers(0, 2, n_surface) * height])
+
+    top = width + branch_length
+    walls = np.array([(0.0, 0.0, length, 0.0), (0.0, width, cut, width),
+                      (cut + width, width, length, width),
+                      (cut, width, cut, top),
+                      (cut + width, width, cut + width, top)])
+    lengths = np.hypot(walls[:, 2] - walls[:, 0], walls[:, 3] - walls[:, 1])
+    n_wall = n_points - n_surface
+    chosen = walls[rng.choice(len(walls), n_wall, p=lengths / lengths.sum())]
+    t = rng.random((n_wall, 1))
+    wall = np.column_stack([chosen[:, :2] + t * (chosen[:, 2:] -
+                                                 chosen[:, :2]),
+                            rng.random(n_wall) * height])
+
+    df = pd.DataFrame(np.concatenate([surface, wall]),
+                      columns=['x', 'y', 'z'])
+    df['semantic_label'] = np.concatenate([
+        np.where(surface[:, 2] > 0, CEILING, FLOOR),
+        np.full(n_wall, WALL)]).astype(float)
+    return df.sample(frac=1.0, random_state=seed).reset_index(drop=True)
+
+
+def write_scene_csv(df, path):
+    """Write a scene in the semicolon-separated layout of the CSV files."""
+    df.to_csv(path, sep=';', index=False, float_format='%.6f')
@@ -0,0 +1 @@
+"""Semantic point cloud to USD scene graph pipeline."""
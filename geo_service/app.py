@@ -1,4 +1,6 @@
 # Base libraries
+import os
+import traceback
 from typing import Dict
 
 import numpy as np
@@ -10,9 +12,16 @@ import networkx as nx
 from sklearn.cluster import DBSCAN
 
 # For visualization
-import open3d as o3d
 import matplotlib.pyplot as plt
 
+try:
+    import open3d as o3d
+
+    OPEN3D_AVAILABLE = True
+except ImportError:
+    print("Open3D not available. Install with: pip install open3d")
+    OPEN3D_AVAILABLE = False
+
 try:
     from pxr import Usd, UsdGeom, Sdf, Gf, UsdShade
 
@@ -21,32 +30,83 @@ except ImportError:
     print("USD not available. Install with: pip install usd-core")
     USD_AVAILABLE = False
 
-
-def load_semantic_point_cloud(file_path, column_name='semantic_label'):
-    """Load semantic point cloud DATA from ASCII formats."""
-
-    df = pd.read_csv(file_path, delimiter=';')
+from geo_service.clustering import (
+    AUTO,
+    build_label_hierarchies,
+    estimate_label_eps,
+)
+from geo_service.instrumentation import PipelineMetrics, SamplingProfiler
+from geo_service.neighbours import INDEX_SUFFIX, NeighbourIndex
+from geo_service.obb import (
+    box_contains,
+    box_separation,
+    candidate_pairs,
+    fit_oriented_boxes,
+)
+from geo_service.point_store import scan_store_name
+from geo_service.sampling import sample_points
+from geo_service.usd_export import (
+    create_usd_geometry_stage,
+    geometry_layer_path,
+)
+from utils.graph_analytics import GraphAnalytics
+from utils.scene_catalog import CatalogObject, SceneCatalog
+from utils.scene_graph_store import (
+    SceneGraphArrays,
+    from_networkx,
+    save_scene_graph,
+)
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))), 'DATA')
+
+# Column types of the compact mode: half the memory of float64 columns
+# and one byte per label instead of a Python string per point
+COMPACT_DTYPES = {'x': np.float32, 'y': np.float32, 'z': np.float32,
+                  'R': np.uint8, 'G': np.uint8, 'B': np.uint8}
+
+
+def load_semantic_point_cloud(file_path, column_name='semantic_label',
+                              sample_size=70000, sampling='uniform', seed=1,
+                              compact=False):
+    """Load semantic point cloud DATA from ASCII formats.
+
+    At most `sample_size` points are kept; None keeps every point. They
+    are chosen with a geo_service.sampling strategy, whose per-label
+    sampling rates are stored in `df.attrs['sampling']`.
+
+    With `compact` coordinates are float32, colours uint8 and labels a
+    categorical column; the later stages keep these types.
+    """
+
+    df = pd.read_csv(file_path, delimiter=';',
+                     dtype=COMPACT_DTYPES if compact else None)
     class_names = ['ceiling', 'floor', 'wall', 'chair', 'furniture', 'table']
 
     # Assuming the numerical labels are 0.0, 1.0, 2.0, ...
-    label_map = {float(i): class_names[i] for i in range(len(class_names))}
-
-    df[column_name] = df[column_name].map(label_map)
+    if compact:
+        codes = df[column_name].to_numpy()
+        known = (codes >= 0) & (codes < len(class_names)) & (
+            codes == np.round(codes))
+        df[column_name] = pd.Categorical.from_codes(
+            np.where(known, codes, -1).astype(np.int8), class_names)
+    else:
+        label_map = {float(i): class_names[i]
+                     for i in range(len(class_names))}
+        df[column_name] = df[column_name].map(label_map)
 
     # I sample here for replication goals
-    return df.sample(n=70000, random_state=1)
-
-
-# Let us control the output of
-raw_data = load_semantic_point_cloud(
-    '../DATA/indoor_room_labelled_minimal.csv')
-# I sample here for replication goals
-# demo_data = raw_data.sample(n=100000, random_state=1)
+    df, df.attrs['sampling'] = sample_points(df, sample_size, sampling,
+                                             seed=seed, column=column_name)
+    return df
 
 
 def visualize_semantic_pointcloud(df, point_size=2.0):
     """Visualize semantic point cloud with flat colors per semantic label
     using Open3D."""
+    if not OPEN3D_AVAILABLE:
+        print("Open3D not available. Cannot visualize point cloud.")
+        return
 
     # Extract coordinates
     points = df[['x', 'y', 'z']].values
@@ -89,53 +149,91 @@ def visualize_semantic_pointcloud(df, point_size=2.0):
     vis.destroy_window()
 
 
-# Time to have fun
-# visualize_semantic_pointcloud(demo_data, point_size=3.0)
-
-
-def extract_semantic_objects(df: pd.DataFrame, eps: float = 0.5,
-                             min_samples: int = 10) -> Dict:
+def extract_semantic_objects(df: pd.DataFrame, eps=0.5,
+                             min_samples: int = 10,
+                             hierarchies: Dict = None,
+                             index: NeighbourIndex = None) -> Dict:
     """Extract individual objects from semantic point cloud using
-    clustering."""
+    clustering.
+
+    `eps` is one distance for all labels, a dict of distances per label,
+    or 'auto' to estimate each label's distance from its k-distance knee.
+    Labels missing from a dict of distances are not extracted.
+    With `hierarchies` from `build_label_hierarchies` the clusters are
+    cut from those HDBSCAN trees instead of running DBSCAN again; an
+    `eps` of None then keeps HDBSCAN's own clusters. With a
+    geo_service.neighbours `index` of `df`, DBSCAN runs on its radius
+    graphs.
+    """
     objects = {}
+    if eps == AUTO:
+        eps = estimate_label_eps(df, min_samples, index=index)
 
     for label in df['semantic_label'].unique():
         label_points = df[df['semantic_label'] == label]
 
-        if len(label_points) < min_samples:
+        if len(label_points) < min_samples or (
+                isinstance(eps, dict) and label not in eps):
             continue
 
-        # Apply DBSCAN clustering
-        coords = label_points[['x', 'y', 'z']].values
-        clustering = DBSCAN(eps=eps, min_samples=min_samples).fit(coords)
-
-        # Group by cluster
-        label_points_copy = label_points.copy()
-        label_points_copy['cluster'] = clustering.labels_
-
-        for cluster_id in np.unique(clustering.labels_):
+        # Coordinates are taken out once per label, in the frame's dtype
+        coords = label_points[['x', 'y', 'z']].to_numpy()
+        label_eps = eps[label] if isinstance(eps, dict) else eps
+        if hierarchies is not None:
+            hierarchy = hierarchies[label]
+            cluster_labels = (hierarchy.labels if label_eps is None
+                              else hierarchy.cut(label_eps))
+        elif index is not None:
+            cluster_labels = index.dbscan(label, label_eps, min_samples)
+        else:
+            # Apply DBSCAN clustering
+            cluster_labels = DBSCAN(eps=label_eps,
+                                    min_samples=min_samples).fit(coords).labels_
+
+        # Group by cluster; compact frames get int32 cluster ids. The
+        # copy consolidates the columns into one block per dtype, so the
+        # coordinates of every object are later read without a copy
+        cluster_labels = cluster_labels.astype(
+            np.int32 if coords.dtype == np.float32 else np.int64)
+        label_points = label_points.copy()
+        label_points['cluster'] = cluster_labels
+
+        for cluster_id in np.unique(cluster_labels):
             if cluster_id == -1:  # Skip noise points
                 continue
 
-            cluster_points = label_points_copy[
-                label_points_copy['cluster'] == cluster_id]
+            in_cluster = cluster_labels == cluster_id
+            cluster_coords = coords[in_cluster]
             object_key = f"{label}_{cluster_id}"
 
+            # Centroids and bounds are float64 in either mode
             objects[object_key] = {
-                'points': cluster_points,
-                'centroid': cluster_points[['x', 'y', 'z']].mean().values,
+                'points': label_points[in_cluster],
+                'centroid': cluster_coords.mean(axis=0, dtype=np.float64),
                 'bounds': {
-                    'min': cluster_points[['x', 'y', 'z']].min().values,
-                    'max': cluster_points[['x', 'y', 'z']].max().values
+                    'min': cluster_coords.min(axis=0).astype(np.float64),
+                    'max': cluster_coords.max(axis=0).astype(np.float64)
                 },
                 'semantic_label': label,
-                'point_count': len(cluster_points)
+                'point_count': len(cluster_coords)
             }
 
     return objects
 
 
-objects = extract_semantic_objects(raw_data)
+def add_oriented_boxes(objects):
+    """Fit a PCA oriented box to every object in one batched pass.
+
+    Each object gets an 'obb' entry with 'center', 'axes' (rows) and
+    'half_extents'.
+    """
+    names = list(objects)
+    centers, axes, half_extents = fit_oriented_boxes(
+        [objects[name]['points'][['x', 'y', 'z']].values for name in names])
+    for i, name in enumerate(names):
+        objects[name]['obb'] = {'center': centers[i], 'axes': axes[i],
+                                'half_extents': half_extents[i]}
+    return objects
 
 
 def visualize_room_furniture_graph(furniture_data):
@@ -153,23 +251,6 @@ def visualize_room_furniture_graph(furniture_data):
     plt.show()
 
 
-# Example of a room description:
-room_layout = {
-    "bed": ["nightstand", "lamp", "rug"],
-    "nightstand": ["bed", "lamp"],
-    "lamp": ["bed", "nightstand"],
-    "rug": ["bed", "sofa", "bookshelf"],
-    "sofa": ["coffee table", "TV", "rug"],
-    "coffee table": ["sofa", "TV"],
-    "TV": ["sofa", "coffee table", "TV stand"],
-    "TV stand": ["TV"],
-    "bookshelf": ["desk"],
-    "desk": ["bookshelf", "chair"],
-    "chair": ["desk"]
-}
-visualize_room_furniture_graph(room_layout)
-
-
 def estimate_surface_area(points):
     from scipy.spatial import ConvexHull
     try:
@@ -207,74 +288,55 @@ def compute_object_features(objects):
     return features
 
 
-# Let us compute our features
-features = compute_object_features(objects)
-
-print()
-
-
-def is_contained(bounds1, bounds2):
-    """Check if object1 is contained within object2."""
-    return (np.all(bounds1['min'] >= bounds2['min']) and
-            np.all(bounds1['max'] <= bounds2['max']))
-
-
-def are_adjacent(bounds1, bounds2, tolerance=0.1):
-    # Check if faces are close along each axis
-    for axis in range(3):  # X, Y, Z axes
-        # Face-to-face proximity checks
-        if (abs(bounds1['max'][axis] - bounds2['min'][axis]) < tolerance or
-                abs(bounds2['max'][axis] - bounds1['min'][axis]) < tolerance):
-            return True
-    return False
-
-
-def determine_relationship_type(obj1, obj2, threshold):
-    centroid1 = obj1['centroid']
-    centroid2 = obj2['centroid']
-
-    distance = np.linalg.norm(centroid1 - centroid2)
-    if distance > threshold:
-        return None  # Too far apart
-
-    # Vertical relationship analysis
-    z_diff = centroid1[2] - centroid2[2]
-    if abs(z_diff) > 0.5:  # Significant height difference
-        return 'above' if z_diff > 0 else 'below'
-
-    # Containment analysis
-    bounds1 = obj1['bounds']
-    bounds2 = obj2['bounds']
-
-    if is_contained(bounds1, bounds2):
-        return 'inside'
-    elif is_contained(bounds2, bounds1):
-        return 'contains'
-
-    # Adjacency analysis
-    if are_adjacent(bounds1, bounds2, tolerance=0.3):
-        return 'adjacent'
-
-    return 'near'  # Default fallback
+# Surface gap up to which boxes touch, and up to which they are near
+ADJACENT_GAP = 0.1
+NEAR_GAP = 0.5
+# Centroid height difference that makes a relationship vertical
+VERTICAL_OFFSET = 0.5
 
 
 def compute_spatial_relationships(objects, distance_threshold=2.0):
-    relationships = []
-    object_names = list(objects.keys())
-
-    for i, obj1 in enumerate(object_names):
-        for j, obj2 in enumerate(object_names[i + 1:],
-                                 i + 1):  # Avoid duplicates
-            rel_type = determine_relationship_type(objects[obj1],
-                                                   objects[obj2],
-                                                   distance_threshold)
-            if rel_type:  # Only keep valid relationships
-                relationships.append((obj1, obj2, rel_type))
-
-    return relationships
-
-
-relationships = compute_spatial_relationships(objects)
+    """Relate objects whose oriented boxes touch, nest or nearly touch.
+
+    Candidate pairs come from a k-d tree over box centres; gaps and
+    containment are then tested in bulk with the separating axis theorem.
+    Boxes overlapping or within ADJACENT_GAP are adjacent, within
+    NEAR_GAP near when their centroids are at most `distance_threshold`
+    apart. Related pairs more than VERTICAL_OFFSET apart in height are
+    above/below, and nested boxes inside/contains. Objects without an
+    'obb' entry get one from `add_oriented_boxes` first.
+    """
+    names = list(objects)
+    if any('obb' not in objects[name] for name in names):
+        add_oriented_boxes(objects)
+    centers = np.array([objects[name]['obb']['center'] for name in names])
+    axes = np.array([objects[name]['obb']['axes'] for name in names])
+    half_extents = np.array([objects[name]['obb']['half_extents']
+                             for name in names])
+    first, second = candidate_pairs(centers.reshape(-1, 3),
+                                    half_extents.reshape(-1, 3), NEAR_GAP)
+    if len(first) == 0:
+        return []
+
+    gap = box_separation(centers, axes, half_extents, first, second)
+    centroids = np.array([objects[name]['centroid'] for name in names])
+    distance = np.linalg.norm(centroids[first] - centroids[second], axis=1)
+    related = (gap <= ADJACENT_GAP) | (
+        (gap <= NEAR_GAP) & (distance <= distance_threshold))
+    first, second, gap = first[related], second[related], gap[related]
+
+    z_diff = centroids[first, 2] - centroids[second, 2]
+    inside = box_contains(centers, axes, half_extents, second, first,
+                          ADJACENT_GAP)
+    contains = box_contains(centers, axes, half_extents, first, second,
+                            ADJACENT_GAP)
+    # Same precedence as before: height, then nesting, then contact
+    types = np.select(
+        [z_diff > VERTICAL_OFFSET, z_diff < -VERTICAL_OFFSET, inside,
+         contains, gap <= ADJACENT_GAP],
+        ['above', 'below', 'inside', 'contains', 'adjacent'], 'near')
+    return [(names[i], names[j], str(rel_type))
+            for i, j, rel_type in zip(first, second, types)]
 
 
 def build_scene_graph(objects, relationships, features):
@@ -299,38 +361,52 @@ def build_scene_graph(objects, relationships, features):
     return G
 
 
-scene_graph = build_scene_graph(objects, relationships, features)
-
-print()
-
-
 def analyze_scene_graph(G):
-    analysis = {
-        'node_count': G.number_of_nodes(),
-        'edge_count': G.number_of_edges(),
-        'semantic_distribution': {},
-        'relationship_types': {},
-        'connected_components': nx.number_weakly_connected_components(G),
-        'avg_degree': sum(dict(
-            G.degree()).values()) / G.number_of_nodes() if
-        G.number_of_nodes() > 0 else 0
+    """Summarise labels, relationship types, components and degree.
+
+    `G` is the networkx scene graph or its arrays as loaded by
+    utils.scene_graph_store; both are analysed with array operations.
+    """
+    if not isinstance(G, SceneGraphArrays):
+        G = from_networkx(G)
+    return GraphAnalytics(G).summary()
+
+
+def export_scene_summary(analysis, graph_path, summary_path):
+    """Write the scene graph analysis and the graph file name as JSON."""
+    summary = {
+        'graph_file': os.path.basename(graph_path),
+        **analysis,
+        # Labels may be numpy scalars, which json cannot use as keys
+        'semantic_distribution': {
+            str(label): count
+            for label, count in analysis['semantic_distribution'].items()},
     }
+    with open(summary_path, 'w') as f:
+        json.dump(summary, f, indent=2)
+    return summary_path
 
-    # Analyze semantic distribution
-    for node, data in G.nodes(data=True):
-        label = data.get('semantic_label', 'unknown')
-        analysis['semantic_distribution'][label] = analysis[
-                                                       'semantic_distribution'].get(
-            label, 0) + 1
-
-    # Analyze relationship types
-    for _, _, data in G.edges(data=True):
-        rel = data.get('relationship', 'unknown')
-        analysis['relationship_types'][rel] = analysis[
-                                                  'relationship_types'].get(
-            rel, 0) + 1
 
-    return analysis
+def catalog_scene(catalog_path, output_usd, scene_graph, objects, analysis):
+    """Add or replace the scene in the scene catalogue."""
+    catalog_objects = []
+    for node, data in scene_graph.nodes(data=True):
+        bounds = objects[node]['bounds']
+        catalog_objects.append(CatalogObject(
+            name=str(node),
+            label=str(data['semantic_label']),
+            centroid=tuple(float(v) for v in data['centroid']),
+            volume=float(data.get('volume', 0.0)),
+            point_count=int(data['point_count']),
+            bounds_min=tuple(float(v) for v in bounds['min']),
+            bounds_max=tuple(float(v) for v in bounds['max'])))
+
+    catalog = SceneCatalog(catalog_path)
+    try:
+        catalog.record_scene(output_usd, catalog_objects,
+                             analysis['relationship_types'])
+    finally:
+        catalog.close()
 
 
 def create_usd_object(stage, node_name, node_data):
@@ -412,38 +488,117 @@ def create_usd_stage(scene_graph: nx.DiGraph, output_path: str) -> bool:
 
 
 def process_semantic_pointcloud_to_usd(input_path, output_usd, eps=0.8,
-                                       min_samples=15, distance_threshold=3.0):
-    """Complete pipeline from semantic point cloud to USD scene graph."""
+                                       min_samples=15, distance_threshold=3.0,
+                                       profile_path=None, metrics_path=None,
+                                       export_otel=False, catalog_path=None,
+                                       cluster_method='dbscan',
+                                       sampling='uniform', compact=False,
+                                       index_dir=None):
+    """Complete pipeline from semantic point cloud to USD scene graph.
+
+    `eps='auto'` estimates the clustering distance of each label; the
+    distances used are returned in `results['cluster_eps']`. With
+    `cluster_method='hdbscan'` each label's HDBSCAN tree is built once
+    and cut at `eps`, or used as is when `eps` is None.
+
+    `sampling` picks the geo_service.sampling strategy used to load the
+    points; the sampling rate of each label is in `results['sampling']`.
+    `compact` runs every stage on float32 coordinates and categorical
+    labels.
+
+    Neighbour searches of `eps='auto'` and DBSCAN share the k-d trees and
+    radius graphs of a geo_service.neighbours index. With `index_dir` the
+    graphs are saved there and reused when the scan is processed again.
+
+    Per-stage timings and peak RSS growth, the process' peak RSS and
+    processed item counts are returned in `results['metrics']`.
+    `metrics_path` additionally writes them as a Prometheus textfile,
+    `export_otel` records them on the global OpenTelemetry meter provider
+    (`results['opentelemetry_exported']` is False without the API), and
+    `profile_path` runs a sampling profiler and writes folded stacks for
+    flamegraph tools.
+
+    With `catalog_path` the scene's objects and relationship counts are
+    added to that utils.scene_catalog database.
+
+    A `.usdc` output is written in binary crate format with all
+    relationships and every object's points, which go to a
+    `_geometry.usdc` payload layer; `.usda` keeps the placeholder cubes.
+    """
+    if cluster_method not in ('dbscan', 'hdbscan'):
+        raise ValueError(f"Unknown cluster method {cluster_method}")
     results = {'success': False, 'files_created': [], 'analysis': {}}
+    metrics = PipelineMetrics()
+    profiler = None
+    if profile_path:
+        profiler = SamplingProfiler(metrics=metrics)
+        profiler.start()
 
     try:
         # Load and validate data
         print("Loading semantic point cloud...")
-        df = load_semantic_point_cloud(input_path)
+        with metrics.stage('load'):
+            df = load_semantic_point_cloud(input_path, sampling=sampling,
+                                           compact=compact)
+        metrics.count('points', len(df))
+        results['sampling'] = df.attrs['sampling']
 
         print(
             f"Loaded {len(df)} points with {df['semantic_label'].nunique()} "
             f"semantic classes")
 
+        index_path = None
+        if index_dir is not None:
+            index_path = os.path.join(index_dir, scan_store_name(
+                input_path, sampling=sampling, compact=compact)
+                + INDEX_SUFFIX)
+        with metrics.stage('load_index'):
+            index = (NeighbourIndex.load(index_path, df) if index_path
+                     else NeighbourIndex.from_frame(df))
+
+        if eps == AUTO:
+            with metrics.stage('estimate_parameters'):
+                eps = estimate_label_eps(df, min_samples, index=index)
+        results['cluster_eps'] = eps
+        hierarchies = None
+        if cluster_method == 'hdbscan':
+            with metrics.stage('build_hierarchies'):
+                hierarchies = build_label_hierarchies(df, min_samples)
+
         # Extract objects
         print("Extracting semantic objects...")
-        objects = extract_semantic_objects(df, eps=eps,
-                                           min_samples=min_samples)
+        with metrics.stage('extract_objects'):
+            objects = extract_semantic_objects(df, eps=eps,
+                                               min_samples=min_samples,
+                                               hierarchies=hierarchies,
+                                               index=index)
+        if index_path and index.modified:
+            with metrics.stage('save_index'):
+                index.save(index_path)
+        metrics.count('objects', len(objects))
+        metrics.count('clustered_points',
+                      sum(obj['point_count'] for obj in objects.values()))
+        metrics.count_clusters(objects)
         print(f"Found {len(objects)} objects")
 
         # Compute features
         print("Computing object features...")
-        features = compute_object_features(objects)
+        with metrics.stage('compute_features'):
+            features = compute_object_features(objects)
 
         # Find relationships
         print("Computing spatial relationships...")
-        relationships = compute_spatial_relationships(objects,
-                                                      distance_threshold)
+        with metrics.stage('compute_relationships'):
+            relationships = compute_spatial_relationships(objects,
+                                                          distance_threshold)
         print(f"Found {len(relationships)} spatial relationships")
 
         # Build scene graph
         print("Building scene graph...")
-        scene_graph = build_scene_graph(objects, relationships, features)
+        with metrics.stage('build_scene_graph'):
+            scene_graph = build_scene_graph(objects, relationships, features)
+        metrics.count('nodes', scene_graph.number_of_nodes())
+        metrics.count('edges', scene_graph.number_of_edges())
 
         # Validate scene graph
         # validation = validate_scene_graph(scene_graph)
@@ -454,30 +609,103 @@ def process_semantic_pointcloud_to_usd(input_path, output_usd, eps=0.8,
         # Export to USD
         if USD_AVAILABLE:
             print(f"Exporting to USD: {output_usd}")
-            usd_success = create_usd_stage(scene_graph, output_usd)
+            with metrics.stage('export_usd'):
+                if output_usd.endswith('.usdc'):
+                    usd_success = create_usd_geometry_stage(
+                        scene_graph, objects, output_usd)
+                else:
+                    usd_success = create_usd_stage(scene_graph, output_usd)
             if usd_success:
                 results['files_created'].append(output_usd)
+                if output_usd.endswith('.usdc'):
+                    results['files_created'].append(
+                        geometry_layer_path(output_usd))
+
+        # Export the scene graph so consumers can reload it without
+        # rerunning the pipeline
+        output_stem = os.path.splitext(output_usd)[0]
+        graph_path = output_stem + '_graph.sgraph'
+        with metrics.stage('export_graph'):
+            save_scene_graph(scene_graph, graph_path)
+        results['files_created'].append(graph_path)
+
+        # Store analysis results
+        with metrics.stage('analyze'):
+            results['analysis'] = analyze_scene_graph(scene_graph)
 
         # Export summary
-        summary_path = output_usd.replace('.usda', '_summary.json')
-        # export_scene_summary(scene_graph, summary_path)
+        summary_path = output_stem + '_summary.json'
+        export_scene_summary(results['analysis'], graph_path, summary_path)
         results['files_created'].append(summary_path)
 
-        # Store analysis results
-        results['analysis'] = analyze_scene_graph(scene_graph)
+        if catalog_path:
+            with metrics.stage('catalog'):
+                catalog_scene(catalog_path, output_usd, scene_graph, objects,
+                              results['analysis'])
         # results['validation'] = validation
         results['success'] = True
 
         print("Pipeline completed successfully!")
 
     except Exception as e:
-        print(f"Pipeline failed: {str(e)}")
+        print(f"Pipeline failed in stage {metrics.failed_stage}: {str(e)}")
         results['error'] = str(e)
+        results['error_stage'] = metrics.failed_stage
+        results['traceback'] = traceback.format_exc()
+
+    finally:
+        if profiler is not None:
+            profiler.stop()
+            profiler.write_folded(profile_path)
+            results['files_created'].append(profile_path)
+
+    results['metrics'] = metrics.as_dict()
+    if metrics_path:
+        metrics.write_prometheus(metrics_path)
+        results['files_created'].append(metrics_path)
+    if export_otel:
+        results['opentelemetry_exported'] = metrics.export_opentelemetry()
 
     return results
 
 
-# Complete pipeline execution
-process_semantic_pointcloud_to_usd('agent/DATA/indoor_room_labelled.csv',
-                                   'demo_scene_c.usda', eps=0.2,
-                                   min_samples=20, distance_threshold=3.0)
+if __name__ == "__main__":
+    # Let us control the output of
+    raw_data = load_semantic_point_cloud(
+        os.path.join(DATA_DIR, 'indoor_room_labelled_minimal.csv'))
+    # I sample here for replication goals
+    # demo_data = raw_data.sample(n=100000, random_state=1)
+
+    # Time to have fun
+    # visualize_semantic_pointcloud(demo_data, point_size=3.0)
+
+    objects = extract_semantic_objects(raw_data)
+
+    # Example of a room description:
+    room_layout = {
+        "bed": ["nightstand", "lamp", "rug"],
+        "nightstand": ["bed", "lamp"],
+        "lamp": ["bed", "nightstand"],
+        "rug": ["bed", "sofa", "bookshelf"],
+        "sofa": ["coffee table", "TV", "rug"],
+        "coffee table": ["sofa", "TV"],
+        "TV": ["sofa", "coffee table", "TV stand"],
+        "TV stand": ["TV"],
+        "bookshelf": ["desk"],
+        "desk": ["bookshelf", "chair"],
+        "chair": ["desk"]
+    }
+    visualize_room_furniture_graph(room_layout)
+
+    # Let us compute our features
+    features = compute_object_features(objects)
+
+    relationships = compute_spatial_relationships(objects)
+
+    scene_graph = build_scene_graph(objects, relationships, features)
+
+    # Complete pipeline execution
+    process_semantic_pointcloud_to_usd(
+        os.path.join(DATA_DIR, 'indoor_room_labelled_minimal.csv'),
+        'demo_scene_c.usda', eps=0.2, min_samples=20,
+        distance_threshold=3.0)
@@ -1,60 +1,126 @@
+import asyncio
+import atexit
 import json
+import os
+import time
 
 import numpy as np
-import openai
 from dotenv import load_dotenv
-from openai import OpenAI
+from openai import AsyncOpenAI
+
+from geo_service.point_store import open_scan_store
+from utils.config import get_trace_path
+from utils.prompt_prefix import PromptPrefix, scene_digest
+from utils.tracing import Tracer, open_sink
 
 # Load environment variables
 load_dotenv(override=True)
 
 # Initialize OpenAI client with API key
-client = OpenAI()
-
-"""Initialize the chatbot with USD file context"""
+client = AsyncOpenAI()
 
-# Start a conversation for memory management
-conversation = openai.conversations.create()
+# Local span tracing of turns, LLM calls and tools (TRACE_PATH)
+trace_path = get_trace_path()
+tracer = Tracer(open_sink(trace_path) if trace_path else None)
 
-print(f"Starting conversation with ID {conversation.id}")
-print("Loading USD file context...")
+MODEL = "gpt-5"
 
 # Read the content of minimal.usda
 usda_file = "agent/DATA/demo_scene_c.usda"
 # usda_file = "minimal.usda"
 usda_file = "../DATA/demo_scene_c_minimal.usda"
 
-with open(usda_file, "r") as f:
-    usd_content = f.read()
-
-system_prompt = (f"You're a spatial data analyst. "
-                 f"You have read the following USD file which contains a "
-                 f"scene:"
-                 f"{usd_content} "
-                 f"You only read this file, do not analyse the file yet."
-                 f"The file is only an abstraction of a complete point cloud."
-                 f"If you can't answer a question about the scene from the "
-                 f"USD file, consider using tools to do more advanced "
-                 f"computations."
-                 f"Prefer giving high-level, human friendly answers - only "
-                 f"give technical details when explicitly asked")
+# Point cloud the objects of the USD scene were extracted from
+point_cloud_file = "../DATA/indoor_room_labelled_minimal.csv"
+point_store = None
+
+
+# Static instructions come first and the scene after them, so every
+# request on one scene version starts with the same cacheable bytes
+INSTRUCTIONS = ("You're a spatial data analyst. "
+                "You have read the USD file at the end of these "
+                "instructions, which contains a scene. "
+                "You only read this file, do not analyse the file yet. "
+                "The file is only an abstraction of a complete point cloud. "
+                "If you can't answer a question about the scene from the "
+                "USD file, consider using tools to do more advanced "
+                "computations. "
+                "Prefer giving high-level, human friendly answers - only "
+                "give technical details when explicitly asked")
+
+
+def make_prompt_prefix(usd_content):
+    """Instructions sent with every request, the USD scene last."""
+    return PromptPrefix(INSTRUCTIONS, scene_digest(
+        {os.path.basename(usda_file): usd_content}))
+
+
+async def stream_response(**kwargs):
+    """Stream a response inside an LLM span, printing text as it arrives.
+
+    Returns the completed response, with token usage and time to first
+    token recorded on the span.
+    """
+    with tracer.span("llm", kwargs.get("model", "unknown")) as span:
+        span["input_bytes"] = len(json.dumps(kwargs.get("input"),
+                                             default=str))
+        start = time.perf_counter()
+        response = None
+        stream = await client.responses.create(stream=True, **kwargs)
+        async for event in stream:
+            if event.type == "response.output_text.delta":
+                if "ttft_ms" not in span:
+                    span["ttft_ms"] = (time.perf_counter() - start) * 1000
+                    print("\nAssistant: ", end="")
+                print(event.delta, end="", flush=True)
+            elif event.type in ("response.completed", "response.incomplete",
+                                "response.failed"):
+                response = event.response
+        if response is None or response.status == "failed":
+            error = response.error.message if response else "stream ended"
+            raise RuntimeError(f"Response failed: {error}")
+        if "ttft_ms" in span:
+            print()
+        if response.usage is not None:
+            span["prompt_tokens"] = response.usage.input_tokens
+            span["completion_tokens"] = response.usage.output_tokens
+            span["cached_tokens"] = (
+                response.usage.input_tokens_details.cached_tokens)
+        return response
+
+
+async def warm_up(prefix):
+    """Send the fixed prompt prefix once so the first turn hits the cache."""
+    with tracer.span("llm", "warm_up"):
+        await client.responses.create(
+            model=MODEL, instructions=prefix.text(), tools=tools,
+            input="Reply with OK.", prompt_cache_key=prefix.cache_key,
+            reasoning={"effort": "minimal"}, max_output_tokens=16,
+            store=False)
+
+
+async def load_point_store():
+    """Open the scan's shared objects off the event loop."""
+    global point_store
+    # Attaches to the objects shared by other processes on this host
+    # and only clusters the point cloud if none has yet
+    point_store, _ = await asyncio.to_thread(open_scan_store,
+                                             point_cloud_file)
+    atexit.register(point_store.detach)
+    return point_store
 
 
 def calculate_point_cloud_distance(object_id_1, object_id_2):
 
     """Calculate distance between two objects using point cloud data."""
-    print(f"\nGetting objects from the point cloud file")
-    from basic_agent.geo_service.app import objects
-
-    if object_id_1 not in objects or object_id_2 not in objects:
-        return None
-
-    obj1_points = objects[object_id_1]['points'][['x', 'y', 'z']].values
-    obj2_points = objects[object_id_2]['points'][['x', 'y', 'z']].values
+    if not (point_store.has_object(object_id_1)
+            and point_store.has_object(object_id_2)):
+        return {"distance": None}
 
-    # use the distance between the two centroids
-    return np.linalg.norm(
-        objects[object_id_1]['centroid'] - objects[object_id_2]['centroid'])
+    # use the distance between the two centroids, as a proper float
+    return {"distance": float(np.linalg.norm(
+        point_store.centroid(object_id_1)
+        - point_store.centroid(object_id_2)))}
 
 
 tools = [
@@ -88,75 +154,128 @@ tools = [
     }
 ]
 
-# Alternative: fine-tuning via prompting
-# prompt += "refuse to answer anything else than questions about the USD file"
+tool_functions = {
+    "calculate_point_cloud_distance": calculate_point_cloud_distance,
+}
 
-response = client.responses.create(
-    model="gpt-5",
-    input=system_prompt,
-    conversation=conversation.id,
-)
 
-print("✓ USD file loaded successfully!")
-print(response.output_text)
-print("\n" + "=" * 50)
-print("Interactive USD Scene Chatbot Ready!")
-print("Type 'quit' or 'exit' to end the conversation")
-print("=" * 50 + "\n")
+def call_tool(item):
+    """Run one function call of a response in a tool span.
 
-"""Main interactive chat loop"""
-while True:
+    Tool functions return the payload sent back to the model; a tool
+    that fails returns its error instead, so every call gets an output.
+    """
+    print(f"\nDecided to use function {item.name} for this task")
     try:
+        with tracer.span("tool", item.name) as span:
+            span["args_bytes"] = len(item.arguments)
+            span["cache_hit"] = False
+            function = tool_functions.get(item.name)
+            if function is None:
+                result = {"error": f"Unknown tool {item.name}"}
+            else:
+                result = function(**json.loads(item.arguments))
+            output = json.dumps(result)
+            span["result_bytes"] = len(output)
+    except Exception as e:
+        output = json.dumps({"error": f"{type(e).__name__}: {e}"})
 
-        # get user input and format
-        user_input = input("\nYou: ").strip()
+    return {
+        "type": "function_call_output",
+        "call_id": item.call_id,
+        "output": output
+    }
 
-        if user_input.lower() in ['quit', 'exit', 'q']:
-            print("\nGoodbye! Thanks for using the USD Scene Chatbot.")
-            break
 
-        if not user_input:
-            continue
+async def answer(user_input, store_task, **request):
+    """Stream the answer to one user message, running tools as needed."""
+    with tracer.span("turn", "chat") as span:
+        span["prompt_tokens"] = span["cached_tokens"] = 0
 
-        print("\nAnalyzing...")
+        async def respond(turn_input):
+            response = await stream_response(input=turn_input, **request)
+            if response.usage is not None:
+                usage = response.usage
+                span["prompt_tokens"] += usage.input_tokens
+                span["cached_tokens"] += (
+                    usage.input_tokens_details.cached_tokens)
+            return response
 
         # send to the llm and print an answer
-        response = client.responses.create(
-            model="gpt-5",
-            input=user_input,
-            conversation=conversation.id,
-            tools=tools,
-        )
-
-        for item in response.output:
-            if item.type == "function_call":
-
-                print(f"\nDecided to use function {item.name} for this task")
-
-                if item.name == "calculate_point_cloud_distance":
-                    arguments = json.loads(item.arguments)
-                    distance = calculate_point_cloud_distance(**arguments)
-
-                    tool_response = {
-                        "type": "function_call_output",
-                        "call_id": item.call_id,
-                        "output": json.dumps({
-                            # make sure this is a proper float
-                            "distance": distance
-                        })
-                    }
-
-                    response = client.responses.create(
-                        model="gpt-5",
-                        conversation=conversation.id,
-                        input=[tool_response]
-                    )
-
-        print(f"\nAssistant: {response.output_text}")
-
-    except KeyboardInterrupt:
-        print("\n\nGoodbye! Thanks for using the USD Scene Chatbot.")
-        break
-    except Exception as e:
-        print(f"\nError: {str(e)}")
-        print("Please try again.")
+        response = await respond(user_input)
+        while True:
+            calls = [item for item in response.output
+                     if item.type == "function_call"]
+            if not calls:
+                break
+            await store_task
+            # Calls of one response run concurrently, answered together
+            outputs = await asyncio.gather(*(
+                asyncio.to_thread(call_tool, item) for item in calls))
+            response = await respond(list(outputs))
+        print(f"[prompt tokens: {span['cached_tokens']} cached, "  # noqa: T201
+              f"{span['prompt_tokens'] - span['cached_tokens']} uncached]")
+        return response
+
+
+async def main():
+    """Interactive chat loop over the USD scene."""
+    print("Loading USD file context...")
+    # Scene loading, the conversation and the cache warm-up overlap
+    store_task = asyncio.create_task(load_point_store())
+    conversation_task = asyncio.create_task(client.conversations.create())
+    with open(usda_file, "r") as f:
+        usd_content = f.read()
+    prefix = make_prompt_prefix(usd_content)
+    warm_up_task = asyncio.create_task(warm_up(prefix))
+    conversation = await conversation_task
+
+    print(f"Starting conversation with ID {conversation.id}")
+    print("✓ USD file loaded successfully!")
+    print("\n" + "=" * 50)
+    print("Interactive USD Scene Chatbot Ready!")
+    print("Type 'quit' or 'exit' to end the conversation")
+    print("=" * 50 + "\n")
+
+    # Alternative: fine-tuning via prompting, added to INSTRUCTIONS
+    # "refuse to answer anything else than questions about the USD file"
+    # Sessions on the same scene version share the cache key
+    request = {"model": MODEL, "conversation": conversation.id,
+               "instructions": prefix.text(), "tools": tools,
+               "prompt_cache_key": prefix.cache_key}
+
+    # Main interactive chat loop
+    try:
+        while True:
+            try:
+
+                # get user input and format
+                user_input = (await asyncio.to_thread(input,
+                                                      "\nYou: ")).strip()
+
+                if user_input.lower() in ['quit', 'exit', 'q']:
+                    print("\nGoodbye! Thanks for using the USD Scene "
+                          "Chatbot.")
+                    break
+
+                if not user_input:
+                    continue
+
+                print("\nAnalyzing...")
+                await answer(user_input, store_task, **request)
+
+            except (KeyboardInterrupt, EOFError):
+                print("\n\nGoodbye! Thanks for using the USD Scene Chatbot.")
+                break
+            except Exception as e:
+                print(f"\nError: {str(e)}")
+                print("Please try again.")
+    finally:
+        for task in (warm_up_task, store_task):
+            task.cancel()
+        await asyncio.gather(warm_up_task, store_task,
+                             return_exceptions=True)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,306 @@
+"""Batch runner for the point cloud to USD pipeline.
+
+Runs `process_semantic_pointcloud_to_usd` over many scans on a process
+pool:
+
+    python -m geo_service.batch 'scans/*.csv' --output-dir out
+    python -m geo_service.batch --manifest scans.json --workers 8
+
+A manifest is a JSON list of paths or of objects with an "input" path
+and pipeline options for that scan, e.g. {"input": "a.csv", "eps": 0.2};
+relative paths are resolved against the manifest's directory.
+
+Scans start largest first while the estimated memory of the running
+scans fits the memory limit, and each runs in a fresh worker process
+that exits afterwards, so memory is returned between scans. A scan is
+skipped when the content hash of its file and options matches one that
+already finished in `output_dir`, and retried when it fails. Per-scan
+timings and analysis are written to a CSV summary table.
+"""
+
+import argparse
+import csv
+import glob
+import hashlib
+import json
+import os
+import sys
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import redirect_stdout
+from pathlib import Path
+
+STATE_NAME = 'batch_state.json'
+SUMMARY_NAME = 'batch_summary.csv'
+# Peak RSS of a pipeline run: the imported libraries plus a multiple of
+# the CSV size, measured on the bundled and synthetic scenes
+BASE_MEMORY_MB = 500
+MEMORY_PER_INPUT_MB = 3
+# Share of the available memory the batch may plan to use
+MEMORY_FRACTION = 0.8
+SUMMARY_FIELDS = ['input', 'status', 'attempts', 'seconds', 'peak_rss_mb',
+                  'points', 'objects', 'relationships', 'output', 'error']
+
+
+def expand_inputs(patterns=(), manifest=None):
+    """Return the scans of glob patterns and a manifest as job dicts.
+
+    Raises ValueError naming the patterns that match no file.
+    """
+    matches = {pattern: sorted(glob.glob(pattern)) for pattern in patterns}
+    unmatched = [pattern for pattern, paths in matches.items() if not paths]
+    if unmatched:
+        raise ValueError(f"No scans match {', '.join(unmatched)}")
+    jobs = [{'input': path} for paths in matches.values() for path in paths]
+    if manifest is not None:
+        manifest = Path(manifest)
+        for entry in json.loads(manifest.read_text()):
+            job = dict(entry) if isinstance(entry, dict) else {'input': entry}
+            job['input'] = str(manifest.parent / job['input'])
+            jobs.append(job)
+    return jobs
+
+
+def content_hash(path, options):
+    """Hash the contents of a scan together with its pipeline options."""
+    digest = hashlib.sha256(json.dumps(options, sort_keys=True).encode())
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(2 ** 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def available_memory_mb():
+    """Return the free physical memory in MB, or None if unknown."""
+    try:
+        return (os.sysconf('SC_AVPHYS_PAGES') * os.sysconf('SC_PAGE_SIZE')
+                / 2 ** 20)
+    except (AttributeError, OSError, ValueError):
+        return None
+
+
+def estimate_memory_mb(path):
+    """Estimate the peak memory of running the pipeline on a scan."""
+    size_mb = os.path.getsize(path) / 2 ** 20
+    return BASE_MEMORY_MB + MEMORY_PER_INPUT_MB * size_mb
+
+
+def run_scan(input_path, output_path, log_path, options):
+    """Run the pipeline on one scan in a worker, logging to `log_path`."""
+    from geo_service.app import process_semantic_pointcloud_to_usd
+
+    with open(log_path, 'w') as log, redirect_stdout(log):
+        return process_semantic_pointcloud_to_usd(input_path, output_path,
+                                                  **options)
+
+
+def _load_state(path):
+    return json.loads(path.read_text()) if path.exists() else {}
+
+
+def _save_state(path, state):
+    staging = path.with_suffix('.tmp')
+    staging.write_text(json.dumps(state, indent=2) + "\n")
+    os.replace(staging, path)
+
+
+def _record(job, status, results=None, error=None):
+    metrics = (results or {}).get('metrics', {})
+    counters = metrics.get('counters', {})
+    return {
+        'input': job['input'],
+        'status': status,
+        'attempts': job['attempts'],
+        'seconds': metrics.get('total_seconds'),
+        'peak_rss_mb': metrics.get('peak_rss_mb'),
+        'points': counters.get('points'),
+        'objects': counters.get('objects'),
+        'relationships': counters.get('edges'),
+        'output': job['output'],
+        'error': error,
+        'analysis': (results or {}).get('analysis', {}),
+    }
+
+
+def run_batch(inputs, output_dir, workers=None, memory_limit_mb=None,
+              retries=1, force=False, output_format='usdc', **options):
+    """Run the pipeline on every scan and return one record per scan.
+
+    `inputs` are paths or job dicts from `expand_inputs`; the options of
+    a job override `options`, which are passed on to
+    `process_semantic_pointcloud_to_usd`. Outputs are written to
+    `output_dir` as `<scan name>.<output_format>` with the pipeline's
+    companion files and a `.log` of its output.
+
+    Up to `workers` scans (the CPU count by default) run at once, as long
+    as their estimated memory stays within `memory_limit_mb`, which
+    defaults to a share of the free memory. A failed scan is run again
+    up to `retries` times. Scans that finished in an earlier batch are
+    skipped unless `force` is set. Scans that cannot be read are
+    recorded as failed.
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+    if memory_limit_mb is None:
+        available = available_memory_mb()
+        memory_limit_mb = (available * MEMORY_FRACTION if available
+                           else float('inf'))
+    state_path = output_dir / STATE_NAME
+    state = _load_state(state_path)
+
+    jobs, records, names = [], [], set()
+    for entry in inputs:
+        job = dict(entry) if isinstance(entry, dict) else {'input': entry}
+        name = Path(job['input']).stem
+        if name in names:
+            raise ValueError(f"Two scans are named {name}; outputs would "
+                             f"overwrite each other")
+        names.add(name)
+        job['options'] = {**options, **{key: value for key, value
+                                        in job.items() if key != 'input'}}
+        job['output'] = str(output_dir / f"{name}.{output_format}")
+        job['log'] = str(output_dir / f"{name}.log")
+        job['attempts'] = 0
+        try:
+            job['hash'] = content_hash(job['input'], job['options'])
+        except OSError as e:
+            records.append(_record(job, 'failed',
+                                   error=f"{type(e).__name__}: {e}"))
+            continue
+        done = state.get(job['hash'])
+        if (not force and done is not None
+                and all(Path(path).exists() for path in done['files'])):
+            # The same content may have been run under another path
+            records.append({**done['record'], 'input': job['input'],
+                            'output': job['output'], 'status': 'skipped'})
+            continue
+        job['memory_mb'] = estimate_memory_mb(job['input'])
+        jobs.append(job)
+
+    pending = sorted(jobs, key=lambda job: -job['memory_mb'])
+    running = {}
+    pool = ProcessPoolExecutor(workers, max_tasks_per_child=1)
+    try:
+        while pending or running:
+            for job in list(pending):
+                if len(running) >= workers:
+                    break
+                planned = sum(other['memory_mb']
+                              for other in running.values())
+                # A scan larger than the limit still runs, but alone
+                if running and planned + job['memory_mb'] > memory_limit_mb:
+                    continue
+                pending.remove(job)
+                job['attempts'] += 1
+                future = pool.submit(run_scan, job['input'], job['output'],
+                                     job['log'], job['options'])
+                running[future] = job
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            broken = False
+            for future in finished:
+                job = running.pop(future)
+                try:
+                    results = future.result()
+                    error = (None if results['success']
+                             else results.get('error', 'pipeline failed'))
+                except BrokenProcessPool as e:
+                    results, error, broken = None, f"worker died: {e}", True
+                except Exception as e:
+                    results, error = None, f"{type(e).__name__}: {e}"
+
+                if error is None:
+                    record = _record(job, 'done', results)
+                    state[job['hash']] = {'record': record,
+                                          'files': results['files_created']}
+                    _save_state(state_path, state)
+                    records.append(record)
+                elif job['attempts'] <= retries:
+                    print(f"Retrying {job['input']}: {error}",  # noqa: T201
+                          file=sys.stderr)
+                    pending.append(job)
+                else:
+                    records.append(_record(job, 'failed', results, error))
+            if broken:
+                # A dead worker breaks the pool and fails every running scan
+                pool.shutdown(cancel_futures=True)
+                pool = ProcessPoolExecutor(workers, max_tasks_per_child=1)
+    finally:
+        pool.shutdown(cancel_futures=True)
+
+    order = {str(job['input']): i for i, job in enumerate(
+        dict(entry) if isinstance(entry, dict) else {'input': entry}
+        for entry in inputs)}
+    records.sort(key=lambda record: order[str(record['input'])])
+    write_summary(records, output_dir / SUMMARY_NAME)
+    return records
+
+
+def write_summary(records, path):
+    """Write the per-scan records as a CSV table."""
+    with open(path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, SUMMARY_FIELDS, extrasaction='ignore')
+        writer.writeheader()
+        writer.writerows(records)
+
+
+def format_summary(records):
+    """Render the per-scan records as a plain text table."""
+    def number(value, spec):
+        return '-' if value is None else format(value, spec)
+
+    lines = [f"{'scan':<40} {'status':<8} {'time [s]':>10} "
+             f"{'peak [MB]':>10} {'objects':>8} {'edges':>8}"]
+    for record in records:
+        lines.append(f"{Path(record['input']).name:<40} "
+                     f"{record['status']:<8} "
+                     f"{number(record['seconds'], '.2f'):>10} "
+                     f"{number(record['peak_rss_mb'], '.0f'):>10} "
+                     f"{number(record['objects'], 'd'):>8} "
+                     f"{number(record['relationships'], 'd'):>8}")
+    return "\n".join(lines)
+
+
+def main():
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('inputs', nargs='*', help='point cloud CSV globs')
+    parser.add_argument('--manifest', type=Path)
+    parser.add_argument('--output-dir', type=Path, default=Path('batch_out'))
+    parser.add_argument('--workers', type=int)
+    parser.add_argument('--memory-limit-mb', type=float)
+    parser.add_argument('--retries', type=int, default=1)
+    parser.add_argument('--force', action='store_true',
+                        help='rerun scans that already finished')
+    parser.add_argument('--format', choices=['usdc', 'usda'], default='usdc')
+    parser.add_argument('--eps', default='auto',
+                        help="clustering distance or 'auto'")
+    parser.add_argument('--min-samples', type=int, default=15)
+    parser.add_argument('--distance-threshold', type=float, default=3.0)
+    parser.add_argument('--compact', action='store_true',
+                        help='float32 coordinates and categorical labels')
+    parser.add_argument('--sampling', default='uniform')
+    args = parser.parse_args()
+
+    try:
+        jobs = expand_inputs(args.inputs, args.manifest)
+    except ValueError as e:
+        parser.error(str(e))
+    if not jobs:
+        parser.error('no scans given')
+    eps = args.eps if args.eps == 'auto' else float(args.eps)
+    records = run_batch(jobs, args.output_dir, workers=args.workers,
+                        memory_limit_mb=args.memory_limit_mb,
+                        retries=args.retries, force=args.force,
+                        output_format=args.format, eps=eps,
+                        min_samples=args.min_samples,
+                        distance_threshold=args.distance_threshold,
+                        sampling=args.sampling,
+                        compact=args.compact)
+    print(format_summary(records))  # noqa: T201
+    return 1 if any(record['status'] == 'failed' for record in records) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
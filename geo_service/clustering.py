@@ -0,0 +1,116 @@
+"""Per-label clustering parameters and reusable density hierarchies.
+
+DBSCAN needs an `eps` that suits the point spacing of each label: walls
+and floors are scanned far more densely than chairs. `estimate_eps`
+picks it from the knee of the sorted k-distance curve, the distance at
+which a point's `min_samples`-th neighbour stops being close and starts
+being an outlier. The distances of a random subsample are looked up in a
+k-d tree over all of the label's points, so the estimate sees the true
+density at a small fraction of the cost of clustering.
+
+`LabelHierarchy` runs HDBSCAN once and keeps its cluster tree. Cutting
+the tree at any `eps` gives the DBSCAN* clusters for that density in
+milliseconds, so sweeping densities no longer reclusters the points.
+"""
+
+import numpy as np
+from scipy.spatial import cKDTree
+from sklearn.cluster import HDBSCAN
+
+AUTO = 'auto'
+# Points whose k-distances sample the knee of each label
+KNEE_SAMPLE_SIZE = 5000
+# Smallest estimate: DBSCAN needs a positive `eps`, and the points of a
+# label that all coincide have no spread to take a knee from
+MIN_EPS = 1e-6
+
+
+def _knee(distances):
+    """Return the knee of k-distances: furthest below their chord.
+
+    The knee is at least MIN_EPS.
+    """
+    distances = np.sort(distances)
+    spread = distances[-1] - distances[0]
+    if spread <= 0:
+        return max(float(distances[-1]), MIN_EPS)
+    position = np.linspace(0, 1, len(distances))
+    knee = np.argmax(position - (distances - distances[0]) / spread)
+    return max(float(distances[knee]), MIN_EPS)
+
+
+def _sample_rows(n, sample_size, seed):
+    if n <= sample_size:
+        return None
+    return np.random.default_rng(seed).choice(n, sample_size, replace=False)
+
+
+def estimate_eps(coords, min_samples, sample_size=KNEE_SAMPLE_SIZE, seed=0):
+    """Estimate DBSCAN's `eps` from the knee of the k-distance curve.
+
+    The knee is the point of the sorted distances to each point's
+    `min_samples`-th neighbour that lies furthest below the chord from
+    the smallest to the largest distance. The estimate is at least
+    MIN_EPS.
+    """
+    coords = np.asarray(coords, dtype=np.float64)
+    k = min(min_samples, len(coords))
+    if k < 2:
+        return MIN_EPS
+    rows = _sample_rows(len(coords), sample_size, seed)
+    sample = coords if rows is None else coords[rows]
+    # A point is its own first neighbour, as in DBSCAN's min_samples
+    distances, _ = cKDTree(coords).query(sample, k=k)
+    return _knee(distances[:, -1])
+
+
+def estimate_label_eps(df, min_samples, sample_size=KNEE_SAMPLE_SIZE,
+                       seed=0, index=None):
+    """Return the estimated `eps` of every label with enough points.
+
+    With a geo_service.neighbours index the k-distances come from its
+    k-d trees, which clustering then reuses.
+    """
+    eps = {}
+    if index is None:
+        for label, points in df.groupby('semantic_label', sort=False,
+                                        observed=True):
+            if len(points) >= min_samples:
+                eps[label] = estimate_eps(points[['x', 'y', 'z']].values,
+                                          min_samples, sample_size, seed)
+        return eps
+    for label, coords in index.coords.items():
+        if len(coords) >= min_samples:
+            k = min(min_samples, len(coords))
+            eps[label] = (MIN_EPS if k < 2 else _knee(index.k_distances(
+                label, k, _sample_rows(len(coords), sample_size, seed))))
+    return eps
+
+
+class LabelHierarchy:
+    """HDBSCAN cluster tree of one label's points."""
+
+    def __init__(self, coords, min_samples):
+        """Cluster `coords` with HDBSCAN and keep its tree."""
+        self.min_samples = min_samples
+        self.model = HDBSCAN(min_cluster_size=min_samples,
+                             min_samples=min_samples, copy=True).fit(coords)
+
+    @property
+    def labels(self):
+        """Cluster ids chosen by HDBSCAN itself, -1 for noise."""
+        return self.model.labels_
+
+    def cut(self, eps):
+        """Return the cluster ids of a DBSCAN* clustering at `eps`."""
+        return self.model.dbscan_clustering(
+            eps, min_cluster_size=self.min_samples)
+
+
+def build_label_hierarchies(df, min_samples):
+    """Build the cluster tree of every label with enough points."""
+    return {label: LabelHierarchy(points[['x', 'y', 'z']].values,
+                                  min_samples)
+            for label, points in df.groupby('semantic_label', sort=False,
+                                             observed=True)
+            if len(points) >= min_samples}
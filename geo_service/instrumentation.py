@@ -0,0 +1,194 @@
+"""Stage timers, counters and a sampling profiler for the pipeline."""
+
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+try:
+    import resource
+
+    RESOURCE_AVAILABLE = True
+except ImportError:
+    # Not available on Windows; peak RSS is reported as None there.
+    RESOURCE_AVAILABLE = False
+
+
+def peak_rss_mb():
+    """Return the peak resident set size of this process in MB."""
+    if not RESOURCE_AVAILABLE:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    if sys.platform == 'darwin':
+        return peak / 2 ** 20
+    return peak / 2 ** 10
+
+
+class PipelineMetrics:
+    """Per-stage timings and counters of one pipeline run."""
+
+    def __init__(self):
+        """Start with no recorded stages or counters."""
+        self.stages = {}
+        self.counters = {}
+        self.clusters_per_label = {}
+        self.failed_stage = None
+        self.current_stage = None
+
+    @contextmanager
+    def stage(self, name):
+        """Time the enclosed block and record it under `name`.
+
+        The process' peak RSS only ever grows, so a stage records how far
+        it raised it: 0 for a stage that stayed below an earlier peak.
+        """
+        self.current_stage = name
+        start_peak = peak_rss_mb()
+        start = time.perf_counter()
+        start_cpu = time.process_time()
+        status = 'ok'
+        try:
+            yield
+        except BaseException:
+            status = 'failed'
+            self.failed_stage = name
+            raise
+        finally:
+            self.stages[name] = {
+                'seconds': time.perf_counter() - start,
+                'cpu_seconds': time.process_time() - start_cpu,
+                'peak_rss_growth_mb': (
+                    None if start_peak is None
+                    else peak_rss_mb() - start_peak),
+                'status': status,
+            }
+            self.current_stage = None
+
+    def count(self, name, value):
+        """Record a counter such as the number of points processed."""
+        self.counters[name] = int(value)
+
+    def count_clusters(self, objects):
+        """Record the number of extracted objects per semantic label."""
+        self.clusters_per_label = dict(Counter(
+            obj['semantic_label'] for obj in objects.values()))
+
+    def as_dict(self):
+        """Return the metrics as plain data for the results dict."""
+        return {
+            'stages': self.stages,
+            'counters': self.counters,
+            'clusters_per_label': self.clusters_per_label,
+            'failed_stage': self.failed_stage,
+            'total_seconds': sum(
+                stage['seconds'] for stage in self.stages.values()),
+            'peak_rss_mb': peak_rss_mb(),
+        }
+
+    def to_prometheus(self, prefix='geodata_pipeline'):
+        """Render the metrics in the Prometheus text exposition format."""
+        lines = [
+            f"# TYPE {prefix}_stage_seconds gauge",
+            *(f'{prefix}_stage_seconds{{stage="{name}"}} {stage["seconds"]}'
+              for name, stage in self.stages.items()),
+            f"# TYPE {prefix}_stage_cpu_seconds gauge",
+            *(f'{prefix}_stage_cpu_seconds{{stage="{name}"}} '
+              f'{stage["cpu_seconds"]}'
+              for name, stage in self.stages.items()),
+        ]
+        for name, value in self.counters.items():
+            lines += [f"# TYPE {prefix}_{name} gauge",
+                      f"{prefix}_{name} {value}"]
+        lines.append(f"# TYPE {prefix}_clusters gauge")
+        lines += [f'{prefix}_clusters{{label="{label}"}} {count}'
+                  for label, count in self.clusters_per_label.items()]
+        rss = peak_rss_mb()
+        if rss is not None:
+            lines += [f"# TYPE {prefix}_peak_rss_bytes gauge",
+                      f"{prefix}_peak_rss_bytes {int(rss * 2 ** 20)}"]
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path, prefix='geodata_pipeline'):
+        """Write a textfile for the Prometheus node exporter collector."""
+        with open(path, 'w') as f:
+            f.write(self.to_prometheus(prefix))
+
+    def export_opentelemetry(self, meter_name='geodata.pipeline'):
+        """Record the metrics on the global OpenTelemetry meter provider.
+
+        Returns False when the OpenTelemetry API is not installed
+        (pip install opentelemetry-api).
+        """
+        try:
+            from opentelemetry import metrics
+        except ImportError:
+            return False
+
+        meter = metrics.get_meter(meter_name)
+        stage_seconds = meter.create_histogram(
+            'pipeline.stage.duration', unit='s')
+        for name, stage in self.stages.items():
+            stage_seconds.record(stage['seconds'], {'stage': name,
+                                                    'status': stage['status']})
+        processed = meter.create_counter('pipeline.items.processed')
+        for name, value in self.counters.items():
+            processed.add(value, {'item': name})
+        clusters = meter.create_counter('pipeline.clusters')
+        for label, count in self.clusters_per_label.items():
+            clusters.add(count, {'semantic_label': label})
+        return True
+
+
+class SamplingProfiler:
+    """Sample the stack of one thread and write folded flamegraph stacks.
+
+    The output has one `frame;frame;frame count` line per distinct stack,
+    the format read by flamegraph.pl, inferno and speedscope. Stacks are
+    rooted at the pipeline stage that was running when they were sampled.
+    """
+
+    def __init__(self, interval=0.005, metrics=None):
+        """Sample every `interval` seconds, labelling stacks by stage."""
+        self.interval = interval
+        self.metrics = metrics
+        self.samples = Counter()
+        self._thread_id = None
+        self._stop = threading.Event()
+        self._sampler = None
+
+    def start(self):
+        """Start sampling the calling thread."""
+        self._thread_id = threading.get_ident()
+        self._stop.clear()
+        self._sampler = threading.Thread(target=self._run, daemon=True,
+                                         name='pipeline-profiler')
+        self._sampler.start()
+
+    def stop(self):
+        """Stop sampling and wait for the sampler thread."""
+        self._stop.set()
+        if self._sampler is not None:
+            self._sampler.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} "
+                             f"({code.co_filename}:{code.co_firstlineno})")
+                frame = frame.f_back
+            stage = self.metrics.current_stage if self.metrics else None
+            stack.append(f"stage:{stage or 'none'}")
+            self.samples[';'.join(reversed(stack))] += 1
+
+    def write_folded(self, path):
+        """Write the collected samples as folded stacks."""
+        with open(path, 'w') as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
@@ -0,0 +1,214 @@
+"""Per-label k-d trees and radius neighbour graphs of a scan.
+
+Clustering searches the neighbourhood of every point twice: once to
+estimate `eps` from k-distances and once more inside DBSCAN, and the
+whole search is repeated whenever a scan is clustered again with other
+parameters. A `NeighbourIndex` builds one k-d tree per label and keeps
+the radius graph of each label as a sparse CSR matrix of distances.
+
+A graph answers every smaller radius by dropping its longer edges, and
+DBSCAN runs directly on it: core points are the rows with enough
+entries, clusters the connected components of core points, and border
+points join the first cluster that reaches them, as in scikit-learn.
+Graphs can be saved next to the point cache of a scan, so processing it
+again skips the neighbour search altogether.
+"""
+
+import hashlib
+import json
+import shutil
+import uuid
+from pathlib import Path
+
+import numpy as np
+from scipy import sparse
+from scipy.sparse.csgraph import connected_components
+from sklearn.cluster import DBSCAN
+from sklearn.neighbors import KDTree
+
+INDEX_SUFFIX = '.neighbours'
+# Graphs of more entries (about 60 MB) are not built: at such radii
+# DBSCAN clusters without one in less memory, in about the time it would
+# take to read the graph back
+MAX_KEPT_EDGES = 5_000_000
+# Points whose neighbour counts estimate the size of a graph
+COUNT_SAMPLE_SIZE = 1000
+
+
+def _fingerprint(coords):
+    return hashlib.sha256(np.ascontiguousarray(coords).tobytes()).hexdigest()
+
+
+def _within(graph, radius):
+    """Return the edges of a CSR distance graph up to `radius`."""
+    keep = graph.data <= radius
+    if keep.all():
+        return graph
+    rows = np.repeat(np.arange(graph.shape[0]), np.diff(graph.indptr))
+    indptr = np.zeros(graph.shape[0] + 1, dtype=graph.indptr.dtype)
+    np.cumsum(np.bincount(rows[keep], minlength=graph.shape[0]),
+              out=indptr[1:])
+    return sparse.csr_matrix((graph.data[keep], graph.indices[keep], indptr),
+                             shape=graph.shape)
+
+
+def graph_dbscan(graph, min_samples):
+    """Cluster points of a radius graph that includes every point itself.
+
+    Gives the labels of scikit-learn's DBSCAN at the graph's radius:
+    clusters are numbered by their first core point, and a border point
+    near several clusters belongs to the lowest numbered one.
+    """
+    n = graph.shape[0]
+    labels = np.full(n, -1, dtype=np.int64)
+    core = np.flatnonzero(np.diff(graph.indptr) >= min_samples)
+    if not len(core):
+        return labels
+    core_graph = graph if len(core) == n else graph[core][:, core]
+    # The graph is symmetric, so its strongly connected components are
+    # its components, found without symmetrising it first
+    _, components = connected_components(core_graph, directed=True,
+                                         connection='strong')
+    # Renumber components by their first core point
+    _, first = np.unique(components, return_index=True)
+    order = np.empty(len(first), dtype=np.int64)
+    order[np.argsort(first)] = np.arange(len(first))
+    labels[core] = order[components]
+
+    others = np.flatnonzero(labels == -1)
+    edges = graph[others]
+    rows = np.repeat(others, np.diff(edges.indptr))
+    clusters = labels[edges.indices]
+    nearest = np.full(n, n, dtype=np.int64)
+    np.minimum.at(nearest, rows[clusters >= 0], clusters[clusters >= 0])
+    labels[nearest < n] = nearest[nearest < n]
+    return labels
+
+
+class NeighbourIndex:
+    """k-d trees and radius graphs of each label's points."""
+
+    def __init__(self, label_coords):
+        """Index the coordinate arrays of `label_coords`, keyed by label."""
+        self.coords = {label: np.asarray(coords)
+                       for label, coords in label_coords.items()}
+        self._trees = {}
+        # label -> (radius, CSR distance graph)
+        self._graphs = {}
+        self.modified = False
+
+    @classmethod
+    def from_frame(cls, df, column='semantic_label'):
+        """Index the x, y, z points of every label of a frame.
+
+        Points keep their order within the label, the order of
+        `df[df[column] == label]`.
+        """
+        return cls({label: points[['x', 'y', 'z']].to_numpy()
+                    for label, points in df.groupby(column, sort=False,
+                                                    observed=True)})
+
+    def tree(self, label):
+        """Return the k-d tree of a label's points."""
+        if label not in self._trees:
+            self._trees[label] = KDTree(self.coords[label])
+        return self._trees[label]
+
+    def k_distances(self, label, k, rows=None):
+        """Distance of points to their k-th neighbour, themselves first."""
+        coords = self.coords[label]
+        queries = coords if rows is None else coords[rows]
+        distances, _ = self.tree(label).query(queries, k=k)
+        return distances[:, -1]
+
+    def _kept(self, label, radius):
+        built = self._graphs.get(label)
+        return built is not None and built[0] >= radius
+
+    def expected_edges(self, label, radius):
+        """Estimate the number of entries of a label's graph at `radius`."""
+        coords = self.coords[label]
+        rows = np.random.default_rng(0).choice(
+            len(coords), min(len(coords), COUNT_SAMPLE_SIZE), replace=False)
+        counts = self.tree(label).query_radius(coords[rows], radius,
+                                               count_only=True)
+        return float(counts.mean()) * len(coords)
+
+    def graph(self, label, radius):
+        """Return the CSR distance graph of a label's points at `radius`.
+
+        Every point is its own neighbour at distance 0. A graph of a
+        larger radius is reused, and graphs of up to MAX_KEPT_EDGES
+        entries are kept.
+        """
+        if self._kept(label, radius):
+            return _within(self._graphs[label][1], radius)
+        coords = self.coords[label]
+        neighbours, distances = self.tree(label).query_radius(
+            coords, radius, return_distance=True)
+        counts = np.fromiter(map(len, neighbours), dtype=np.int64,
+                             count=len(coords))
+        indptr = np.zeros(len(coords) + 1, dtype=np.int64)
+        np.cumsum(counts, out=indptr[1:])
+        index_type = np.int32 if indptr[-1] < 2 ** 31 else np.int64
+        graph = sparse.csr_matrix(
+            (np.concatenate(distances), np.concatenate(neighbours).astype(
+                index_type), indptr.astype(index_type)),
+            shape=(len(coords), len(coords)))
+        if graph.nnz <= MAX_KEPT_EDGES:
+            self._graphs[label] = (radius, graph)
+            self.modified = True
+        return graph
+
+    def dbscan(self, label, eps, min_samples):
+        """Return DBSCAN cluster ids of a label's points, -1 for noise.
+
+        Radii whose graph would be too large to keep are clustered by
+        scikit-learn's DBSCAN instead, with the same result.
+        """
+        if (not self._kept(label, eps)
+                and self.expected_edges(label, eps) > MAX_KEPT_EDGES):
+            return DBSCAN(eps=eps, min_samples=min_samples,
+                          algorithm='kd_tree').fit(self.coords[label]).labels_
+        return graph_dbscan(self.graph(label, eps), min_samples)
+
+    def save(self, path):
+        """Write the graphs to the directory `path`, replacing it."""
+        path = Path(path)
+        staging = path.with_name(f"{path.name}.{uuid.uuid4().hex}.partial")
+        staging.mkdir(parents=True)
+        entries = []
+        for i, (label, (radius, graph)) in enumerate(self._graphs.items()):
+            sparse.save_npz(staging / f"{i}.npz", graph, compressed=False)
+            entries.append({'label': str(label), 'radius': radius,
+                            'file': f"{i}.npz",
+                            'fingerprint': _fingerprint(self.coords[label])})
+        (staging / 'meta.json').write_text(json.dumps({'graphs': entries}))
+        previous = path.with_name(f"{path.name}.{uuid.uuid4().hex}.old")
+        if path.is_dir():
+            path.rename(previous)
+        staging.rename(path)
+        shutil.rmtree(previous, ignore_errors=True)
+        self.modified = False
+
+    @classmethod
+    def load(cls, path, df, column='semantic_label'):
+        """Index a frame, reusing the graphs saved at `path` if any.
+
+        Graphs are only reused for labels whose points are the same as
+        when they were saved.
+        """
+        index = cls.from_frame(df, column)
+        meta_path = Path(path) / 'meta.json'
+        if not meta_path.exists():
+            return index
+        # Keeps the graphs from being removed from a cache as unused
+        Path(path).touch()
+        labels = {str(label): label for label in index.coords}
+        for entry in json.loads(meta_path.read_text())['graphs']:
+            label = labels.get(entry['label'])
+            if (label is not None and entry['fingerprint']
+                    == _fingerprint(index.coords[label])):
+                index._graphs[label] = (entry['radius'], sparse.load_npz(
+                    Path(path) / entry['file']).tocsr())
+        return index
@@ -0,0 +1,145 @@
+"""Oriented bounding boxes and separating axis tests for scene objects.
+
+Each object gets a box aligned with the principal axes of its points
+(PCA), which hugs rotated furniture and walls far tighter than an axis
+aligned box. The covariances of all boxes of a scene come from one
+vectorised pass over the concatenated points, and the separating axis
+tests run on arrays of candidate pairs found with a k-d tree.
+
+For two boxes the separating axis theorem checks 15 axes: the three axes
+of each box and the nine cross products of one axis from each. The
+largest separation over these axes is the gap between the boxes:
+positive when they are apart, negative when they overlap, and a lower
+bound of their distance.
+"""
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+# Cross product axes of nearly parallel edges are skipped
+PARALLEL_EPSILON = 1e-6
+
+
+def fit_oriented_boxes(point_sets):
+    """Fit a PCA box to each array of points.
+
+    Returns `(centers, axes, half_extents)` with shapes (n, 3), (n, 3, 3)
+    and (n, 3): `axes[i]` holds the unit axes of box i as rows, from the
+    direction of largest to smallest spread, and `half_extents[i]` the
+    half sizes along them.
+    """
+    n_boxes = len(point_sets)
+    if n_boxes == 0:
+        return np.zeros((0, 3)), np.zeros((0, 3, 3)), np.zeros((0, 3))
+    sizes = np.array([len(points) for points in point_sets])
+    owner = np.repeat(np.arange(n_boxes), sizes)
+    ends = np.cumsum(sizes)
+    starts = ends - sizes
+    points = np.empty((ends[-1], 3))
+    for start, end, box_points in zip(starts, ends, point_sets):
+        points[start:end] = box_points
+
+    # Per-box covariance from grouped sums, then one batched eigh. Points
+    # are centred in place, box by box, to keep no second copy of them
+    mean = np.stack([np.bincount(owner, points[:, k], n_boxes)
+                     for k in range(3)], axis=1) / sizes[:, None]
+    for box, (start, end) in enumerate(zip(starts, ends)):
+        points[start:end] -= mean[box]
+    covariance = np.empty((n_boxes, 3, 3))
+    for i in range(3):
+        for j in range(i, 3):
+            covariance[:, i, j] = covariance[:, j, i] = np.bincount(
+                owner, points[:, i] * points[:, j], n_boxes)
+    _, vectors = np.linalg.eigh(covariance / sizes[:, None, None])
+    # eigh sorts ascending; rows of `axes` go from largest spread down
+    axes = np.transpose(vectors[:, :, ::-1], (0, 2, 1)).copy()
+    axes[:, 2] = np.cross(axes[:, 0], axes[:, 1])
+
+    # Extents along the box axes of each box's contiguous run of points
+    low = np.empty((n_boxes, 3))
+    high = np.empty((n_boxes, 3))
+    for box, (start, end) in enumerate(zip(starts, ends)):
+        local = points[start:end] @ axes[box].T
+        low[box], high[box] = local.min(axis=0), local.max(axis=0)
+    middle = (low + high) / 2
+    centers = mean + np.einsum('pk,pki->pi', middle, axes)
+    return centers, axes, (high - low) / 2
+
+
+def box_separation(centers, axes, half_extents, first, second):
+    """Return the separating axis gap of every pair of boxes.
+
+    `first` and `second` index the boxes of each pair. Gaps along cross
+    product axes are scaled to metres by the length of the axis.
+    """
+    ext_a, ext_b = half_extents[first], half_extents[second]
+    # Box B's axes and the centre offset in box A's frame
+    rotation = np.einsum('pki,pli->pkl', axes[first], axes[second])
+    absolute = np.abs(rotation)
+    offset = np.einsum('pki,pi->pk', axes[first],
+                       centers[second] - centers[first])
+
+    gaps = [np.abs(offset) - ext_a - np.einsum('pkl,pl->pk', absolute,
+                                               ext_b)]
+    offset_b = np.einsum('pk,pkl->pl', offset, rotation)
+    gaps.append(np.abs(offset_b) - ext_b
+                - np.einsum('pkl,pk->pl', absolute, ext_a))
+    for i in range(3):
+        i1, i2 = (i + 1) % 3, (i + 2) % 3
+        for j in range(3):
+            j1, j2 = (j + 1) % 3, (j + 2) % 3
+            radius_a = (ext_a[:, i1] * absolute[:, i2, j]
+                        + ext_a[:, i2] * absolute[:, i1, j])
+            radius_b = (ext_b[:, j1] * absolute[:, i, j2]
+                        + ext_b[:, j2] * absolute[:, i, j1])
+            distance = np.abs(offset[:, i2] * rotation[:, i1, j]
+                              - offset[:, i1] * rotation[:, i2, j])
+            length = np.sqrt(np.maximum(1 - rotation[:, i, j] ** 2, 0))
+            gap = np.full(len(first), -np.inf)
+            valid = length > PARALLEL_EPSILON
+            gap[valid] = ((distance - radius_a - radius_b)[valid]
+                          / length[valid])
+            gaps.append(gap[:, None])
+    return np.concatenate(gaps, axis=1).max(axis=1)
+
+
+def box_contains(centers, axes, half_extents, outer, inner, tolerance=0.0):
+    """Return whether box `inner` lies within box `outer`, per pair."""
+    inside = np.ones(len(outer), dtype=bool)
+    for signs in np.array(np.meshgrid([-1, 1], [-1, 1], [-1, 1])
+                          ).reshape(3, -1).T:
+        corner = centers[inner] + np.einsum(
+            'pk,pki->pi', signs * half_extents[inner], axes[inner])
+        local = np.einsum('pki,pi->pk', axes[outer],
+                          corner - centers[outer])
+        inside &= (np.abs(local) <= half_extents[outer] + tolerance).all(
+            axis=1)
+    return inside
+
+
+def candidate_pairs(centers, half_extents, max_gap):
+    """Return pairs `i < j` whose bounding spheres are within `max_gap`.
+
+    A k-d tree over the box centres is queried with each box's own reach,
+    twice its radius plus `max_gap`, so large boxes such as walls do not
+    widen the search of small ones. Every close pair is within the reach
+    of its larger box, and found from that side.
+    """
+    if len(centers) < 2:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty
+    radius = np.linalg.norm(half_extents, axis=1)
+    tree = cKDTree(centers)
+    neighbours = tree.query_ball_point(centers, 2 * radius + max_gap)
+    query = np.repeat(np.arange(len(centers)),
+                      [len(found) for found in neighbours])
+    match = np.concatenate([np.asarray(found, dtype=np.int64)
+                            for found in neighbours])
+    # A pair of similar boxes is found from both sides; keep it once
+    first, second = np.minimum(query, match), np.maximum(query, match)
+    pairs = np.unique(first[first < second] * len(centers)
+                      + second[first < second])
+    first, second = pairs // len(centers), pairs % len(centers)
+    distance = np.linalg.norm(centers[first] - centers[second], axis=1)
+    close = distance <= radius[first] + radius[second] + max_gap
+    return first[close], second[close]
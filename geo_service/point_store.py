@@ -0,0 +1,337 @@
+"""Host-wide shared-memory store of a scan's points and objects.
+
+Every process working on a scan used to load the CSV and cluster it into
+its own DataFrames. A `SharedPointStore` holds the coordinates, colours
+and label codes of the clustered points once per host in a named
+`multiprocessing.shared_memory` segment, sorted by object, together with
+an object table of label, point range, centroid and bounds per object.
+Processes attach to the segment by name, which maps it without copying
+or parsing anything but a small JSON header, and get read-only numpy
+views of its arrays.
+
+Attached processes are reference counted in the segment itself, under a
+host-wide file lock: the last process to detach removes the segment and
+its lock file.
+`open_scan_store` names stores after a scan file's version and the
+clustering parameters, so the first process builds the store and every
+later one attaches to it.
+"""
+
+import hashlib
+import json
+import os
+import struct
+import tempfile
+from contextlib import contextmanager
+from multiprocessing import resource_tracker, shared_memory
+from pathlib import Path
+
+import numpy as np
+
+from utils.file_index import cache_key
+
+try:
+    import fcntl
+
+    FCNTL_AVAILABLE = True
+except ImportError:
+    # Not available on Windows; reference counts are then not locked.
+    FCNTL_AVAILABLE = False
+
+SEGMENT_PREFIX = 'geodata_pts_'
+# Reference count and header length precede the JSON header
+PREFIX = struct.Struct('<qq')
+ALIGNMENT = 64
+POINT_ARRAYS = ('coords', 'colors', 'labels')
+OBJECT_ARRAYS = ('object_label', 'object_start', 'object_count',
+                 'object_centroid', 'object_min', 'object_max')
+
+
+def _lock_path(name):
+    return Path(tempfile.gettempdir()) / f"{SEGMENT_PREFIX}{name}.lock"
+
+
+@contextmanager
+def _locked(name):
+    """Hold the host-wide lock of a store's reference count."""
+    if not FCNTL_AVAILABLE:
+        yield
+        return
+    lock_path = _lock_path(name)
+    while True:
+        f = open(lock_path, 'a')
+        fcntl.flock(f, fcntl.LOCK_EX)
+        # The last detach removes the lock file while holding it; a lock
+        # taken on the removed file excludes nobody, so lock the new one
+        try:
+            if os.path.samestat(os.fstat(f.fileno()), os.stat(lock_path)):
+                break
+        except FileNotFoundError:
+            pass
+        f.close()
+    with f:
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _remove_lock(name):
+    """Remove a store's lock file; call it while holding the lock."""
+    if FCNTL_AVAILABLE:
+        _lock_path(name).unlink(missing_ok=True)
+
+
+def _segment(name, create=False, size=0):
+    """Open a segment that is not removed when this process exits."""
+    try:
+        return shared_memory.SharedMemory(SEGMENT_PREFIX + name, create=create,
+                                          size=size, track=False)
+    except TypeError:
+        # Before Python 3.13 the resource tracker of every process that
+        # opens a segment unlinks it at exit; reference counts do instead
+        segment = shared_memory.SharedMemory(SEGMENT_PREFIX + name,
+                                             create=create, size=size)
+        resource_tracker.unregister(segment._name, 'shared_memory')
+        return segment
+
+
+class SharedPointStore:
+    """Read-only views of points and objects in a shared segment."""
+
+    def __init__(self, name, segment):
+        """Map the arrays of an attached `segment` of store `name`."""
+        self.name = name
+        self._segment = segment
+        _, header_size = PREFIX.unpack_from(segment.buf)
+        header = json.loads(bytes(
+            segment.buf[PREFIX.size:PREFIX.size + header_size]))
+        self.label_names = header['labels']
+        self.object_names = header['objects']
+        self._objects = {name: i for i, name in enumerate(self.object_names)}
+        self._arrays = {}
+        for key, spec in header['arrays'].items():
+            array = np.ndarray(spec['shape'], dtype=spec['dtype'],
+                               buffer=segment.buf, offset=spec['offset'])
+            array.flags.writeable = False
+            self._arrays[key] = array
+
+    @classmethod
+    def create(cls, name, arrays, label_names, object_names):
+        """Copy `arrays` into a new segment and attach to it.
+
+        `arrays` holds the POINT_ARRAYS, with points sorted by object,
+        and the OBJECT_ARRAYS, one row per entry of `object_names`.
+
+        Raises:
+            FileExistsError: If a store of this name exists.
+        """
+        with _locked(name):
+            return cls._create(name, arrays, label_names, object_names)
+
+    @classmethod
+    def _create(cls, name, arrays, label_names, object_names):
+        specs, offset = {}, 0
+        for key in POINT_ARRAYS + OBJECT_ARRAYS:
+            array = np.ascontiguousarray(arrays[key])
+            arrays[key] = array
+            specs[key] = {'dtype': array.dtype.str, 'shape': array.shape,
+                          'offset': offset}
+            offset += -(-array.nbytes // ALIGNMENT) * ALIGNMENT
+        # Arrays follow the header at an aligned offset, which grows
+        # until the header with the final offsets fits in front of it
+        base = ALIGNMENT
+        while True:
+            header = {'arrays': {key: {**spec,
+                                       'offset': spec['offset'] + base}
+                                 for key, spec in specs.items()},
+                      'labels': list(label_names),
+                      'objects': list(object_names)}
+            encoded = json.dumps(header).encode()
+            if PREFIX.size + len(encoded) <= base:
+                break
+            base = -(-(PREFIX.size + len(encoded)) // ALIGNMENT) * ALIGNMENT
+        specs = header['arrays']
+        segment = _segment(name, create=True, size=base + max(offset, 1))
+        PREFIX.pack_into(segment.buf, 0, 1, len(encoded))
+        segment.buf[PREFIX.size:PREFIX.size + len(encoded)] = encoded
+        for key, spec in specs.items():
+            target = np.ndarray(spec['shape'], dtype=spec['dtype'],
+                                buffer=segment.buf, offset=spec['offset'])
+            target[...] = arrays[key]
+            del target
+        return cls(name, segment)
+
+    @classmethod
+    def attach(cls, name):
+        """Attach to an existing store.
+
+        Raises:
+            FileNotFoundError: If no store of this name exists.
+        """
+        with _locked(name):
+            try:
+                return cls._attach(name)
+            except FileNotFoundError:
+                _remove_lock(name)
+                raise
+
+    @classmethod
+    def _attach(cls, name):
+        segment = _segment(name)
+        count, header_size = PREFIX.unpack_from(segment.buf)
+        PREFIX.pack_into(segment.buf, 0, count + 1, header_size)
+        return cls(name, segment)
+
+    @classmethod
+    def open(cls, name, build):
+        """Attach to a store, creating it from `build()` if needed.
+
+        `build` returns the `arrays`, `label_names` and `object_names` of
+        `create`; it only runs in the first process opening the store.
+        Returns the store and whether it was created.
+        """
+        with _locked(name):
+            try:
+                return cls._attach(name), False
+            except FileNotFoundError:
+                return cls._create(name, *build()), True
+
+    @property
+    def reference_count(self):
+        """Number of attachments of the store on this host."""
+        return PREFIX.unpack_from(self._segment.buf)[0]
+
+    def detach(self):
+        """Release this attachment; the last one removes the store."""
+        if self._segment is None:
+            return
+        segment, self._segment = self._segment, None
+        self._arrays.clear()
+        with _locked(self.name):
+            count, header_size = PREFIX.unpack_from(segment.buf)
+            PREFIX.pack_into(segment.buf, 0, count - 1, header_size)
+            if count <= 1:
+                segment.unlink()
+                _remove_lock(self.name)
+        try:
+            segment.close()
+        except BufferError:
+            # Views handed out are still alive; the mapping goes with them
+            pass
+
+    def __enter__(self):
+        """Return the attached store."""
+        return self
+
+    def __exit__(self, *exc_info):
+        """Detach from the store."""
+        self.detach()
+
+    def column(self, key):
+        """Return one of the POINT_ARRAYS or OBJECT_ARRAYS."""
+        return self._arrays[key]
+
+    @property
+    def number_of_points(self):
+        """Number of clustered points in the store."""
+        return len(self._arrays['coords'])
+
+    def has_object(self, object_name):
+        """Return whether the store holds an object of this name."""
+        return object_name in self._objects
+
+    def object_points(self, object_name):
+        """Return the coordinates, colours and label codes of an object."""
+        i = self._objects[object_name]
+        start = self._arrays['object_start'][i]
+        stop = start + self._arrays['object_count'][i]
+        return {key: self._arrays[key][start:stop] for key in POINT_ARRAYS}
+
+    def object_label(self, object_name):
+        """Return the semantic label of an object."""
+        return self.label_names[
+            self._arrays['object_label'][self._objects[object_name]]]
+
+    def centroid(self, object_name):
+        """Return the mean of an object's points."""
+        return self._arrays['object_centroid'][self._objects[object_name]]
+
+    def bounds(self, object_name):
+        """Return the minimum and maximum corner of an object."""
+        i = self._objects[object_name]
+        return self._arrays['object_min'][i], self._arrays['object_max'][i]
+
+
+def objects_to_arrays(objects):
+    """Convert `extract_semantic_objects` output to `create` arguments."""
+    names = list(objects)
+    labels = sorted({str(obj['semantic_label']) for obj in objects.values()})
+    codes = {label: i for i, label in enumerate(labels)}
+    frames = [objects[name]['points'] for name in names]
+    counts = np.array([len(frame) for frame in frames], dtype=np.int64)
+    object_label = np.array(
+        [codes[str(objects[name]['semantic_label'])] for name in names],
+        dtype=np.int32)
+    coords = (np.concatenate([f[['x', 'y', 'z']].values for f in frames])
+              if frames else np.zeros((0, 3)))
+    colors = (np.concatenate([f[['R', 'G', 'B']].values for f in frames])
+              if frames else np.zeros((0, 3))).astype(np.uint8)
+    arrays = {
+        'coords': coords.astype(np.float64),
+        'colors': colors,
+        'labels': np.repeat(object_label, counts).astype(np.int16),
+        'object_label': object_label,
+        'object_start': np.concatenate([[0], np.cumsum(counts)[:-1]]
+                                       ).astype(np.int64),
+        'object_count': counts,
+        'object_centroid': np.array([objects[name]['centroid']
+                                     for name in names]).reshape(-1, 3),
+        'object_min': np.array([objects[name]['bounds']['min']
+                                for name in names]).reshape(-1, 3),
+        'object_max': np.array([objects[name]['bounds']['max']
+                                for name in names]).reshape(-1, 3),
+    }
+    return arrays, labels, names
+
+
+def scan_store_name(csv_path, **params):
+    """Name the store of this version of a scan and clustering params."""
+    identity = cache_key(Path(csv_path)) + json.dumps(params, sort_keys=True)
+    return hashlib.sha256(identity.encode()).hexdigest()[:16]
+
+
+def open_scan_store(csv_path, eps=0.5, min_samples=10, sample_size=70000):
+    """Attach to the shared objects of a scan, clustering it if needed.
+
+    Only the first process on the host loads and clusters the scan; the
+    geo_service pipeline is imported for that alone. Returns the store
+    and whether this call built it.
+    """
+    def build():
+        from geo_service.app import (
+            extract_semantic_objects,
+            load_semantic_point_cloud,
+        )
+
+        df = load_semantic_point_cloud(csv_path, sample_size=sample_size)
+        return objects_to_arrays(extract_semantic_objects(
+            df, eps=eps, min_samples=min_samples))
+
+    name = scan_store_name(csv_path, eps=eps, min_samples=min_samples,
+                           sample_size=sample_size)
+    return SharedPointStore.open(name, build)
+
+
+def remove_store(name):
+    """Remove a store left behind by processes that did not detach."""
+    with _locked(name):
+        try:
+            segment = _segment(name)
+        except FileNotFoundError:
+            _remove_lock(name)
+            return False
+        segment.unlink()
+        segment.close()
+        _remove_lock(name)
+    return True
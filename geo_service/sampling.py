@@ -0,0 +1,154 @@
+"""Reproducible point sampling with per-label and spatial strata.
+
+A uniform sample keeps labels in proportion to their points, so a few
+chairs vanish next to a million wall points. The other strategies share
+the budget out more evenly:
+
+- 'quota' gives every label an equal share; labels with fewer points
+  keep them all and their unused share goes to the others.
+- 'voxel' does the same for every (label, voxel) cell, which keeps the
+  spatial coverage of each label and every small object.
+- 'poisson' keeps points of a label at least `radius` apart, removing
+  redundant points of densely scanned surfaces first.
+
+Every strategy is a single vectorised pass over the points, returns the
+same rows for the same seed and reports the rate at which each label was
+sampled.
+"""
+
+import numpy as np
+import pandas as pd
+from scipy.spatial import cKDTree
+
+SAMPLING_STRATEGIES = ('uniform', 'quota', 'voxel', 'poisson')
+DEFAULT_VOXEL_SIZE = 0.25
+DEFAULT_RADIUS = 0.05
+
+
+def _water_fill(counts, budget, rng):
+    """Split `budget` over strata of `counts` points as evenly as possible.
+
+    Returns the number of points to take from each stratum: the largest
+    common cap that fits the budget, with the remainder going one point
+    each to randomly chosen strata that still have points left.
+    """
+    counts = np.asarray(counts, dtype=np.int64)
+    if budget >= counts.sum():
+        return counts.copy()
+    ordered = np.sort(counts)
+    # Points taken with a cap at each stratum size, smallest first
+    below = np.cumsum(ordered) - ordered
+    taken = below + ordered * (len(ordered) - np.arange(len(ordered)))
+    # The cap lies below the first stratum size that overshoots
+    position = np.searchsorted(taken, budget, side='right')
+    cap = (budget - below[position]) // (len(ordered) - position)
+    quotas = np.minimum(counts, cap)
+    extra = np.flatnonzero(counts > cap)
+    extra = rng.permutation(extra)[:budget - quotas.sum()]
+    quotas[extra] += 1
+    return quotas
+
+
+def _take_quotas(strata, quotas, rng):
+    """Return a random mask keeping `quotas[s]` points of each stratum s."""
+    order = np.lexsort((rng.random(len(strata)), strata))
+    starts = np.concatenate([[0], np.cumsum(np.bincount(
+        strata, minlength=len(quotas)))[:-1]])
+    rank = np.empty(len(strata), dtype=np.int64)
+    rank[order] = np.arange(len(strata)) - starts[strata[order]]
+    return rank < quotas[strata]
+
+
+def _poisson_disk(coords, codes, radius, rng):
+    """Return a mask of points at least `radius` from kept same-label points.
+
+    Points are thinned to one random point per grid cell of side
+    radius/sqrt(3), then conflicts within `radius` are resolved in rounds:
+    a point is kept when its random priority beats every undecided
+    neighbour, and the neighbours of kept points are dropped.
+    """
+    priority = rng.random(len(coords))
+    cells = np.floor(coords / (radius / np.sqrt(3))).astype(np.int64)
+    keys = np.column_stack([codes, cells])
+    order = np.lexsort((priority, *keys.T[::-1]))
+    first = np.ones(len(order), dtype=bool)
+    first[1:] = (keys[order[1:]] != keys[order[:-1]]).any(axis=1)
+    candidates = order[first]
+
+    pairs = cKDTree(coords[candidates]).query_pairs(radius,
+                                                    output_type='ndarray')
+    pairs = pairs[codes[candidates[pairs[:, 0]]]
+                  == codes[candidates[pairs[:, 1]]]]
+    state = np.zeros(len(candidates), dtype=np.int8)  # 1 kept, -1 dropped
+    rank = priority[candidates]
+    while True:
+        open_pairs = pairs[(state[pairs[:, 0]] == 0)
+                           & (state[pairs[:, 1]] == 0)]
+        undecided = state == 0
+        if not open_pairs.size:
+            state[undecided] = 1
+            break
+        lowest = rank.copy()
+        np.minimum.at(lowest, open_pairs[:, 0], rank[open_pairs[:, 1]])
+        np.minimum.at(lowest, open_pairs[:, 1], rank[open_pairs[:, 0]])
+        winners = undecided & (lowest == rank)
+        state[winners] = 1
+        beaten = np.concatenate([
+            open_pairs[winners[open_pairs[:, 0]], 1],
+            open_pairs[winners[open_pairs[:, 1]], 0]])
+        state[beaten] = -1
+
+    mask = np.zeros(len(coords), dtype=bool)
+    mask[candidates[state == 1]] = True
+    return mask
+
+
+def sample_points(df, sample_size, strategy='uniform', seed=1,
+                  column='semantic_label', voxel_size=DEFAULT_VOXEL_SIZE,
+                  radius=DEFAULT_RADIUS):
+    """Sample at most `sample_size` points of `df` with a strategy.
+
+    'poisson' keeps every point that is `radius` from the others and,
+    if that is still more than `sample_size`, a random subset of them.
+    A `sample_size` of None samples nothing except with 'poisson'.
+
+    Returns the sampled rows in their original order and a report with
+    the points, sampled points and sampling rate of every label.
+    """
+    if strategy not in SAMPLING_STRATEGIES:
+        raise ValueError(f"Unknown sampling strategy {strategy}; use one "
+                         f"of {', '.join(SAMPLING_STRATEGIES)}")
+    rng = np.random.default_rng(seed)
+    codes, labels = pd.factorize(df[column], use_na_sentinel=False)
+    budget = len(df) if sample_size is None else sample_size
+
+    if strategy == 'poisson':
+        keep = _poisson_disk(df[['x', 'y', 'z']].values, codes, radius, rng)
+        if keep.sum() > budget:
+            kept = np.flatnonzero(keep)
+            keep[:] = False
+            keep[rng.choice(kept, budget, replace=False)] = True
+    elif budget >= len(df):
+        keep = np.ones(len(df), dtype=bool)
+    elif strategy == 'uniform':
+        # The same rows as DataFrame.sample(n, random_state=seed)
+        keep = np.zeros(len(df), dtype=bool)
+        keep[np.random.RandomState(seed).choice(len(df), budget,
+                                                replace=False)] = True
+    else:
+        strata = codes
+        if strategy == 'voxel':
+            voxels = np.floor(df[['x', 'y', 'z']].values
+                              / voxel_size).astype(np.int64)
+            _, strata = np.unique(np.column_stack([codes, voxels]), axis=0,
+                                  return_inverse=True)
+            strata = strata.ravel()
+        counts = np.bincount(strata)
+        keep = _take_quotas(strata, _water_fill(counts, budget, rng), rng)
+
+    totals = np.bincount(codes, minlength=len(labels))
+    sampled = np.bincount(codes[keep], minlength=len(labels))
+    report = {label: {'points': int(total), 'sampled': int(count),
+                      'rate': float(count / total)}
+              for label, total, count in zip(labels, totals, sampled)}
+    return df[keep], report
@@ -0,0 +1,297 @@
+"""Watch-folder daemon that processes new scans and publishes the results.
+
+    python -m geo_service.watch DATA --workers 2
+
+Labelled point cloud CSVs that appear or change in the watched directory
+are run through `process_semantic_pointcloud_to_usd` on a process pool.
+The scene, its geometry payload, scene graph and summary are written to
+a staging directory and then renamed into the publish directory (the
+watched one by default), the scene last, so readers never find a scene
+without its companion files. The point cache of every scan is built into
+the workspace cache, where agents reuse it, and its neighbour graphs are
+kept there for the next time the scan is processed.
+
+Agents whose workspace selects files by pattern, like the agent graph's,
+pick up published scenes on their next refresh without a restart.
+
+Changes are noticed through inotify (via the optional watchdog package)
+or, without it, by polling. Either way a file is only processed once its
+size and modification time have been stable for `settle` seconds, so
+scans that are still being copied are not read half-written. Files whose
+content and options hash matches an earlier run are skipped.
+"""
+
+import argparse
+import fnmatch
+import json
+import os
+import shutil
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from geo_service.batch import content_hash, run_scan
+from utils.workspace import CACHE, workspace_root
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+
+    WATCHDOG_AVAILABLE = True
+except ImportError:
+    print("watchdog not available, polling instead. "  # noqa: T201
+          "Install with: pip install watchdog")
+    WATCHDOG_AVAILABLE = False
+
+SCAN_PATTERN = '*.csv'
+SETTLE_SECONDS = 2.0
+POLL_SECONDS = 1.0
+# Longest sleep between checks when inotify events wake the daemon
+IDLE_SECONDS = 60.0
+STATE_NAME = '.watch_state.json'
+LOG_DIR = '.watch_logs'
+
+
+def _process_scan(input_path, output_path, log_path, cache_dir, options):
+    """Build the point cache of a scan, then run the pipeline on it."""
+    from utils.point_cache import PointCacheStore
+
+    if cache_dir is not None:
+        try:
+            PointCacheStore(cache_dir).open(input_path)
+        except Exception as e:
+            # Not every CSV is a point cloud; the pipeline reports why
+            with open(log_path + '.cache', 'w') as log:
+                log.write(f"Point cache not built: {e}\n")
+        # Neighbour graphs are kept next to the point cache
+        options = {**options, 'index_dir': cache_dir}
+    return run_scan(input_path, output_path, log_path, options)
+
+
+def publish(files, main_file, publish_dir):
+    """Move pipeline outputs into `publish_dir`, `main_file` last.
+
+    Every file is renamed atomically, so readers see either the previous
+    or the new version of it. Returns the published paths.
+    """
+    publish_dir = Path(publish_dir)
+    ordered = [Path(path) for path in files if Path(path) != Path(main_file)]
+    ordered.append(Path(main_file))
+    published = []
+    for path in ordered:
+        if path.exists():
+            target = publish_dir / path.name
+            os.replace(path, target)
+            published.append(str(target))
+    return published
+
+
+class ScanWatcher:
+    """Process scans of a directory as they appear and change."""
+
+    def __init__(self, data_dir, publish_dir=None, pattern=SCAN_PATTERN,
+                 workers=1, settle=SETTLE_SECONDS, poll_interval=POLL_SECONDS,
+                 cache_dir=None, catalog_path=None, output_format='usdc',
+                 **options):
+        """Watch `data_dir` for scans matching `pattern`.
+
+        Outputs go to `publish_dir`, by default `data_dir`, and `options`
+        are passed on to the pipeline.
+        """
+        self.data_dir = Path(data_dir)
+        self.publish_dir = Path(publish_dir or data_dir)
+        self.pattern = pattern
+        self.settle = settle
+        self.poll_interval = poll_interval
+        self.cache_dir = cache_dir
+        self.catalog_path = catalog_path
+        self.output_format = output_format
+        self.options = options
+        self.state_path = self.publish_dir / STATE_NAME
+        self.state = (json.loads(self.state_path.read_text())
+                      if self.state_path.exists() else {})
+        (self.publish_dir / LOG_DIR).mkdir(parents=True, exist_ok=True)
+        self.pool = ProcessPoolExecutor(workers, max_tasks_per_child=1)
+        # name -> (size, mtime_ns) and when it was first seen unchanged
+        self._settling = {}
+        self._running = {}
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+
+    def _signature(self, path):
+        info = path.stat()
+        return [info.st_size, info.st_mtime_ns]
+
+    def _ready_scans(self, now):
+        """Return the scans that changed and have settled since."""
+        ready = []
+        names = set()
+        for path in self.data_dir.iterdir():
+            name = path.name
+            if not (fnmatch.fnmatch(name, self.pattern) and path.is_file()):
+                continue
+            names.add(name)
+            try:
+                signature = self._signature(path)
+            except FileNotFoundError:
+                continue
+            known = self.state.get(name)
+            if (name in self._running
+                    or (known and known['signature'] == signature)):
+                self._settling.pop(name, None)
+                continue
+            seen = self._settling.get(name)
+            if seen is None or seen[0] != signature:
+                self._settling[name] = (signature, now)
+            elif now - seen[1] >= self.settle:
+                del self._settling[name]
+                ready.append((path, signature))
+        for name in set(self._settling) - names:
+            del self._settling[name]
+        return ready
+
+    def _submit(self, path, signature):
+        options = {**self.options}
+        digest = content_hash(path, options)
+        known = self.state.get(path.name)
+        if known and known['hash'] == digest:
+            # Touched but unchanged
+            known['signature'] = signature
+            self._save_state()
+            return
+        staging = self.publish_dir / f".staging-{uuid.uuid4().hex}"
+        staging.mkdir()
+        output = staging / f"{path.stem}.{self.output_format}"
+        log_path = self.publish_dir / LOG_DIR / f"{path.stem}.log"
+        print(f"Processing {path.name}")  # noqa: T201
+        future = self.pool.submit(_process_scan, str(path), str(output),
+                                  str(log_path), self.cache_dir, options)
+        future.add_done_callback(lambda _: self._wake.set())
+        self._running[path.name] = (future, staging, output, signature,
+                                    digest)
+
+    def _collect(self):
+        """Publish the outputs of finished scans."""
+        for name, (future, staging, output, signature,
+                   digest) in list(self._running.items()):
+            if not future.done():
+                continue
+            del self._running[name]
+            try:
+                results = future.result()
+                error = (None if results['success']
+                         else results.get('error', 'pipeline failed'))
+            except Exception as e:
+                results, error = None, f"{type(e).__name__}: {e}"
+            entry = {'signature': signature, 'hash': digest, 'error': error,
+                     'published': []}
+            if error is None:
+                entry['published'] = publish(results['files_created'],
+                                             output, self.publish_dir)
+                self._index(Path(entry['published'][-1]))
+                print(f"Published {name}: "  # noqa: T201
+                      f"{len(entry['published'])} files")
+            else:
+                print(f"Failed {name}: {error}")  # noqa: T201
+            shutil.rmtree(staging, ignore_errors=True)
+            self.state[name] = entry
+            self._save_state()
+
+    def _index(self, scene_path):
+        if self.catalog_path is None:
+            return
+        from utils.scene_catalog import SceneCatalog
+
+        SceneCatalog(self.catalog_path).index_scene_file(scene_path)
+
+    def _save_state(self):
+        staging = self.state_path.with_suffix('.tmp')
+        staging.write_text(json.dumps(self.state, indent=2) + "\n")
+        os.replace(staging, self.state_path)
+
+    def step(self):
+        """Publish finished scans and start settled ones once."""
+        self._collect()
+        for path, signature in self._ready_scans(time.monotonic()):
+            self._submit(path, signature)
+
+    def _timeout(self):
+        if self._settling:
+            return min(self.poll_interval, self.settle)
+        return IDLE_SECONDS if WATCHDOG_AVAILABLE else self.poll_interval
+
+    def run(self):
+        """Watch until `stop` is called."""
+        observer = None
+        if WATCHDOG_AVAILABLE:
+            handler = FileSystemEventHandler()
+            handler.on_any_event = lambda event: self._wake.set()
+            observer = Observer()
+            observer.schedule(handler, str(self.data_dir))
+            observer.start()
+        try:
+            while not self._stop.is_set():
+                self.step()
+                self._wake.wait(self._timeout())
+                self._wake.clear()
+        finally:
+            if observer is not None:
+                observer.stop()
+                observer.join()
+            self.close()
+
+    def stop(self):
+        """Make `run` return after the current step."""
+        self._stop.set()
+        self._wake.set()
+
+    def close(self):
+        """Wait for running scans and shut the worker pool down."""
+        self.pool.shutdown(wait=True)
+        self._collect()
+
+
+def main():
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('data_dir', type=Path)
+    parser.add_argument('--publish-dir', type=Path,
+                        help='defaults to the watched directory')
+    parser.add_argument('--pattern', default=SCAN_PATTERN)
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--settle', type=float, default=SETTLE_SECONDS,
+                        help='seconds a file must be unchanged')
+    parser.add_argument('--workspace-root', type=Path,
+                        help='root of the agent workspaces, for caches')
+    parser.add_argument('--catalog', help='scene catalogue to update')
+    parser.add_argument('--format', choices=['usdc', 'usda'], default='usdc')
+    parser.add_argument('--eps', default='auto',
+                        help="clustering distance or 'auto'")
+    parser.add_argument('--min-samples', type=int, default=15)
+    parser.add_argument('--distance-threshold', type=float, default=3.0)
+    parser.add_argument('--compact', action='store_true',
+                        help='float32 coordinates and categorical labels')
+    args = parser.parse_args()
+
+    watcher = ScanWatcher(
+        args.data_dir, args.publish_dir, args.pattern, args.workers,
+        args.settle, cache_dir=str(workspace_root(args.workspace_root)
+                                   / CACHE),
+        catalog_path=args.catalog, output_format=args.format,
+        eps=args.eps if args.eps == 'auto' else float(args.eps),
+        min_samples=args.min_samples,
+        distance_threshold=args.distance_threshold,
+        compact=args.compact)
+    print(f"Watching {args.data_dir} for {args.pattern}")  # noqa: T201
+    try:
+        watcher.run()
+    except KeyboardInterrupt:
+        watcher.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
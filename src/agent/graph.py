@@ -1,55 +1,82 @@
 """LangGraph ReAct agent for geodata questions."""
 
 import os
-import shutil
-import tempfile
+import threading
+from pathlib import Path
+from typing import Any
 
 import streamlit as st
-from langchain_community.agent_toolkits import FileManagementToolkit
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import BaseMessage
 from langchain_openai import ChatOpenAI
 from langgraph.prebuilt import create_react_agent
-from utils.config import is_mining_case_enabled
-from utils.mining_tools import MINING_TOOLS
+from utils.config import (
+    get_scene_catalog_path,
+    get_trace_path,
+    get_tunnel_network_path,
+    is_fake_llm_enabled,
+    is_mining_case_enabled,
+)
+from utils.fake_llm import DeterministicChatModel
+from utils.mining_tools import make_mining_tools, make_tunnel_tools
+from utils.point_cache import PointCacheStore
+from utils.prompt_prefix import PromptPrefix, workspace_digest
+from utils.scene_catalog import SceneCatalog
+from utils.scene_tools import make_catalog_tools, make_scene_tools
+from utils.tracing import TracingCallbackHandler, Tracer, open_sink
+from utils.tunnel_network import TunnelNetwork
+from utils.workspace import SharedWorkspace
+from utils.workspace_tools import make_workspace_tools
 
 # Load secrets from Streamlit (works for both local .streamlit/secrets.toml
-# and cloud)
-os.environ["OPENAI_API_KEY"] = st.secrets["OPENAI_API_KEY"]
-if "LANGCHAIN_API_KEY" in st.secrets:
-    os.environ["LANGCHAIN_API_KEY"] = st.secrets["LANGCHAIN_API_KEY"]
+# and cloud). The offline fake LLM used for load tests needs no keys.
+if not is_fake_llm_enabled():
+    os.environ["OPENAI_API_KEY"] = st.secrets["OPENAI_API_KEY"]
+    if "LANGCHAIN_API_KEY" in st.secrets:
+        os.environ["LANGCHAIN_API_KEY"] = st.secrets["LANGCHAIN_API_KEY"]
 
-# Create temporary workspace for file operations
-TEMP_WORKSPACE = tempfile.mkdtemp(prefix="geodata_workspace_")
 DATA_DIR = os.path.join(
     os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "DATA")
+MINING_POINT_CLOUD = "3D_point_cloud_GT-100k.csv"
 
 
-# Copy specific files to workspace at startup
-def setup_workspace():
-    """Copy specific files from DATA directory to temporary workspace."""
-    files_to_copy = []
-
+def workspace_files() -> list[str]:
+    """Return the DATA files the agent may access in this mode."""
     # Add dataset-specific files based on mining case setting
     if is_mining_case_enabled():
-        files_to_copy.append("3D_point_cloud_GT-100k.csv")
-    else:
-        files_to_copy.extend([
-            "demo_scene_c.usda",
-            "indoor_room_labelled_sparse.csv"
-        ])
+        return [MINING_POINT_CLOUD]
+    return ["demo_scene_c.usda", "indoor_room_labelled_sparse.csv"]
 
-    if os.path.exists(DATA_DIR):
-        for file in files_to_copy:
-            source_path = os.path.join(DATA_DIR, file)
-            if os.path.exists(source_path):
-                dest_path = os.path.join(TEMP_WORKSPACE, file)
-                shutil.copy2(source_path, dest_path)
-    print(TEMP_WORKSPACE)
+
+def workspace_patterns() -> list[str]:
+    """Return patterns of files published into DATA while running."""
+    if is_mining_case_enabled():
+        return []
+    # Scenes and scene graphs written by the geo_service.watch daemon
+    return ["*.usda", "*.usdc", "*_graph.sgraph"]
 
 
-setup_workspace()
+# Seconds between checks of DATA for published or changed files
+WORKSPACE_REFRESH_SECONDS = 5.0
+
+# Workspace of hardlinks to the DATA files, shared by all processes
+# serving the same data and linked on first file access. Linking is
+# constant time per file, whatever the file size. Files published into
+# DATA move the agent to a new workspace on its next file access, without
+# a restart.
+WORKSPACE = SharedWorkspace(DATA_DIR, workspace_files(),
+                            patterns=workspace_patterns(),
+                            refresh_interval=WORKSPACE_REFRESH_SECONDS)
 
 # Initialize the LLM with streaming enabled
-llm = ChatOpenAI(model="gpt-4o", temperature=0, streaming=True)
+llm: BaseChatModel
+if is_fake_llm_enabled():
+    llm = DeterministicChatModel(
+        token_delay=float(os.environ.get("FAKE_LLM_TOKEN_DELAY", "0")))
+else:
+    # stream_usage reports token counts on streamed responses for tracing
+    llm = ChatOpenAI(model="gpt-4o", temperature=0, streaming=True,
+                     stream_usage=True)
 
 # llm = ChatOpenAI(
 #     base_url="http://localhost:1234/v1",
@@ -57,19 +84,77 @@ llm = ChatOpenAI(model="gpt-4o", temperature=0, streaming=True)
 # )
 
 
-# Create file management toolkit for the temporary workspace
-file_toolkit = FileManagementToolkit(
-    root_dir=TEMP_WORKSPACE,
-    selected_tools=["read_file", "list_directory", "file_search"]
-)
-
-
-# Define tools based on mode
-tools = file_toolkit.get_tools()
+# File tools page through large files and search indexes cached next to
+# the shared workspace instead of returning whole files
+point_caches = PointCacheStore(WORKSPACE.cache_dir)
+tools = make_workspace_tools(WORKSPACE, point_caches=point_caches)
 
 if is_mining_case_enabled():
-    # Add mining-specific tools
-    tools.extend(MINING_TOOLS)
+    # Mining tools measure the scan through the shared point cache
+    tools.extend(make_mining_tools(lambda: point_caches.open(
+        WORKSPACE.resolve(MINING_POINT_CLOUD))))
+    # Tunnel questions are answered from the precomputed network; without
+    # a configured one it is built from the scan on first use.
+    tunnel_network = TunnelNetwork(get_tunnel_network_path()
+                                   or str(WORKSPACE) + "_tunnels.db")
+    tunnel_lock = threading.Lock()
+
+    def reset_tunnel_network(old_path: Path, new_path: Path) -> None:
+        """Rebuild the network of a changed scan on next use."""
+        global tunnel_network
+        if get_tunnel_network_path() is None:
+            with tunnel_lock:
+                tunnel_network.close()
+                tunnel_network = TunnelNetwork(str(new_path) + "_tunnels.db")
+
+    WORKSPACE.add_listener(reset_tunnel_network)
+
+    def open_tunnel_network() -> tuple[TunnelNetwork, bool]:
+        """Return the tunnel network, building it if needed."""
+        with tunnel_lock:
+            built = tunnel_network.is_built
+            if not built:
+                tunnel_network.build(point_caches.open(
+                    WORKSPACE.resolve(MINING_POINT_CLOUD))[0])
+        return tunnel_network, built
+
+    tools.extend(make_tunnel_tools(open_tunnel_network))
+else:
+    # Scene tools read USD metadata and load object points on demand
+    tools.extend(make_scene_tools(lambda: str(WORKSPACE.materialize())))
+    # Cross-scene questions are answered from the catalogue; without a
+    # shared one, index the scenes in the workspace.
+    catalog_path = get_scene_catalog_path()
+    if catalog_path is None:
+        catalog_path = str(WORKSPACE) + "_catalog.db"
+        scene_catalog = SceneCatalog(catalog_path)
+        # The only place the workspace is linked before a tool runs
+        scene_catalog.scan(WORKSPACE.materialize())
+
+        catalog_lock = threading.Lock()
+
+        def reindex_scenes(old_path: Path, new_path: Path) -> None:
+            """Move to the catalogue of the new workspace's scenes.
+
+            The catalogue of the old workspace is removed with it by
+            `SharedWorkspace.cleanup`.
+            """
+            global scene_catalog
+            catalog = SceneCatalog(str(new_path) + "_catalog.db")
+            catalog.scan(new_path)
+            with catalog_lock:
+                old_catalog, scene_catalog = scene_catalog, catalog
+            old_catalog.close()
+
+        def open_scene_catalog() -> SceneCatalog:
+            """Return the catalogue of the current workspace."""
+            with catalog_lock:
+                return scene_catalog
+
+        WORKSPACE.add_listener(reindex_scenes)
+        tools.extend(make_catalog_tools(open_scene_catalog))
+    else:
+        tools.extend(make_catalog_tools(SceneCatalog(catalog_path)))
 
 # Create the ReAct agent with mode-specific prompt
 if is_mining_case_enabled():
@@ -77,7 +162,15 @@ if is_mining_case_enabled():
               "geospatial data analysis, specifically mining operations. "
               "You have access to a mining point cloud dataset."
               "Use 'list_directory' to see available files, but never attempt"
-              "to open a csv file."
+              "to open a csv file. 'csv_column_stats' summarises its "
+              "columns and 'query_point_cloud' answers point counts, "
+              "bounds, label histograms, densities and height profiles "
+              "without reading it. The mining tools measure tunnel "
+              "cross-sections along a path, occupied volumes per label "
+              "and region statistics; query the bounds first to find "
+              "coordinates. The tunnel tools list tunnel branches and "
+              "look up precomputed clearances by chainage or extreme "
+              "value, e.g. where a tunnel is narrowest. "
               "You have multiple tools available to answer questions. If "
               "asked for information about this mine, try to answer the "
               "question using your tools. If you don't have relevant tools "
@@ -92,8 +185,30 @@ else:
               "All USD files are already available in "
               "the workspace. "
               "Use 'list_directory' to see available "
-              "files and 'read_file' "
-              "to analyze USD scene content when needed."
-              "Make sure to strictly only read USD* files")
+              "files, 'search_files' to find prims, labels and columns, "
+              "and 'read_file' to read a page of USD scene content at "
+              "the line a search returned. "
+              "Make sure to strictly only read USD* files. "
+              "Prefer the scene tools for object lists, relationships "
+              "and geometry; binary .usdc scenes can only be read "
+              "through them.")
+
+
+def assemble_prompt(state: dict[str, Any]) -> list[BaseMessage]:
+    """Put the static prompt and workspace digest before the conversation.
+
+    The prefix only changes with the workspace version, so providers'
+    prompt caches serve it on every turn and session.
+    """
+    prefix = PromptPrefix(prompt, workspace_digest(WORKSPACE.materialize()))
+    messages: list[BaseMessage] = prefix.messages(state["messages"])
+    return messages
+
+
+graph = create_react_agent(llm, tools, prompt=assemble_prompt)
 
-graph = create_react_agent(llm, tools, prompt=prompt)
+# Record turn, LLM and tool spans locally when tracing is configured
+trace_path = get_trace_path()
+if trace_path:
+    graph = graph.with_config(
+        callbacks=[TracingCallbackHandler(Tracer(open_sink(trace_path)))])
@@ -1,15 +1,17 @@
 import asyncio
 
-from langgraph_sdk import get_client
-
-client = get_client(url="http://localhost:2024")
+from utils.chat_session import ChatSession, close_shared_clients
 
 
 async def chat_loop():
     print("Chat started. Type 'quit' to exit.")
 
+    # One session per conversation: the server keeps the message history
+    # on the thread, so each turn only sends the new message.
+    session = ChatSession()
+
     while True:
-        user_input = input("\nYou: ").strip()
+        user_input = (await asyncio.to_thread(input, "\nYou: ")).strip()
 
         if user_input.lower() in ['quit', 'exit', 'q']:
             print("Goodbye!")
@@ -20,25 +22,10 @@ async def chat_loop():
 
         print("Assistant: ", end="", flush=True)
 
-        async for chunk in client.runs.stream(
-                None,  # Threadless run
-                "agent",  # Name of assistant. Defined in langgraph.json.
-                input={
-                    "messages": [{
-                        "role": "human",
-                        "content": user_input,
-                    }],
-                },
-                stream_mode="messages-tuple"
-        ):
-            # print(f"Event: {chunk.event}")
-            if chunk.event != "messages":
-                continue
-
-            message_chunk, metadata = chunk.data
-            if (message_chunk["content"] and
-                    message_chunk["type"] == "AIMessageChunk"):
-                print(message_chunk["content"], end="", flush=True)
+        async for text in session.stream(user_input):
+            print(text, end="", flush=True)
+
+    await close_shared_clients()
 
 
 if __name__ == "__main__":
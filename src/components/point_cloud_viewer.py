@@ -54,20 +54,21 @@ def render_point_cloud_viewer(csv_file_path=None, height=800):
 
 
 def show_available_files():
-    """Show list of files available in the temporary workspace."""
+    """Show list of files available in the shared workspace."""
     try:
         # Import here to avoid circular imports
-        from agent.graph import TEMP_WORKSPACE
+        from agent.graph import WORKSPACE
 
-        if os.path.exists(TEMP_WORKSPACE):
-            files = [f for f in os.listdir(TEMP_WORKSPACE)
-                     if os.path.isfile(os.path.join(TEMP_WORKSPACE, f))]
+        workspace_dir = str(WORKSPACE.materialize())
+        if os.path.exists(workspace_dir):
+            files = [f for f in os.listdir(workspace_dir)
+                     if os.path.isfile(os.path.join(workspace_dir, f))]
 
             if files:
                 st.markdown("### 📁 Available Files")
 
                 for file in sorted(files):
-                    file_path = os.path.join(TEMP_WORKSPACE, file)
+                    file_path = os.path.join(workspace_dir, file)
                     file_size = os.path.getsize(file_path)
 
                     # Format file size
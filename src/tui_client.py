@@ -5,7 +5,8 @@ from textual.app import App, ComposeResult
 from textual.containers import Container, Horizontal, Vertical
 from textual.widgets import Button, Header, Footer, Input, RichLog, Static
 from textual.binding import Binding
-from langgraph_sdk import get_client
+
+from utils.chat_session import ChatSession, close_shared_clients
 
 class ChatApp(App):
     """A TUI chat application."""
@@ -22,6 +23,11 @@ class ChatApp(App):
         padding: 1;
     }
     
+    #reply {
+        margin: 0 1;
+        padding: 0 1;
+    }
+    
     #input-container {
         dock: bottom;
         height: 3;
@@ -46,12 +52,20 @@ class ChatApp(App):
     
     def __init__(self):
         super().__init__()
-        self.client = get_client(url="http://localhost:2024")
+        self.session = ChatSession()
+        # Messages typed while a reply is streaming wait here and are sent
+        # in order, one run at a time.
+        self.pending: asyncio.Queue[str] = asyncio.Queue()
+        # Unfinished last line of the reply being streamed
+        self.partial_line = ""
+        self.reply_started = False
+        self.replying = False
     
     def compose(self) -> ComposeResult:
         """Create child widgets for the app."""
         yield Header()
         yield RichLog(id="chat-log", markup=True)
+        yield Static(id="reply", markup=True)
         with Horizontal(id="input-container"):
             yield Input(
                 placeholder="Type your message here...",
@@ -68,6 +82,13 @@ class ChatApp(App):
         
         # Focus the input field
         self.query_one("#chat-input", Input).focus()
+
+        # Single consumer for the message queue
+        self.run_worker(self.process_messages(), exclusive=True)
+
+    async def on_unmount(self) -> None:
+        """Close pooled connections when the app exits."""
+        await close_shared_clients()
     
     def on_button_pressed(self, event: Button.Pressed) -> None:
         """Handle button press."""
@@ -93,46 +114,62 @@ class ChatApp(App):
         # Clear input
         input_widget.value = ""
         
-        # Add user message to chat log
+        # Queue the message; the worker sends it once earlier ones finish
+        # and adds it to the chat log then, below the previous reply
+        if self.replying or not self.pending.empty():
+            self.notify("Message queued until the current reply finishes")
+        self.pending.put_nowait(message)
+
+    async def process_messages(self) -> None:
+        """Send queued messages one at a time on the session's thread."""
+        while True:
+            message = await self.pending.get()
+            await self.get_bot_response(message)
+
+    def append_reply(self, text: str) -> None:
+        """Add streamed text to the log, line by line as lines complete.
+
+        Only the unfinished last line is redrawn, so a long chat costs no
+        more per token than a short one.
+        """
         chat_log = self.query_one("#chat-log", RichLog)
-        chat_log.write(f"[bold blue]You:[/bold blue] {message}")
-        
-        # Send message to chatbot (run async)
-        asyncio.create_task(self.get_bot_response(message))
-    
+        *lines, self.partial_line = (self.partial_line + text).split("\n")
+        for line in lines:
+            chat_log.write(self.reply_prefix() + line)
+            self.reply_started = True
+        self.query_one("#reply", Static).update(
+            self.reply_prefix() + self.partial_line)
+
+    def reply_prefix(self) -> str:
+        """Return the speaker label for the next line of the reply."""
+        return "" if self.reply_started else "[bold green]Assistant:[/bold green] "
+
+    def finish_reply(self) -> None:
+        """Move the unfinished last line of the reply into the log."""
+        if self.partial_line or not self.reply_started:
+            chat_log = self.query_one("#chat-log", RichLog)
+            chat_log.write(self.reply_prefix() + self.partial_line)
+        self.query_one("#reply", Static).update("")
+        self.partial_line = ""
+        self.reply_started = False
+
     async def get_bot_response(self, user_message: str) -> None:
         """Get response from the chatbot."""
         chat_log = self.query_one("#chat-log", RichLog)
+        chat_log.write(f"[bold blue]You:[/bold blue] {user_message}")
+        self.replying = True
         
         try:
-            response_text = ""
-            
-            async for chunk in self.client.runs.stream(
-                None,  # Threadless run
-                "agent",  # Name of assistant
-                input={
-                    "messages": [{
-                        "role": "human",
-                        "content": user_message,
-                    }],
-                },
-                stream_mode="messages-tuple"
-            ):
-                if chunk.event == "messages":
-                    message_chunk, metadata = chunk.data
-                    if message_chunk["content"]:
-                        response_text += message_chunk["content"]
-                        # Clear and rewrite from assistant line
-                        chat_log.clear()
-                        chat_log.write("[bold green]Geodata Chatbot TUI[/bold green]")
-                        chat_log.write("[dim]Type your message and press Enter to chat[/dim]")
-                        chat_log.write(f"[bold blue]You:[/bold blue] {user_message}")
-                        chat_log.write(f"[bold green]Assistant:[/bold green] {response_text}")
-            
+            async for text in self.session.stream(user_message):
+                self.append_reply(text)
+            self.finish_reply()
             
         except Exception as e:
+            self.finish_reply()
             chat_log.write(f"[bold red]Error:[/bold red] {str(e)}")
 
+        self.replying = False
+
 def main():
     """Run the TUI application."""
     app = ChatApp()
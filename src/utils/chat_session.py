@@ -0,0 +1,157 @@
+"""Persistent chat sessions against the LangGraph server.
+
+A session owns one server-side thread, so every turn only sends the new
+user message and the server checkpointer supplies the history. Runs on a
+session are serialised: follow-up messages wait for the in-flight run to
+finish, and a stream that drops mid-run is rejoined from the last event
+instead of being restarted.
+"""
+
+import asyncio
+from collections.abc import AsyncIterator
+from typing import Any
+
+import httpx
+from langgraph_sdk import get_client
+from langgraph_sdk.client import LangGraphClient
+from langgraph_sdk.schema import StreamMode, StreamPart
+
+DEFAULT_URL = "http://localhost:2024"
+# Name of assistant. Defined in langgraph.json.
+DEFAULT_ASSISTANT = "agent"
+STREAM_MODE: StreamMode = "messages-tuple"
+
+# One pooled HTTP client per server URL and event loop for the whole
+# process, so sessions share keep-alive connections instead of opening new
+# ones.
+_clients: dict[tuple[str, int], LangGraphClient] = {}
+
+
+def get_shared_client(url: str = DEFAULT_URL) -> LangGraphClient:
+    """Return the process-wide LangGraph client for `url`."""
+    key = (url, id(asyncio.get_running_loop()))
+    if key not in _clients:
+        _clients[key] = get_client(url=url)
+    return _clients[key]
+
+
+async def close_shared_clients() -> None:
+    """Close every pooled client created by `get_shared_client`."""
+    clients = list(_clients.values())
+    _clients.clear()
+    for client in clients:
+        await client.aclose()
+
+
+def message_text(chunk_data: Any) -> str:
+    """Extract the assistant text from a `messages-tuple` stream part."""
+    message_chunk, _metadata = chunk_data
+    if (message_chunk.get("type") == "AIMessageChunk" and
+            isinstance(message_chunk.get("content"), str)):
+        return str(message_chunk["content"])
+    return ""
+
+
+class ChatSession:
+    """A multi-turn conversation bound to one LangGraph thread."""
+
+    def __init__(
+        self,
+        url: str = DEFAULT_URL,
+        assistant_id: str = DEFAULT_ASSISTANT,
+        thread_id: str | None = None,
+        max_reconnects: int = 3,
+        reconnect_delay: float = 0.5,
+    ) -> None:
+        """Create a session; the thread is created lazily on first use.
+
+        Args:
+            url: Base URL of the LangGraph server.
+            assistant_id: Graph to run on the server.
+            thread_id: Existing thread to resume, if any.
+            max_reconnects: How often a dropped stream is rejoined before
+                the error is raised to the caller.
+            reconnect_delay: Initial back-off between rejoin attempts in
+                seconds; doubled after every failed attempt.
+        """
+        self.url = url
+        self.assistant_id = assistant_id
+        self.thread_id = thread_id
+        self.max_reconnects = max_reconnects
+        self.reconnect_delay = reconnect_delay
+        self._thread_ready = False
+        # asyncio.Lock wakes waiters in FIFO order, which gives queued
+        # follow-ups the order in which they were sent.
+        self._run_lock = asyncio.Lock()
+
+    @property
+    def client(self) -> LangGraphClient:
+        """Pooled client used by this session."""
+        return get_shared_client(self.url)
+
+    async def ensure_thread(self) -> str:
+        """Create the server-side thread once and return its id."""
+        if not self._thread_ready:
+            thread = await self.client.threads.create(
+                thread_id=self.thread_id, if_exists="do_nothing")
+            self.thread_id = str(thread["thread_id"])
+            self._thread_ready = True
+        assert self.thread_id is not None
+        return self.thread_id
+
+    async def stream(self, user_message: str) -> AsyncIterator[str]:
+        """Send `user_message` and yield the assistant reply as it streams.
+
+        Only one run is in flight per session; a second call waits until
+        the previous reply has been fully consumed.
+        """
+        async with self._run_lock:
+            thread_id = await self.ensure_thread()
+            run_id: str | None = None
+            last_event_id: str | None = None
+            attempts = 0
+
+            run_input: dict[str, Any] = {
+                "messages": [{
+                    "role": "human",
+                    "content": user_message,
+                }],
+            }
+            parts: AsyncIterator[StreamPart] = self.client.runs.stream(
+                thread_id,
+                self.assistant_id,
+                input=run_input,
+                stream_mode=STREAM_MODE,
+                stream_resumable=True,
+                on_disconnect="continue",
+            )
+            while True:
+                try:
+                    async for part in parts:
+                        if part.id is not None:
+                            last_event_id = part.id
+                        if part.event == "metadata":
+                            run_id = part.data.get("run_id", run_id)
+                        elif part.event == "messages":
+                            text = message_text(part.data)
+                            if text:
+                                yield text
+                        elif part.event == "error":
+                            raise RuntimeError(str(part.data))
+                    return
+                except httpx.TransportError:
+                    if run_id is None or attempts >= self.max_reconnects:
+                        raise
+                    await asyncio.sleep(self.reconnect_delay * 2 ** attempts)
+                    attempts += 1
+                    # Replay everything after the last event we saw.
+                    parts = self.client.runs.join_stream(
+                        thread_id,
+                        run_id,
+                        stream_mode=STREAM_MODE,
+                        last_event_id=last_event_id,
+                    )
+
+    async def send(self, user_message: str) -> str:
+        """Send `user_message` and return the complete assistant reply."""
+        return "".join([text async for text in self.stream(user_message)])
@@ -1,11 +1,12 @@
 """Configuration utilities for the geodata chatbot."""
 
+import os
+
 import streamlit as st
 
 
 def is_mining_case_enabled() -> bool:
-    """
-    Check if mining case is enabled via secrets configuration.
+    """Check if mining case is enabled via secrets configuration.
 
     Returns:
         bool: True if MINING_CASE secret is set to "true" (case-insensitive),
@@ -16,4 +17,83 @@ def is_mining_case_enabled() -> bool:
         return str(mining_value).lower() == "true"
     except Exception:
         # If secrets file doesn't exist or secret not found, return False
-        return False
\ No newline at end of file
+        return False
+
+
+def is_fake_llm_enabled() -> bool:
+    """Check if the agent should use the deterministic offline LLM.
+
+    The LangGraph server reads its environment from .env, so the FAKE_LLM
+    environment variable takes precedence over the secrets file.
+
+    Returns:
+        bool: True if FAKE_LLM is set to "true" (case-insensitive),
+              False otherwise.
+    """
+    fake_value = os.environ.get("FAKE_LLM")
+    if fake_value is None:
+        try:
+            fake_value = st.secrets.get("FAKE_LLM", "false")
+        except Exception:
+            # If secrets file doesn't exist or secret not found, use the
+            # real model
+            return False
+    return str(fake_value).lower() == "true"
+
+
+def get_trace_path() -> str | None:
+    """Return the file that agent traces are written to, if tracing is on.
+
+    Like FAKE_LLM, the TRACE_PATH environment variable takes precedence
+    over the secrets file. Paths ending in .db/.sqlite are written as SQLite,
+    anything else as JSONL.
+
+    Returns:
+        str | None: The trace file path, or None if tracing is disabled.
+    """
+    trace_path = os.environ.get("TRACE_PATH")
+    if trace_path is None:
+        try:
+            trace_path = st.secrets.get("TRACE_PATH")
+        except Exception:
+            # If secrets file doesn't exist, tracing stays disabled
+            return None
+    return str(trace_path) if trace_path else None
+
+
+def get_scene_catalog_path() -> str | None:
+    """Return the scene catalogue database shared by pipeline and agent.
+
+    The SCENE_CATALOG environment variable takes precedence over the
+    secrets file.
+
+    Returns:
+        str | None: The catalogue path, or None if none is configured.
+    """
+    catalog_path = os.environ.get("SCENE_CATALOG")
+    if catalog_path is None:
+        try:
+            catalog_path = st.secrets.get("SCENE_CATALOG")
+        except Exception:
+            # If secrets file doesn't exist, no catalogue is configured
+            return None
+    return str(catalog_path) if catalog_path else None
+
+
+def get_tunnel_network_path() -> str | None:
+    """Return the precomputed tunnel network database of the mine scan.
+
+    The TUNNEL_NETWORK environment variable takes precedence over the
+    secrets file.
+
+    Returns:
+        str | None: The database path, or None if none is configured.
+    """
+    network_path = os.environ.get("TUNNEL_NETWORK")
+    if network_path is None:
+        try:
+            network_path = st.secrets.get("TUNNEL_NETWORK")
+        except Exception:
+            # If secrets file doesn't exist, no network is configured
+            return None
+    return str(network_path) if network_path else None
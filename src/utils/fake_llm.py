@@ -0,0 +1,149 @@
+"""Deterministic offline chat model for load tests.
+
+The model never calls a provider. For every new user message it first
+requests the `list_directory` tool (when bound), then answers with a reply
+whose words and length are derived from a hash of the user message, so two
+runs of the same script produce byte-identical conversations.
+"""
+
+import hashlib
+import time
+import uuid
+from collections.abc import Callable, Iterator, Sequence
+from typing import Any
+
+from langchain_core.callbacks import CallbackManagerForLLMRun
+from langchain_core.language_models import BaseChatModel, LanguageModelInput
+from langchain_core.messages import (
+    AIMessage,
+    AIMessageChunk,
+    BaseMessage,
+    HumanMessage,
+    ToolMessage,
+)
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.runnables import Runnable
+from langchain_core.tools import BaseTool
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+VOCABULARY = (
+    "the scene contains a chair table wall floor ceiling object near above "
+    "below adjacent inside volume point cloud centroid metres label cluster "
+    "furniture room tunnel section height width"
+).split()
+
+# Tool the model calls once per user message when it is bound.
+PROBE_TOOL = "list_directory"
+
+
+def _digest(text: str) -> bytes:
+    return hashlib.sha256(text.encode("utf-8")).digest()
+
+
+class DeterministicChatModel(BaseChatModel):
+    """Chat model that replays a seeded, tool-calling ReAct pattern."""
+
+    min_words: int = 20
+    max_words: int = 60
+    token_delay: float = 0.0
+    """Seconds to sleep per streamed token, to emulate provider latency."""
+
+    @property
+    def _llm_type(self) -> str:
+        return "deterministic-fake"
+
+    def bind_tools(
+        self,
+        tools: Sequence[dict[str, Any] | type | Callable[..., Any] | BaseTool],
+        **kwargs: Any,
+    ) -> Runnable[LanguageModelInput, AIMessage]:
+        """Record the tool schemas so the model can call them by name."""
+        formatted = [convert_to_openai_tool(tool) for tool in tools]
+        return super().bind(tools=formatted, **kwargs)
+
+    def _reply(self, messages: list[BaseMessage],
+               tools: list[dict[str, Any]] | None) -> AIMessage:
+        last_human = next(
+            (m for m in reversed(messages) if isinstance(m, HumanMessage)),
+            None)
+        prompt = str(last_human.content) if last_human else ""
+        digest = _digest(prompt)
+        tool_names = {t["function"]["name"] for t in tools or []}
+
+        if (isinstance(messages[-1], HumanMessage) and
+                PROBE_TOOL in tool_names):
+            return AIMessage(
+                content="",
+                tool_calls=[{
+                    "name": PROBE_TOOL,
+                    "args": {},
+                    "id": f"call_{digest.hex()[:16]}",
+                    "type": "tool_call",
+                }],
+            )
+
+        span = self.max_words - self.min_words + 1
+        n_words = self.min_words + int.from_bytes(digest[:4], "big") % span
+        words = [VOCABULARY[digest[i % len(digest)] % len(VOCABULARY)]
+                 for i in range(n_words)]
+        tool_results = sum(isinstance(m, ToolMessage) for m in messages)
+        content = " ".join(words) + f" ({tool_results} tool results seen)."
+        prompt_tokens = sum(len(str(m.content).split()) for m in messages)
+        completion_tokens = len(content.split())
+        return AIMessage(
+            content=content,
+            usage_metadata={
+                "input_tokens": prompt_tokens,
+                "output_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        )
+
+    def _generate(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: CallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        message = self._reply(messages, kwargs.get("tools"))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: CallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        message = self._reply(messages, kwargs.get("tools"))
+        message_id = f"run-{uuid.uuid4()}"
+
+        if message.tool_calls:
+            call = message.tool_calls[0]
+            yield ChatGenerationChunk(message=AIMessageChunk(
+                id=message_id,
+                content="",
+                tool_call_chunks=[{
+                    "name": call["name"],
+                    "args": "{}",
+                    "id": call["id"],
+                    "index": 0,
+                    "type": "tool_call_chunk",
+                }],
+            ))
+            return
+
+        tokens = str(message.content).split(" ")
+        for index, word in enumerate(tokens):
+            if self.token_delay:
+                time.sleep(self.token_delay)
+            token = word if index == 0 else " " + word
+            chunk = ChatGenerationChunk(message=AIMessageChunk(
+                id=message_id, content=token))
+            if run_manager:
+                run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+        yield ChatGenerationChunk(message=AIMessageChunk(
+            id=message_id, content="",
+            usage_metadata=message.usage_metadata))
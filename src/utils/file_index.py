@@ -0,0 +1,273 @@
+"""Line, prim and column indexes of workspace files, cached on disk.
+
+Indexes are built once per file version and stored in a cache directory
+keyed by the file's path, size and modification time, so every process
+sharing a workspace reuses them:
+
+- line offsets: byte offset of every line start, for ranged reads that
+  seek straight to a line instead of reading the file from the start
+- entries: prim paths and semantic labels of USDA scenes, and columns
+  and label values of CSV files, each with the line it appears on
+- CSV column statistics, aggregated over the file in chunks
+"""
+
+import csv
+import hashlib
+import json
+import re
+import uuid
+from collections import Counter
+from collections.abc import Callable
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, TypeVar
+
+import numpy as np
+import pandas as pd
+from numpy.typing import NDArray
+
+CHUNK_BYTES = 1 << 24
+CSV_CHUNK_ROWS = 1_000_000
+# Columns with at most this many distinct values also get value counts
+MAX_CATEGORIES = 50
+LABEL_COLUMNS = ("semantic_label", "label", "class")
+_PRIM = re.compile(rb'^(\s*)(?:def|over|class)\s+(?:(\w+)\s+)?"([^"]+)"')
+_LABEL = re.compile(rb'semantic_label"?\s*=\s*"([^"]+)"')
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True)
+class IndexEntry:
+    """One searchable item of a file and where it is."""
+
+    kind: str
+    text: str
+    line: int
+
+
+def cache_key(path: Path) -> str:
+    """Return a key identifying this version of `path`.
+
+    The key names the file by inode, so every hardlink of it, such as
+    the same source file in different workspaces, shares its indexes.
+    """
+    info = path.stat()
+    identity = (f"{info.st_dev}:{info.st_ino}:{info.st_size}:"
+                f"{info.st_mtime_ns}")
+    return hashlib.sha256(identity.encode()).hexdigest()[:24]
+
+
+def _line_offsets(path: Path) -> NDArray[np.int64]:
+    """Return the byte offset of every line start."""
+    starts = [np.zeros(1, dtype=np.int64)]
+    position = 0
+    with path.open("rb") as f:
+        while chunk := f.read(CHUNK_BYTES):
+            newlines = np.flatnonzero(
+                np.frombuffer(chunk, dtype=np.uint8) == ord("\n"))
+            starts.append(newlines.astype(np.int64) + position + 1)
+            position += len(chunk)
+    offsets = np.concatenate(starts)
+    # A trailing newline does not start another line
+    return offsets[offsets < position] if position else offsets[:0]
+
+
+def _usda_entries(path: Path) -> list[IndexEntry]:
+    entries = []
+    stack: list[tuple[int, str]] = []
+    with path.open("rb") as f:
+        for number, line in enumerate(f, start=1):
+            prim = _PRIM.match(line)
+            if prim:
+                indent = len(prim.group(1))
+                while stack and stack[-1][0] >= indent:
+                    stack.pop()
+                stack.append((indent, prim.group(3).decode()))
+                prim_path = "/" + "/".join(name for _, name in stack)
+                prim_type = (prim.group(2) or b"").decode()
+                entries.append(IndexEntry(
+                    "prim", f"{prim_path} {prim_type}".strip(), number))
+                continue
+            label = _LABEL.search(line)
+            if label and stack:
+                entries.append(IndexEntry(
+                    "label", f"{label.group(1).decode()} "
+                    f"/{'/'.join(name for _, name in stack)}", number))
+    return entries
+
+
+def csv_delimiter(path: Path) -> str:
+    """Guess the delimiter of a CSV file from its header line."""
+    with path.open(newline="") as f:
+        header = f.readline()
+    try:
+        return csv.Sniffer().sniff(header, delimiters=",;\t ").delimiter
+    except csv.Error:
+        return ","
+
+
+def _csv_entries(path: Path) -> list[IndexEntry]:
+    delimiter = csv_delimiter(path)
+    with path.open(newline="") as f:
+        reader = csv.reader(f, delimiter=delimiter)
+        header = next(reader, [])
+        entries = [IndexEntry("column", name, 1) for name in header]
+        label_columns = [i for i, name in enumerate(header)
+                         if name.lower() in LABEL_COLUMNS]
+        first_seen: dict[str, int] = {}
+        for number, row in enumerate(reader, start=2):
+            for i in label_columns:
+                if i < len(row):
+                    first_seen.setdefault(f"{header[i]}={row[i]}", number)
+    entries += [IndexEntry("value", text, line)
+                for text, line in first_seen.items()]
+    return entries
+
+
+def _csv_stats(path: Path) -> dict[str, Any]:
+    """Aggregate per-column statistics over the file in chunks.
+
+    Means and variances of chunks are merged with Chan's update of
+    Welford's method, so large offsets such as 1e6-scale eastings do not
+    cancel out the variance as a sum of squares would.
+    """
+    totals: dict[str, dict[str, Any]] = {}
+    rows = 0
+    for chunk in pd.read_csv(path, sep=csv_delimiter(path),
+                             chunksize=CSV_CHUNK_ROWS):
+        rows += len(chunk)
+        for name in chunk.columns:
+            column = chunk[name]
+            entry = totals.setdefault(name, {
+                "count": 0, "n": 0, "mean": 0.0, "m2": 0.0, "min": None,
+                "max": None, "numeric": True, "values": Counter()})
+            values = column.dropna()
+            entry["count"] += len(values)
+            if entry["numeric"] and pd.api.types.is_numeric_dtype(values):
+                data = values.to_numpy(dtype=np.float64)
+                if len(data):
+                    n, mean = len(data), float(data.mean())
+                    total = entry["n"] + n
+                    delta = mean - entry["mean"]
+                    entry["m2"] += (float(np.square(data - mean).sum())
+                                    + delta ** 2 * entry["n"] * n / total)
+                    entry["mean"] += delta * n / total
+                    entry["n"] = total
+                    low, high = float(data.min()), float(data.max())
+                    entry["min"] = low if entry["min"] is None else min(
+                        entry["min"], low)
+                    entry["max"] = high if entry["max"] is None else max(
+                        entry["max"], high)
+            else:
+                entry["numeric"] = False
+            if entry["values"] is not None:
+                entry["values"].update(values.astype(str).tolist())
+                if len(entry["values"]) > MAX_CATEGORIES:
+                    entry["values"] = None
+
+    columns = {}
+    for name, entry in totals.items():
+        stats: dict[str, Any] = {"count": entry["count"]}
+        if entry["numeric"] and entry["n"]:
+            stats.update(mean=entry["mean"],
+                         std=(entry["m2"] / entry["n"]) ** 0.5,
+                         min=entry["min"], max=entry["max"])
+        if entry["values"] is not None:
+            stats["values"] = dict(entry["values"].most_common())
+        columns[str(name)] = stats
+    return {"rows": rows, "columns": columns}
+
+
+class FileIndexCache:
+    """Build file indexes on first use and keep them in `cache_dir`."""
+
+    def __init__(self, cache_dir: str | Path) -> None:
+        """Use `cache_dir` for index files, creating it if needed."""
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._memory: dict[tuple[str, str], Any] = {}
+
+    def _cached(self, path: Path, kind: str, suffix: str,
+                build: Callable[[Path], T],
+                save: Callable[[Path, T], None],
+                load: Callable[[Path], T]) -> tuple[T, bool]:
+        """Return `(value, cache_hit)` for one index of one file version."""
+        key = (cache_key(path), kind)
+        if key in self._memory:
+            value: T = self._memory[key]
+            return value, True
+        cache_file = self.cache_dir / f"{key[0]}.{kind}{suffix}"
+        hit = cache_file.exists()
+        if hit:
+            value = load(cache_file)
+            # Keeps the file from being removed as unused
+            cache_file.touch()
+        else:
+            value = build(path)
+            # Concurrent builders each write their own file, last one wins
+            partial = cache_file.with_name(
+                f"{cache_file.name}.{uuid.uuid4().hex}.partial")
+            save(partial, value)
+            partial.replace(cache_file)
+        self._memory[key] = value
+        return value, hit
+
+    def line_offsets(self, path: Path) -> tuple[NDArray[np.int64], bool]:
+        """Return the line start offsets of `path` and whether cached."""
+        def save(target: Path, offsets: NDArray[np.int64]) -> None:
+            with target.open("wb") as f:
+                np.save(f, offsets)
+
+        return self._cached(path, "lines", ".npy", _line_offsets, save,
+                            lambda source: np.load(source, mmap_mode="r"))
+
+    def entries(self, path: Path) -> tuple[list[IndexEntry], bool]:
+        """Return the searchable entries of `path` and whether cached."""
+        def build(source: Path) -> list[IndexEntry]:
+            if source.suffix == ".usda":
+                return _usda_entries(source)
+            if source.suffix == ".csv":
+                return _csv_entries(source)
+            return []
+
+        def save(target: Path, entries: list[IndexEntry]) -> None:
+            target.write_text(json.dumps([asdict(e) for e in entries]))
+
+        def load(source: Path) -> list[IndexEntry]:
+            return [IndexEntry(**e) for e in json.loads(source.read_text())]
+
+        return self._cached(path, "entries", ".json", build, save, load)
+
+    def csv_stats(self, path: Path) -> tuple[dict[str, Any], bool]:
+        """Return per-column statistics of a CSV file and whether cached."""
+        def save(target: Path, stats: dict[str, Any]) -> None:
+            target.write_text(json.dumps(stats))
+
+        def load(source: Path) -> dict[str, Any]:
+            stats: dict[str, Any] = json.loads(source.read_text())
+            return stats
+
+        return self._cached(path, "column_stats", ".json", _csv_stats, save,
+                            load)
+
+    def read_lines(self, path: Path, start: int, count: int
+                   ) -> tuple[str, int, bool]:
+        """Read `count` lines from 1-based line `start`.
+
+        Returns the text, the total number of lines and whether the line
+        index came from the cache.
+        """
+        offsets, hit = self.line_offsets(path)
+        total = len(offsets)
+        if start > total:
+            return "", total, hit
+        begin = int(offsets[start - 1])
+        end_line = start - 1 + count
+        with path.open("rb") as f:
+            f.seek(begin)
+            if end_line < total:
+                data = f.read(int(offsets[end_line]) - begin)
+            else:
+                data = f.read()
+        return data.decode("utf-8", errors="replace"), total, hit
@@ -0,0 +1,215 @@
+"""Scene graph analytics over the CSR arrays of `utils.scene_graph_store`.
+
+Counts are bincounts over label and relationship codes, components come
+from scipy's sparse graph routines, and traversals expand whole BFS
+frontiers with array operations instead of visiting nodes one by one.
+Graph queries treat relationships as undirected: `chair_1 below table_0`
+connects both objects, and paths report each edge in its stored direction.
+"""
+
+from typing import Any
+
+import numpy as np
+from numpy.typing import NDArray
+from scipy.sparse import csr_matrix  # type: ignore[import-untyped]
+from scipy.sparse.csgraph import (  # type: ignore[import-untyped]
+    connected_components,
+)
+
+from utils.scene_graph_store import SceneGraphArrays
+
+Edge = tuple[str, str, str]
+
+
+def _gather(indptr: NDArray[np.int64], frontier: NDArray[np.int64]
+            ) -> tuple[NDArray[np.int64], NDArray[np.int64]]:
+    """Return the CSR edge positions of all frontier nodes and their owner."""
+    starts = indptr[frontier]
+    lengths = indptr[frontier + 1] - starts
+    owners = np.repeat(frontier, lengths)
+    # Position within each node's slice, offset by the slice start
+    offsets = np.arange(lengths.sum()) - np.repeat(
+        np.cumsum(lengths) - lengths, lengths)
+    return np.repeat(starts, lengths) + offsets, owners
+
+
+class GraphAnalytics:
+    """Queries over one scene graph; reverse adjacency is built on demand."""
+
+    def __init__(self, arrays: SceneGraphArrays) -> None:
+        """Wrap loaded or converted scene graph arrays."""
+        self.arrays = arrays
+        self.index = {name: i for i, name in enumerate(arrays.node_names)}
+        self._sources: NDArray[np.int64] | None = None
+        self._reverse: tuple[NDArray[np.int64], NDArray[np.int64],
+                             NDArray[np.int64]] | None = None
+
+    def _node(self, name: str) -> int:
+        if name not in self.index:
+            raise KeyError(f"Unknown object: {name}")
+        return self.index[name]
+
+    @property
+    def sources(self) -> NDArray[np.int64]:
+        """Source node of every edge, the COO companion of `indices`."""
+        if self._sources is None:
+            self._sources = self.arrays.sources()
+        return self._sources
+
+    @property
+    def reverse(self) -> tuple[NDArray[np.int64], NDArray[np.int64],
+                               NDArray[np.int64]]:
+        """Incoming edges as CSR: `(indptr, sources, edge positions)`."""
+        if self._reverse is None:
+            arrays = self.arrays
+            order = np.argsort(arrays.indices, kind="stable")
+            indptr = np.zeros(arrays.number_of_nodes + 1, dtype=np.int64)
+            np.cumsum(np.bincount(arrays.indices,
+                                  minlength=arrays.number_of_nodes),
+                      out=indptr[1:])
+            self._reverse = (indptr, self.sources[order],
+                             order.astype(np.int64))
+        return self._reverse
+
+    def degree(self) -> NDArray[np.int64]:
+        """Return in-degree plus out-degree of every node."""
+        degree: NDArray[np.int64] = self.arrays.degree()
+        return degree
+
+    def connected_components(self) -> tuple[int, NDArray[np.int32]]:
+        """Return the number of weak components and each node's component."""
+        n_nodes = self.arrays.number_of_nodes
+        if n_nodes == 0:
+            return 0, np.zeros(0, dtype=np.int32)
+        adjacency = csr_matrix(
+            (np.ones(self.arrays.number_of_edges, dtype=np.int8),
+             self.arrays.indices, self.arrays.indptr),
+            shape=(n_nodes, n_nodes))
+        count, labels = connected_components(adjacency, directed=True,
+                                             connection="weak")
+        return int(count), labels
+
+    def summary(self) -> dict[str, Any]:
+        """Return the result of `analyze_scene_graph` for this graph."""
+        arrays = self.arrays
+        n_nodes, n_edges = arrays.number_of_nodes, arrays.number_of_edges
+        label_counts = np.bincount(arrays.label_codes,
+                                   minlength=len(arrays.labels))
+        edge_counts = np.bincount(arrays.edge_codes,
+                                  minlength=len(arrays.relationship_types))
+        return {
+            "node_count": n_nodes,
+            "edge_count": n_edges,
+            "semantic_distribution": {
+                label: int(count)
+                for label, count in zip(arrays.labels, label_counts)},
+            "relationship_types": {
+                rel: int(count)
+                for rel, count in zip(arrays.relationship_types,
+                                      edge_counts)},
+            "connected_components": self.connected_components()[0],
+            "avg_degree": (int(self.degree().sum()) / n_nodes
+                           if n_nodes > 0 else 0),
+        }
+
+    def _expand(self, frontier: NDArray[np.int64]
+                ) -> tuple[NDArray[np.int64], NDArray[np.int64],
+                           NDArray[np.int64]]:
+        """Return neighbours, the frontier node reached from, and edge ids."""
+        out_edges, out_owners = _gather(self.arrays.indptr, frontier)
+        in_indptr, in_sources, in_positions = self.reverse
+        in_slots, in_owners = _gather(in_indptr, frontier)
+        neighbours = np.concatenate([
+            self.arrays.indices[out_edges].astype(np.int64),
+            in_sources[in_slots]])
+        owners = np.concatenate([out_owners, in_owners])
+        edges = np.concatenate([out_edges, in_positions[in_slots]])
+        return neighbours, owners, edges
+
+    def k_hop(self, name: str, hops: int) -> dict[str, int]:
+        """Return every object within `hops` relationships and its distance."""
+        distance = np.full(self.arrays.number_of_nodes, -1, dtype=np.int64)
+        start = self._node(name)
+        distance[start] = 0
+        frontier = np.array([start], dtype=np.int64)
+        for hop in range(1, hops + 1):
+            neighbours = self._expand(frontier)[0]
+            frontier = np.unique(neighbours[distance[neighbours] < 0])
+            if len(frontier) == 0:
+                break
+            distance[frontier] = hop
+        reached = np.flatnonzero(distance > 0)
+        return {self.arrays.node_names[i]: int(distance[i]) for i in reached}
+
+    def shortest_path(self, source: str, target: str) -> list[Edge] | None:
+        """Return the relationships on a shortest path, or None.
+
+        Each edge is a `(source, relationship, target)` triple in its
+        stored direction, ordered from `source` to `target`. The search
+        runs from both ends and always expands the smaller frontier, so
+        only the neighbourhoods of the two objects are visited.
+        """
+        start, goal = self._node(source), self._node(target)
+        n_nodes = self.arrays.number_of_nodes
+        # parent[side][node] is the node it was reached from, -1 if unseen
+        parent = np.full((2, n_nodes), -1, dtype=np.int64)
+        parent_edge = np.full((2, n_nodes), -1, dtype=np.int64)
+        parent[0, start], parent[1, goal] = start, goal
+        frontiers = [np.array([start], dtype=np.int64),
+                     np.array([goal], dtype=np.int64)]
+        meeting = start if start == goal else -1
+        while meeting < 0 and len(frontiers[0]) and len(frontiers[1]):
+            side = 0 if len(frontiers[0]) <= len(frontiers[1]) else 1
+            neighbours, owners, edges = self._expand(frontiers[side])
+            new = parent[side, neighbours] < 0
+            # Keep the first edge that reaches each new node
+            neighbours, first = np.unique(neighbours[new],
+                                          return_index=True)
+            parent[side, neighbours] = owners[new][first]
+            parent_edge[side, neighbours] = edges[new][first]
+            frontiers[side] = neighbours
+            met = neighbours[parent[1 - side, neighbours] >= 0]
+            if len(met):
+                meeting = int(met[0])
+        if meeting < 0:
+            return None
+
+        path = self._trace(parent[0], parent_edge[0], meeting, start)[::-1]
+        return path + self._trace(parent[1], parent_edge[1], meeting, goal)
+
+    def _trace(self, parent: NDArray[np.int64],
+               parent_edge: NDArray[np.int64], node: int,
+               root: int) -> list[Edge]:
+        """Follow parent links from `node` back to `root`."""
+        names = self.arrays.node_names
+        path = []
+        while node != root:
+            edge = parent_edge[node]
+            path.append((names[self.sources[edge]],
+                         self.arrays.relationship_types[
+                             self.arrays.edge_codes[edge]],
+                         names[self.arrays.indices[edge]]))
+            node = int(parent[node])
+        return path
+
+    def label_relationship_matrix(self) -> NDArray[np.int64]:
+        """Count relationships per source label, target label and type.
+
+        Entry `[i, j, r]` counts edges from objects labelled `labels[i]` to
+        objects labelled `labels[j]` with `relationship_types[r]`.
+        """
+        arrays = self.arrays
+        n_labels = len(arrays.labels)
+        n_types = len(arrays.relationship_types)
+        codes = ((arrays.label_codes[self.sources].astype(np.int64)
+                  * n_labels + arrays.label_codes[arrays.indices]) * n_types
+                 + arrays.edge_codes)
+        return np.bincount(codes, minlength=n_labels * n_labels * n_types
+                           ).reshape(n_labels, n_labels, n_types)
+
+    def label_relationships(self) -> list[tuple[Any, str, Any, int]]:
+        """Return non-zero `(label, relationship, label, count)` entries."""
+        matrix = self.label_relationship_matrix()
+        return [(self.arrays.labels[i], self.arrays.relationship_types[r],
+                 self.arrays.labels[j], int(matrix[i, j, r]))
+                for i, j, r in zip(*np.nonzero(matrix))]
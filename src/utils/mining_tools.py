@@ -1,88 +1,174 @@
-"""Mining-specific tools for the geodata chatbot agent."""
-
-import random
-
-from langchain_core.tools import tool
-
-
-@tool
-def analyze_ore_composition() -> str:
-    """Analyze the mineral composition at a specific location in the mine."""
-    ore_types = ["Iron Ore", "Copper", "Gold", "Silver", "Coal", "Limestone"]
-    purity = random.uniform(45.0, 95.0)
-    ore_type = random.choice(ore_types)
-    return (f"{ore_type} detected with "
-            f"{purity:.1f}% purity")
-
-
-@tool
-def measure_tunnel_stability() -> str:
-    """Measure structural stability of mine tunnels."""
-    stability_score = random.uniform(65.0, 98.0)
-    risk_level = "LOW" if stability_score > 85 else "MEDIUM" if (
-            stability_score > 70) else "HIGH"
-    return (f"Stability score {stability_score:.1f}% "
-            f"- Risk level: {risk_level}")
-
-
-@tool
-def detect_gas_levels() -> str:
-    """Monitor dangerous gas concentrations in mining areas."""
-    gases = {
-        "Methane": random.uniform(0.1, 2.5),
-        "Carbon Monoxide": random.uniform(0.05, 1.2),
-        "Hydrogen Sulfide": random.uniform(0.01, 0.8)
-    }
-    status = "SAFE" if all(
-        level < 1.0 for level in gases.values()) else "CAUTION"
-    gas_readings = ", ".join(
-        [f"{gas}: {level:.2f}ppm" for gas, level in gases.items()])
-    return f"Gas levels: {gas_readings} - Status: {status}"
-
-
-@tool
-def calculate_ore_reserves() -> str:
-    """Estimate remaining ore reserves in different mine sections."""
-    sections = ["North Wing", "South Wing", "Deep Shaft", "Main Vein"]
-    reserves = {}
-    total_reserves = 0
-
-    for section in sections:
-        reserve_amount = random.uniform(1500, 8500)  # tons
-        reserves[section] = reserve_amount
-        total_reserves += reserve_amount
-
-    section_details = ", ".join([f"{section}: {amount:.0f} tons"
-                                for section, amount in reserves.items()])
-    return (f"Estimated ore reserves - {section_details}. "
-            f"Total: {total_reserves:.0f} tons")
-
-
-@tool
-def monitor_equipment_status() -> str:
-    """Check operational status of mining equipment."""
-    equipment = {
-        "Excavator-A": random.choice(["OPERATIONAL", "MAINTENANCE", "OFFLINE"]),
-        "Conveyor-1": random.choice(["OPERATIONAL", "SLOW", "STOPPED"]),
-        "Drill-B": random.choice(["OPERATIONAL", "MAINTENANCE", "OPERATIONAL"]),
-        "Ventilation": random.choice(["OPERATIONAL", "REDUCED", "OPERATIONAL"]),
-        "Water Pump": random.choice(["OPERATIONAL", "MAINTENANCE", "OPERATIONAL"])
-    }
-
-    operational_count = sum(1 for status in equipment.values() if status == "OPERATIONAL")
-    total_count = len(equipment)
-
-    equipment_details = ", ".join([f"{name}: {status}"
-                                  for name, status in equipment.items()])
-    return (f"Equipment status - {equipment_details}. "
-            f"Operational: {operational_count}/{total_count}")
-
-
-# List of all mining tools for easy import
-MINING_TOOLS = [
-    analyze_ore_composition,
-    measure_tunnel_stability,
-    detect_gas_levels,
-    calculate_ore_reserves,
-    monitor_equipment_status
-]
\ No newline at end of file
+"""Mining-specific tools for the geodata chatbot agent.
+
+The tools measure the mine scan itself: tunnel cross-sections along a
+path, occupied volume per labelled section and statistics of a region.
+They read the point cloud through `utils.point_cache`, whose tile and
+voxel aggregates keep every call proportional to the region it asks
+about rather than to the size of the scan. Tunnel tools look up the
+centreline network and cross-sections precomputed by
+`utils.tunnel_network`.
+"""
+
+from collections.abc import Callable
+from typing import Any
+
+from langchain_core.tools import BaseTool, tool
+
+from utils.point_cache import PointCache, parse_box
+from utils.tunnel_network import MAX_STATIONS, TunnelNetwork, tunnel_profile
+
+
+def make_mining_tools(open_cache: Callable[[], tuple[PointCache, bool]]
+                      ) -> list[BaseTool]:
+    """Create mining tools over the point cloud returned by `open_cache`.
+
+    `open_cache` returns the cache and whether it already existed; it is
+    called on every tool call, so the scan is only converted when a tool
+    first needs it.
+    """
+
+    @tool(response_format="content_and_artifact")
+    def measure_tunnel_cross_sections(
+            path: str, spacing: float = 5.0, half_width: float = 6.0,
+            label: str = "") -> tuple[str, dict[str, bool]]:
+        """Measure tunnel cross-section area, width and height along a path.
+
+        Args:
+            path: Tunnel path as "x,y[,z];x,y[,z];..." in scan coordinates;
+                without z the section spans the whole scan height.
+            spacing: Distance in metres between measured sections.
+            half_width: Largest distance in metres from the path to a
+                tunnel wall; points further away are ignored.
+            label: Only use points with this label, e.g. the wall label.
+        """
+        cache, hit = open_cache()
+        sections = tunnel_profile(cache, path, spacing, half_width,
+                                  label or None)
+        lines = [f"chainage {s.chainage:.1f} m at ({s.station[0]:.1f}, "
+                 f"{s.station[1]:.1f}): area {s.area:.2f} m2, width "
+                 f"{s.width:.2f} m, height {s.height:.2f} m, "
+                 f"{s.point_count} points" for s in sections]
+        if len(sections) == MAX_STATIONS:
+            lines.append(f"Stopped after {MAX_STATIONS} sections; "
+                         f"use a larger spacing.")
+        return "\n".join(lines) or "The path is empty.", {"cache_hit": hit}
+
+    @tool(response_format="content_and_artifact")
+    def estimate_section_volumes(box: str = "") -> tuple[str,
+                                                         dict[str, bool]]:
+        """Estimate the volume occupied by each labelled section in m3.
+
+        Volumes count the voxels that hold scan points, so they measure
+        scanned surfaces and material, not the air inside tunnels.
+
+        Args:
+            box: Only count inside "xmin,ymin,zmin,xmax,ymax,zmax";
+                the whole scan if empty.
+        """
+        cache, hit = open_cache()
+        volumes = cache.occupied_volume(parse_box(box))
+        lines = [f"{label}: {volume:.1f} m3"
+                 for label, volume in sorted(volumes.items(),
+                                             key=lambda item: -item[1])]
+        lines.append(f"Total: {sum(volumes.values()):.1f} m3 at "
+                     f"{cache.meta['voxel_size']:.2f} m voxels")
+        return "\n".join(lines), {"cache_hit": hit}
+
+    @tool(response_format="content_and_artifact")
+    def summarize_region(box: str) -> tuple[str, dict[str, bool]]:
+        """Summarise a region: points, labels, extent, density and volume.
+
+        Args:
+            box: Region as "xmin,ymin,zmin,xmax,ymax,zmax".
+        """
+        cache, hit = open_cache()
+        region = parse_box(box)
+        if region is None:
+            low, high = cache.meta["bounds"]
+            region = (*low, *high)
+        counts = cache.label_counts(region)
+        total = sum(counts.values())
+        if total == 0:
+            return "No points in this region.", {"cache_hit": hit}
+        bounds = cache.bounds(box=region)
+        volumes = cache.occupied_volume(region)
+        lines = [f"{total} points, {cache.density(region):.1f} per m3"]
+        if bounds is not None:
+            low, high = bounds
+            lines.append(f"extent ({low[0]:.1f}, {low[1]:.1f}, "
+                         f"{low[2]:.1f}) to ({high[0]:.1f}, {high[1]:.1f}, "
+                         f"{high[2]:.1f})")
+        lines += [f"{label}: {count} points ({100 * count / total:.1f}%), "
+                  f"{volumes.get(label, 0.0):.1f} m3"
+                  for label, count in sorted(counts.items(),
+                                             key=lambda item: -item[1])]
+        return "\n".join(lines), {"cache_hit": hit}
+
+    return [measure_tunnel_cross_sections, estimate_section_volumes,
+            summarize_region]
+
+
+def _format_section(row: dict[str, Any]) -> str:
+    return (f"branch {row['branch']} chainage {row['chainage']:.1f} m at "
+            f"({row['x']:.1f}, {row['y']:.1f}, {row['z']:.1f}): area "
+            f"{row['area']:.2f} m2, width {row['width']:.2f} m, height "
+            f"{row['height']:.2f} m, deviation {row['deviation']:+.2f} m")
+
+
+def make_tunnel_tools(open_network: Callable[[], tuple[TunnelNetwork, bool]]
+                      ) -> list[BaseTool]:
+    """Create tools over the precomputed tunnel network.
+
+    `open_network` returns the network and whether it was already built,
+    building it on first use.
+    """
+
+    @tool(response_format="content_and_artifact")
+    def list_tunnel_branches() -> tuple[str, dict[str, bool]]:
+        """List tunnel branches with their length and end points.
+
+        Branch 1 is the longest; chainages run from a branch's start.
+        """
+        network, hit = open_network()
+        lines = [f"branch {row['id']}: {row['length']:.1f} m from "
+                 f"({row['start_x']:.1f}, {row['start_y']:.1f}) to "
+                 f"({row['end_x']:.1f}, {row['end_y']:.1f})"
+                 for row in network.branches()]
+        return "\n".join(lines) or "No tunnels found.", {"cache_hit": hit}
+
+    @tool(response_format="content_and_artifact")
+    def find_tunnel_extremes(metric: str = "width", largest: bool = False,
+                             limit: int = 5, branch: int = 0
+                             ) -> tuple[str, dict[str, bool]]:
+        """Find where the tunnels are narrowest, lowest, widest and so on.
+
+        Args:
+            metric: area, width, height or deviation (offset of the
+                tunnel centre from the centreline).
+            largest: Return the largest instead of the smallest values;
+                deviations compare by magnitude.
+            limit: Number of sections, at most 20.
+            branch: Only this branch; all branches if 0.
+        """
+        network, hit = open_network()
+        rows = network.extremes(metric, largest, min(max(limit, 1), 20),
+                                branch or None)
+        return ("\n".join(_format_section(row) for row in rows)
+                or "No sections found.", {"cache_hit": hit})
+
+    @tool(response_format="content_and_artifact")
+    def tunnel_section_at(chainage: float, branch: int = 1
+                          ) -> tuple[str, dict[str, bool]]:
+        """Return the clearance of a tunnel at a chainage.
+
+        Args:
+            chainage: Distance in metres from the start of the branch.
+            branch: Branch number as listed by list_tunnel_branches.
+        """
+        network, hit = open_network()
+        row = network.section_at(chainage, branch)
+        if row is None:
+            return f"Branch {branch} has no sections.", {"cache_hit": hit}
+        return _format_section(row), {"cache_hit": hit}
+
+    return [list_tunnel_branches, find_tunnel_extremes, tunnel_section_at]
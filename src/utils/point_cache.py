@@ -0,0 +1,445 @@
+"""Columnar point cloud cache with per-label and spatial tile aggregates.
+
+A point cloud CSV is converted once into a cache directory holding one
+`.npy` column per coordinate and a label code column, all memory-mapped
+on load. Points are sorted by the XY tile they fall into, so the points
+of a tile are one contiguous slice, and the cache stores per tile and
+label point counts, per tile and label occupied voxel counts, and per
+label counts, bounds and height histograms. Voxels subdivide tiles, so
+no voxel is shared by two tiles.
+
+Queries over the whole cloud or one label are answered from these
+aggregates alone. Queries restricted to a box add up the aggregates of
+tiles the box covers completely and scan only the points of tiles on its
+boundary, so their cost depends on the box, not on the size of the cloud.
+"""
+
+import json
+import shutil
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import pandas as pd
+from numpy.typing import NDArray
+
+from utils.file_index import LABEL_COLUMNS, cache_key, csv_delimiter
+
+CSV_CHUNK_ROWS = 1_000_000
+# Tiles per side of the XY bounds; the points of a tile are one slice
+TILES_PER_AXIS = 64
+# Target voxel edge in metres for occupancy volumes; voxels evenly
+# subdivide tiles, so the actual edge is within a factor of two of it
+VOXEL_SIZE = 0.5
+MAX_VOXELS_PER_TILE = 64
+HEIGHT_BINS = 20
+MAX_BINS = 100
+UNLABELLED = "unlabelled"
+
+Box = tuple[float, float, float, float, float, float]
+
+
+def parse_box(box: str) -> Box | None:
+    """Parse "xmin,ymin,zmin,xmax,ymax,zmax" into a box, None if empty.
+
+    Raises:
+        ValueError: If the box does not have six numbers.
+    """
+    if not box.strip():
+        return None
+    values = [float(value) for value in box.split(",")]
+    if len(values) != 6:
+        raise ValueError("A box needs six numbers: xmin,ymin,zmin,xmax,"
+                         "ymax,zmax")
+    return (values[0], values[1], values[2], values[3], values[4], values[5])
+
+
+def _label_text(value: Any) -> str:
+    """Return a label value as text, writing 3.0 as 3."""
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def _ranges(starts: NDArray[np.int64], lengths: NDArray[np.int64]
+            ) -> NDArray[np.int64]:
+    """Concatenate `arange(start, start + length)` for every pair."""
+    offsets = np.arange(lengths.sum()) - np.repeat(
+        np.cumsum(lengths) - lengths, lengths)
+    return np.repeat(starts, lengths) + offsets
+
+
+def _voxel_keys(coords: NDArray[np.float64], codes: NDArray[np.int32],
+                grid: dict[str, Any]) -> NDArray[np.int64]:
+    """Return a key per point that is unique per tile, label and voxel.
+
+    `key // voxels_per_key` is the `tile * n_labels + label` index of
+    the tile label aggregates.
+    """
+    low = np.asarray(grid["bounds"][0])
+    tile_size, voxel_size = grid["tile_size"], grid["voxel_size"]
+    shape = np.asarray(grid["tile_shape"])
+    cells = np.minimum(((coords[:, :2] - low[:2]) / tile_size).astype(
+        np.int64), shape - 1)
+    per_tile = grid["voxels_per_tile"]
+    local = np.clip(((coords[:, :2] - low[:2] - cells * tile_size)
+                     / voxel_size).astype(np.int64), 0, per_tile - 1)
+    layers = np.clip(((coords[:, 2] - low[2]) / voxel_size).astype(
+        np.int64), 0, grid["voxel_layers"] - 1)
+    tiles = cells[:, 0] * shape[1] + cells[:, 1]
+    voxel = (local[:, 0] * per_tile + local[:, 1]) * grid[
+        "voxel_layers"] + layers
+    slot = tiles * len(grid["labels"]) + codes
+    return np.asarray(slot * _voxels_per_key(grid) + voxel, dtype=np.int64)
+
+
+def _voxels_per_key(grid: dict[str, Any]) -> int:
+    return int(grid["voxels_per_tile"] ** 2 * grid["voxel_layers"])
+
+
+def _read_columns(csv_path: Path) -> tuple[NDArray[np.float64],
+                                           list[str], NDArray[np.int32]]:
+    """Read coordinates and label codes from a CSV file in chunks."""
+    coords, codes = [], []
+    vocabulary: dict[str, int] = {}
+    for chunk in pd.read_csv(csv_path, sep=csv_delimiter(csv_path),
+                             chunksize=CSV_CHUNK_ROWS):
+        names = {str(name).lower(): name for name in chunk.columns}
+        missing = [axis for axis in "xyz" if axis not in names]
+        if missing:
+            raise ValueError(f"{csv_path.name} has no {', '.join(missing)} "
+                             f"coordinate column")
+        coords.append(chunk[[names[axis] for axis in "xyz"]]
+                      .to_numpy(dtype=np.float64))
+        label = next((names[name] for name in LABEL_COLUMNS
+                      if name in names), None)
+        values = (chunk[label].map(_label_text) if label is not None
+                  else pd.Series(UNLABELLED, index=chunk.index))
+        uniques, inverse = np.unique(values.to_numpy(dtype=str),
+                                     return_inverse=True)
+        mapping = np.array([vocabulary.setdefault(value, len(vocabulary))
+                            for value in uniques.tolist()], dtype=np.int32)
+        codes.append(mapping[inverse.reshape(-1)])
+    if not coords:
+        return np.zeros((0, 3)), [], np.zeros(0, dtype=np.int32)
+    return np.concatenate(coords), list(vocabulary), np.concatenate(codes)
+
+
+def build_point_cache(csv_path: str | Path, target: str | Path) -> None:
+    """Convert a point cloud CSV into a cache directory at `target`.
+
+    The directory is written under a temporary name and renamed into
+    place, so readers never see a partial cache.
+
+    Raises:
+        ValueError: If the CSV has no x, y and z columns.
+    """
+    csv_path, target = Path(csv_path), Path(target)
+    coords, labels, codes = _read_columns(csv_path)
+    n_labels = len(labels)
+    low = coords.min(axis=0) if len(coords) else np.zeros(3)
+    high = coords.max(axis=0) if len(coords) else np.zeros(3)
+    tile_size = max(float((high[:2] - low[:2]).max()) / TILES_PER_AXIS,
+                    1e-9)
+    shape = np.minimum(
+        np.floor((high[:2] - low[:2]) / tile_size).astype(np.int64) + 1,
+        TILES_PER_AXIS)
+    cells = np.minimum(((coords[:, :2] - low[:2]) / tile_size).astype(
+        np.int64), shape - 1)
+    tiles = cells[:, 0] * shape[1] + cells[:, 1]
+    order = np.argsort(tiles, kind="stable")
+    coords, codes, tiles = coords[order], codes[order], tiles[order]
+    n_tiles = int(shape.prod())
+
+    tile_indptr = np.zeros(n_tiles + 1, dtype=np.int64)
+    np.cumsum(np.bincount(tiles, minlength=n_tiles), out=tile_indptr[1:])
+    tile_label_counts = np.bincount(
+        tiles * n_labels + codes, minlength=n_tiles * n_labels
+    ).reshape(n_tiles, n_labels)
+    # Height range per tile decides whether a box covers the whole tile
+    tile_z = np.full((n_tiles, 2), np.nan)
+    if len(coords):
+        starts = tile_indptr[:-1][np.diff(tile_indptr) > 0]
+        tile_z[tiles[starts], 0] = np.minimum.reduceat(coords[:, 2], starts)
+        tile_z[tiles[starts], 1] = np.maximum.reduceat(coords[:, 2], starts)
+
+    label_counts = np.bincount(codes, minlength=n_labels)
+    z_edges = np.linspace(low[2], max(high[2], low[2] + 1e-9),
+                          HEIGHT_BINS + 1)
+    z_bins = np.clip(np.searchsorted(z_edges, coords[:, 2], side="right")
+                     - 1, 0, HEIGHT_BINS - 1)
+    height = np.bincount(codes * HEIGHT_BINS + z_bins,
+                         minlength=n_labels * HEIGHT_BINS
+                         ).reshape(n_labels, HEIGHT_BINS)
+    label_bounds = []
+    for code in range(n_labels):
+        points = coords[codes == code]
+        label_bounds.append([points.min(axis=0).tolist(),
+                             points.max(axis=0).tolist()])
+
+    voxels_per_tile = int(np.clip(round(tile_size / VOXEL_SIZE), 1,
+                                  MAX_VOXELS_PER_TILE))
+    voxel_size = tile_size / voxels_per_tile
+    meta = {
+        "source": csv_path.name,
+        "labels": labels,
+        "label_counts": label_counts.tolist(),
+        "label_bounds": label_bounds,
+        "bounds": [low.tolist(), high.tolist()],
+        "tile_origin": low[:2].tolist(),
+        "tile_size": tile_size,
+        "tile_shape": shape.tolist(),
+        "height_edges": z_edges.tolist(),
+        "voxels_per_tile": voxels_per_tile,
+        "voxel_size": voxel_size,
+        "voxel_layers": int((high[2] - low[2]) / voxel_size) + 1,
+    }
+    occupied = np.unique(_voxel_keys(coords, codes, meta))
+    tile_label_voxels = np.bincount(
+        occupied // _voxels_per_key(meta), minlength=n_tiles * n_labels
+    ).reshape(n_tiles, n_labels)
+
+    staging = target.with_name(f"{target.name}.{uuid.uuid4().hex}.partial")
+    staging.mkdir(parents=True)
+    try:
+        arrays = {"x": coords[:, 0], "y": coords[:, 1], "z": coords[:, 2],
+                  "label_codes": codes, "tile_indptr": tile_indptr,
+                  "tile_label_counts": tile_label_counts, "tile_z": tile_z,
+                  "height_histogram": height,
+                  "tile_label_voxels": tile_label_voxels}
+        for name, values in arrays.items():
+            np.save(staging / f"{name}.npy", np.ascontiguousarray(values))
+        (staging / "meta.json").write_text(json.dumps(meta))
+        try:
+            staging.rename(target)
+        except OSError:
+            # Another process built the same cache first
+            if not target.is_dir():
+                raise
+    finally:
+        if staging.exists():
+            shutil.rmtree(staging, ignore_errors=True)
+
+
+@dataclass
+class _Selection:
+    """Points of a box: covered tiles plus matching boundary points."""
+
+    full_tiles: NDArray[np.int64]
+    points: NDArray[np.int64]
+
+
+class PointCache:
+    """Memory-mapped point columns and aggregates of one point cloud."""
+
+    def __init__(self, path: str | Path) -> None:
+        """Map the cache directory written by `build_point_cache`."""
+        self.path = Path(path)
+        self.meta: dict[str, Any] = json.loads(
+            (self.path / "meta.json").read_text())
+        self.labels: list[str] = self.meta["labels"]
+        self._arrays: dict[str, NDArray[Any]] = {}
+
+    def _array(self, name: str) -> NDArray[Any]:
+        if name not in self._arrays:
+            self._arrays[name] = np.load(self.path / f"{name}.npy",
+                                         mmap_mode="r")
+        return self._arrays[name]
+
+    def column(self, name: str) -> NDArray[Any]:
+        """Return the memory-mapped `x`, `y`, `z` or `label_codes` column.
+
+        Points are in tile order, not in the order of the source file.
+        """
+        if name not in ("x", "y", "z", "label_codes"):
+            raise KeyError(f"Unknown column {name}")
+        return self._array(name)
+
+    @property
+    def number_of_points(self) -> int:
+        """Number of points in the cloud."""
+        return int(sum(self.meta["label_counts"]))
+
+    def _code(self, label: str | None) -> int | None:
+        if label is None:
+            return None
+        if label not in self.labels:
+            raise KeyError(f"Unknown label {label}; labels are "
+                           f"{', '.join(self.labels)}")
+        return self.labels.index(label)
+
+    def _coords(self, points: NDArray[np.int64]) -> NDArray[np.float64]:
+        return np.column_stack([self._array(axis)[points] for axis in "xyz"])
+
+    def _select(self, box: Box) -> _Selection:
+        """Split the tiles overlapping `box` into covered and boundary."""
+        low, high = np.asarray(box[:3]), np.asarray(box[3:])
+        origin = np.asarray(self.meta["tile_origin"])
+        size = self.meta["tile_size"]
+        shape = np.asarray(self.meta["tile_shape"])
+        if (low > high).any():
+            empty = np.zeros(0, dtype=np.int64)
+            return _Selection(empty, empty)
+        first = np.clip(np.floor((low[:2] - origin) / size), 0, shape - 1
+                        ).astype(np.int64)
+        last = np.clip(np.floor((high[:2] - origin) / size), 0, shape - 1
+                       ).astype(np.int64)
+        grid_x, grid_y = np.meshgrid(np.arange(first[0], last[0] + 1),
+                                     np.arange(first[1], last[1] + 1),
+                                     indexing="ij")
+        ix, iy = grid_x.ravel(), grid_y.ravel()
+        tiles = ix * shape[1] + iy
+        tile_z = self._array("tile_z")[tiles]
+        covered = ((origin[0] + ix * size >= low[0])
+                   & (origin[0] + (ix + 1) * size <= high[0])
+                   & (origin[1] + iy * size >= low[1])
+                   & (origin[1] + (iy + 1) * size <= high[1])
+                   # Empty tiles have a NaN height range and add nothing
+                   & ~(tile_z[:, 0] < low[2]) & ~(tile_z[:, 1] > high[2]))
+        indptr = self._array("tile_indptr")
+        boundary = tiles[~covered]
+        candidates = _ranges(indptr[boundary], indptr[boundary + 1]
+                             - indptr[boundary])
+        coords = self._coords(candidates)
+        inside = ((coords >= low) & (coords <= high)).all(axis=1)
+        return _Selection(tiles[covered], candidates[inside])
+
+    def _points(self, selection: _Selection) -> NDArray[np.int64]:
+        """Return every point index of a selection."""
+        indptr = self._array("tile_indptr")
+        tiles = selection.full_tiles
+        covered = _ranges(indptr[tiles], indptr[tiles + 1] - indptr[tiles])
+        return np.concatenate([covered, selection.points])
+
+    def label_counts(self, box: Box | None = None) -> dict[str, int]:
+        """Return the number of points per label, inside `box` if given."""
+        if box is None:
+            counts = np.asarray(self.meta["label_counts"])
+        else:
+            selection = self._select(box)
+            counts = self._array("tile_label_counts")[
+                selection.full_tiles].sum(axis=0) + np.bincount(
+                self._array("label_codes")[selection.points],
+                minlength=len(self.labels))
+        return {label: int(count) for label, count in zip(self.labels, counts)
+                if count}
+
+    def count(self, label: str | None = None, box: Box | None = None) -> int:
+        """Return the number of points, optionally of one label and box."""
+        counts = self.label_counts(box)
+        if label is None:
+            return sum(counts.values())
+        self._code(label)
+        return counts.get(label, 0)
+
+    def bounds(self, label: str | None = None, box: Box | None = None
+               ) -> tuple[list[float], list[float]] | None:
+        """Return the min and max corner of the points, None if empty."""
+        code = self._code(label)
+        if box is None:
+            if code is None:
+                low, high = self.meta["bounds"]
+            else:
+                low, high = self.meta["label_bounds"][code]
+            return (low, high) if self.count(label) else None
+        coords = self.points(box, label)
+        if len(coords) == 0:
+            return None
+        return coords.min(axis=0).tolist(), coords.max(axis=0).tolist()
+
+    def points(self, box: Box, label: str | None = None
+               ) -> NDArray[np.float64]:
+        """Return the coordinates of the points inside `box`."""
+        code = self._code(label)
+        points = self._points(self._select(box))
+        if code is not None:
+            points = points[self._array("label_codes")[points] == code]
+        return self._coords(points)
+
+    def occupied_volume(self, box: Box | None = None) -> dict[str, float]:
+        """Return the volume of voxels holding points, per label, in m3.
+
+        A voxel on the boundary of `box` counts when any of its points
+        lies inside the box.
+        """
+        n_labels = len(self.labels)
+        voxels = self._array("tile_label_voxels")
+        if box is None:
+            counts = voxels.sum(axis=0)
+        else:
+            selection = self._select(box)
+            boundary = np.unique(_voxel_keys(
+                self._coords(selection.points),
+                self._array("label_codes")[selection.points], self.meta))
+            counts = voxels[selection.full_tiles].sum(axis=0) + np.bincount(
+                boundary // _voxels_per_key(self.meta) % n_labels,
+                minlength=n_labels)
+        cell = self.meta["voxel_size"] ** 3
+        return {label: float(count) * cell
+                for label, count in zip(self.labels, counts) if count}
+
+    def density(self, box: Box, label: str | None = None) -> float:
+        """Return points per cubic metre inside `box`."""
+        volume = float(np.prod(np.asarray(box[3:]) - np.asarray(box[:3])))
+        return self.count(label, box) / volume if volume > 0 else 0.0
+
+    def height_profile(self, bins: int = HEIGHT_BINS,
+                       label: str | None = None, box: Box | None = None
+                       ) -> list[tuple[float, float, int]]:
+        """Return `(z_low, z_high, points)` for height slices of the cloud.
+
+        Without a box and with the default number of bins the profile is
+        read from the stored per-label histograms.
+        """
+        code = self._code(label)
+        bins = min(max(bins, 1), MAX_BINS)
+        if box is None and bins == HEIGHT_BINS:
+            edges = np.asarray(self.meta["height_edges"])
+            histogram = self._array("height_histogram")
+            counts = (histogram.sum(axis=0) if code is None
+                      else histogram[code])
+        else:
+            if box is None:
+                codes = self._array("label_codes")
+                points = (np.arange(len(codes)) if code is None
+                          else np.flatnonzero(codes == code))
+                low, high = self.meta["bounds"]
+            else:
+                points = self._points(self._select(box))
+                if code is not None:
+                    points = points[
+                        self._array("label_codes")[points] == code]
+                low, high = box[:3], box[3:]
+            edges = np.linspace(low[2], max(high[2], low[2] + 1e-9),
+                                bins + 1)
+            counts = np.histogram(self._array("z")[points], bins=edges)[0]
+        return [(float(edges[i]), float(edges[i + 1]), int(count))
+                for i, count in enumerate(counts)]
+
+
+class PointCacheStore:
+    """Build point caches on first use and keep them in `cache_dir`."""
+
+    def __init__(self, cache_dir: str | Path) -> None:
+        """Use `cache_dir` for point caches, creating it if needed."""
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._open: dict[str, PointCache] = {}
+
+    def open(self, csv_path: str | Path) -> tuple[PointCache, bool]:
+        """Return the cache of a CSV file and whether it already existed."""
+        csv_path = Path(csv_path)
+        key = cache_key(csv_path)
+        if key in self._open:
+            return self._open[key], True
+        target = self.cache_dir / f"{key}.points"
+        hit = target.is_dir()
+        if hit:
+            # Keeps the cache from being removed as unused
+            target.touch()
+        else:
+            build_point_cache(csv_path, target)
+        self._open[key] = PointCache(target)
+        return self._open[key], hit
@@ -0,0 +1,75 @@
+"""Prompt assembly that keeps the cacheable prefix byte-identical.
+
+Providers cache the longest prompt prefix they have seen before and bill
+cached tokens at a fraction of the price and latency. A prefix only hits
+if every byte up to that point is the same, so prompts are assembled in
+order of how often their parts change:
+
+1. static instructions, the same for every scene and session;
+2. a scene digest, the same for every session on one version of a scene;
+3. the conversation, with tool calls and their results.
+
+Scene content is normalised (line endings, trailing whitespace) and files
+are listed in name order, so the same scene version always gives the
+same bytes. Nothing that varies per turn belongs in the first two parts.
+"""
+
+import functools
+import hashlib
+from collections.abc import Mapping, Sequence
+from dataclasses import dataclass
+from pathlib import Path
+
+from langchain_core.messages import BaseMessage, SystemMessage
+
+SCENE_HEADER = "# Scene"
+
+
+def normalize_text(text: str) -> str:
+    """Return `text` with LF line endings and no trailing whitespace."""
+    lines = text.replace("\r\n", "\n").replace("\r", "\n").split("\n")
+    return "\n".join(line.rstrip() for line in lines).strip("\n") + "\n"
+
+
+def scene_digest(files: Mapping[str, str]) -> str:
+    """Render scene files as one section per file, in name order."""
+    return "\n".join(f"## {name}\n{normalize_text(files[name])}"
+                     for name in sorted(files))
+
+
+@functools.lru_cache(maxsize=16)
+def workspace_digest(path: Path) -> str:
+    """List the files of a workspace with their sizes, in name order.
+
+    Workspaces are content addressed, so the digest of a path never
+    changes and is computed once.
+    """
+    lines = [f"- {entry.name} ({entry.stat().st_size} bytes)"
+             for entry in sorted(Path(path).iterdir())
+             if entry.is_file()]
+    return "## Workspace files\n" + "\n".join(lines) + "\n"
+
+
+@dataclass(frozen=True)
+class PromptPrefix:
+    """Static instructions followed by the digest of one scene version."""
+
+    instructions: str
+    scene: str = ""
+
+    def text(self) -> str:
+        """Return the prefix as sent to the provider."""
+        text = normalize_text(self.instructions)
+        if self.scene:
+            text += f"\n{SCENE_HEADER}\n\n{self.scene}"
+        return text
+
+    @property
+    def cache_key(self) -> str:
+        """Short hash of the prefix, e.g. for a provider's cache routing."""
+        return hashlib.sha256(self.text().encode("utf-8")).hexdigest()[:16]
+
+    def messages(self, conversation: Sequence[BaseMessage]
+                 ) -> list[BaseMessage]:
+        """Return the prefix as a system message followed by `conversation`."""
+        return [SystemMessage(self.text()), *conversation]
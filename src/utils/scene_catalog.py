@@ -0,0 +1,318 @@
+"""SQLite catalogue of processed scenes for cross-scene queries.
+
+Every scene gets one row with its object and relationship counts and
+bounds, plus one row per object and per label and relationship type, so
+questions like "which rooms have more than 10 chairs" are a single
+indexed lookup instead of opening every USD file:
+
+    python -m utils.scene_catalog --catalog scenes.db scan DATA
+    python -m utils.scene_catalog find chair --min-count 10
+
+Scenes are added by the pipeline as they are processed, or by scanning a
+directory. Scans only re-read files whose size or modification time
+changed and drop scenes whose files were deleted.
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from collections import Counter
+from collections.abc import Iterable
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scenes (
+    id INTEGER PRIMARY KEY, name TEXT, path TEXT UNIQUE, mtime_ns INTEGER,
+    size INTEGER, indexed_at REAL, object_count INTEGER,
+    relationship_count INTEGER, min_x REAL, min_y REAL, min_z REAL,
+    max_x REAL, max_y REAL, max_z REAL);
+CREATE TABLE IF NOT EXISTS objects (
+    scene_id INTEGER, name TEXT, label TEXT, cx REAL, cy REAL, cz REAL,
+    min_x REAL, min_y REAL, min_z REAL, max_x REAL, max_y REAL, max_z REAL,
+    volume REAL, point_count INTEGER);
+CREATE TABLE IF NOT EXISTS scene_labels (
+    scene_id INTEGER, label TEXT, count INTEGER,
+    PRIMARY KEY (scene_id, label));
+CREATE TABLE IF NOT EXISTS scene_relationships (
+    scene_id INTEGER, relationship TEXT, count INTEGER,
+    PRIMARY KEY (scene_id, relationship));
+CREATE INDEX IF NOT EXISTS objects_scene ON objects (scene_id);
+CREATE INDEX IF NOT EXISTS objects_label ON objects (label COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS scene_labels_count
+    ON scene_labels (label COLLATE NOCASE, count);
+"""
+SCENE_SUFFIXES = (".usda", ".usdc")
+# Point payload layers written next to .usdc scenes are not scenes
+PAYLOAD_SUFFIX = "_geometry.usdc"
+
+Bounds = tuple[float, float, float]
+
+
+@dataclass(frozen=True)
+class CatalogObject:
+    """One object of a scene as stored in the catalogue."""
+
+    name: str
+    label: str
+    centroid: Bounds
+    volume: float
+    point_count: int
+    bounds_min: Bounds | None = None
+    bounds_max: Bounds | None = None
+
+
+class SceneCatalog:
+    """Index of scenes and their objects in one SQLite database."""
+
+    def __init__(self, path: str | Path) -> None:
+        """Open or create the catalogue at `path`."""
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        # Agent tools run in worker threads; access is serialised by _lock
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._db.executescript(SCHEMA)
+
+    def close(self) -> None:
+        """Close the database connection once running queries finish."""
+        with self._lock:
+            self._db.close()
+
+    def _file_state(self, path: Path) -> tuple[int | None, int | None]:
+        if not path.exists():
+            return None, None
+        stat = path.stat()
+        return stat.st_mtime_ns, stat.st_size
+
+    def is_current(self, path: str | Path) -> bool:
+        """Whether `path` is indexed and unchanged since it was indexed."""
+        path = Path(path).resolve()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT mtime_ns, size FROM scenes WHERE path = ?",
+                (str(path),)).fetchone()
+        return row is not None and tuple(row) == self._file_state(path)
+
+    def record_scene(self, path: str | Path, objects: Iterable[CatalogObject],
+                     relationship_counts: dict[str, int],
+                     name: str | None = None) -> None:
+        """Add a scene or replace its previous entry."""
+        path = Path(path).resolve()
+        objects = list(objects)
+        mtime_ns, size = self._file_state(path)
+        lows = [obj.bounds_min for obj in objects if obj.bounds_min]
+        highs = [obj.bounds_max for obj in objects if obj.bounds_max]
+        bounds: list[float | None] = [None] * 6
+        if lows and highs:
+            bounds = [min(low[axis] for low in lows) for axis in range(3)]
+            bounds += [max(high[axis] for high in highs)
+                       for axis in range(3)]
+
+        with self._lock, self._db:
+            self._delete(str(path))
+            scene_id = self._db.execute(
+                "INSERT INTO scenes (name, path, mtime_ns, size, indexed_at, "
+                "object_count, relationship_count, min_x, min_y, min_z, "
+                "max_x, max_y, max_z) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (name or path.stem, str(path), mtime_ns, size, time.time(),
+                 len(objects), sum(relationship_counts.values()), *bounds),
+            ).lastrowid
+            self._db.executemany(
+                "INSERT INTO objects VALUES "
+                "(?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(scene_id, obj.name, obj.label, *obj.centroid,
+                  *(obj.bounds_min or (None,) * 3),
+                  *(obj.bounds_max or (None,) * 3),
+                  obj.volume, obj.point_count) for obj in objects])
+            self._db.executemany(
+                "INSERT INTO scene_labels VALUES (?, ?, ?)",
+                [(scene_id, label, count) for label, count in
+                 Counter(obj.label for obj in objects).items()])
+            self._db.executemany(
+                "INSERT INTO scene_relationships VALUES (?, ?, ?)",
+                [(scene_id, rel, count)
+                 for rel, count in relationship_counts.items()])
+
+    def _delete(self, path: str) -> None:
+        row = self._db.execute("SELECT id FROM scenes WHERE path = ?",
+                               (path,)).fetchone()
+        if row is None:
+            return
+        for table in ("objects", "scene_labels", "scene_relationships"):
+            self._db.execute(f"DELETE FROM {table} WHERE scene_id = ?",
+                             (row["id"],))
+        self._db.execute("DELETE FROM scenes WHERE id = ?", (row["id"],))
+
+    def remove_scene(self, path: str | Path) -> None:
+        """Drop a scene and its objects from the catalogue."""
+        with self._lock, self._db:
+            self._delete(str(Path(path).resolve()))
+
+    def index_scene_file(self, path: str | Path, force: bool = False) -> bool:
+        """Index a USD scene unless it is unchanged; return True if indexed.
+
+        Relationship counts come from the `_graph.sgraph` file next to the
+        scene when the pipeline wrote one, otherwise from the USD file.
+        """
+        # Imported here so catalogue queries do not need the USD libraries
+        from utils.scene_reader import SceneReader
+
+        path = Path(path).resolve()
+        if not force and self.is_current(path):
+            return False
+        reader = SceneReader(str(path))
+        objects = []
+        for obj in reader.objects:
+            extent = reader.extent(obj.name)
+            objects.append(CatalogObject(
+                name=obj.name, label=obj.semantic_label,
+                centroid=obj.centroid, volume=obj.volume,
+                point_count=obj.point_count,
+                bounds_min=None if extent is None else (
+                    float(extent[0][0]), float(extent[0][1]),
+                    float(extent[0][2])),
+                bounds_max=None if extent is None else (
+                    float(extent[1][0]), float(extent[1][1]),
+                    float(extent[1][2]))))
+        graph_path = path.with_name(path.stem + "_graph.sgraph")
+        if graph_path.exists():
+            from utils.scene_graph_store import load_scene_graph
+
+            graph = load_scene_graph(graph_path)
+            counts = Counter(
+                graph.relationship_types[code]
+                for code in graph.edge_codes.tolist())
+        else:
+            counts = Counter(rel for _, rel, _ in reader.relationships())
+        self.record_scene(path, objects, dict(counts))
+        return True
+
+    def scan(self, directory: str | Path) -> dict[str, int]:
+        """Index new and changed scenes below `directory`.
+
+        Scenes below `directory` whose files no longer exist are removed.
+        Files that cannot be read or parsed are counted as failed and do
+        not stop the scan. Returns the number of scenes indexed,
+        unchanged, unreadable and removed.
+        """
+        directory = Path(directory).resolve()
+        stats = {"indexed": 0, "unchanged": 0, "failed": 0, "removed": 0}
+        found = set()
+        for path in sorted(directory.rglob("*")):
+            if (path.suffix not in SCENE_SUFFIXES
+                    or path.name.endswith(PAYLOAD_SUFFIX)):
+                continue
+            found.add(str(path))
+            try:
+                indexed = self.index_scene_file(path)
+            except (ValueError, RuntimeError, OSError):
+                # USD reports corrupt layers as pxr.Tf.ErrorException, a
+                # RuntimeError
+                stats["failed"] += 1
+                continue
+            stats["indexed" if indexed else "unchanged"] += 1
+        with self._lock:
+            known = [row["path"] for row in self._db.execute(
+                "SELECT path FROM scenes WHERE path LIKE ?",
+                (str(directory) + os.sep + "%",))]
+        for path_str in known:
+            if path_str not in found:
+                self.remove_scene(path_str)
+                stats["removed"] += 1
+        return stats
+
+    def _query(self, sql: str, params: tuple[Any, ...] = ()
+               ) -> list[dict[str, Any]]:
+        with self._lock:
+            return [dict(row) for row in self._db.execute(sql, params)]
+
+    def scenes(self) -> list[dict[str, Any]]:
+        """Return every scene with its object and relationship counts."""
+        return self._query(
+            "SELECT name, path, object_count, relationship_count, min_x, "
+            "min_y, min_z, max_x, max_y, max_z FROM scenes ORDER BY name")
+
+    def label_totals(self) -> list[dict[str, Any]]:
+        """Return per label the number of objects and of scenes."""
+        return self._query(
+            "SELECT label, SUM(count) AS objects, COUNT(*) AS scenes "
+            "FROM scene_labels GROUP BY label ORDER BY objects DESC")
+
+    def find_scenes(self, label: str, min_count: int = 1,
+                    max_count: int | None = None) -> list[dict[str, Any]]:
+        """Return scenes with between min_count and max_count `label`s."""
+        sql = ("SELECT s.name, s.path, l.count FROM scene_labels l "
+               "JOIN scenes s ON s.id = l.scene_id "
+               "WHERE l.label = ? COLLATE NOCASE AND l.count >= ?")
+        params: tuple[Any, ...] = (label, min_count)
+        if max_count is not None:
+            sql += " AND l.count <= ?"
+            params += (max_count,)
+        if min_count <= 0:
+            # Scenes without the label have no scene_labels row
+            sql += (" UNION SELECT name, path, 0 FROM scenes WHERE id NOT IN "
+                    "(SELECT scene_id FROM scene_labels "
+                    "WHERE label = ? COLLATE NOCASE)")
+            params += (label,)
+        return self._query(sql + " ORDER BY count DESC, name", params)
+
+    def find_objects(self, label: str | None = None,
+                     scene: str | None = None,
+                     min_volume: float | None = None,
+                     max_volume: float | None = None,
+                     limit: int = 50) -> list[dict[str, Any]]:
+        """Return objects matching all given filters, largest first."""
+        clauses, params = [], []
+        for clause, value in (("o.label = ? COLLATE NOCASE", label),
+                              ("s.name = ?", scene),
+                              ("o.volume >= ?", min_volume),
+                              ("o.volume <= ?", max_volume)):
+            if value is not None:
+                clauses.append(clause)
+                params.append(value)
+        where = f"WHERE {' AND '.join(clauses)} " if clauses else ""
+        return self._query(
+            "SELECT s.name AS scene, o.name, o.label, o.cx, o.cy, o.cz, "
+            "o.volume, o.point_count FROM objects o "
+            f"JOIN scenes s ON s.id = o.scene_id {where}"
+            "ORDER BY o.volume DESC LIMIT ?", (*params, limit))
+
+
+def main() -> None:
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Index and query scenes.")
+    parser.add_argument("--catalog", type=Path, default=Path("scenes.db"))
+    commands = parser.add_subparsers(dest="command", required=True)
+    scan_parser = commands.add_parser(
+        "scan", help="index new and changed USD scenes in a directory")
+    scan_parser.add_argument("directory", type=Path)
+    commands.add_parser("scenes", help="list indexed scenes")
+    find_parser = commands.add_parser(
+        "find", help="scenes by number of objects with a label")
+    find_parser.add_argument("label")
+    find_parser.add_argument("--min-count", type=int, default=1)
+    find_parser.add_argument("--max-count", type=int)
+    args = parser.parse_args()
+
+    catalog = SceneCatalog(args.catalog)
+    result: Any
+    if args.command == "scan":
+        result = catalog.scan(args.directory)
+    elif args.command == "scenes":
+        result = catalog.scenes()
+    else:
+        result = catalog.find_scenes(args.label, args.min_count,
+                                     args.max_count)
+    catalog.close()
+    sys.stdout.write(json.dumps(result, indent=2) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+"""Compact binary storage for pipeline scene graphs.
+
+The pipeline builds a `networkx.DiGraph` whose nodes are objects and whose
+edges are spatial relationships. This module stores it as flat arrays: CSR
+adjacency (`indptr`, `indices`), one relationship code per edge and one
+column per node attribute. Files are laid out so every array can be mapped
+straight from disk:
+
+    magic (8 bytes) | header length (uint64) | JSON header | arrays
+
+The JSON header holds node names, the label and relationship vocabularies
+and the dtype, shape and offset of every array. Arrays start on 64-byte
+boundaries. `load_scene_graph` maps the file read-only and returns views
+into it, so reloading a graph with 100k edges takes milliseconds and
+nothing is copied until it is touched.
+"""
+
+import json
+import mmap
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import networkx as nx  # type: ignore[import-untyped]
+import numpy as np
+from numpy.typing import NDArray
+
+MAGIC = b"SCNGRPH1"
+ALIGNMENT = 64
+# Numeric node attributes written by the pipeline, stored as float64 columns
+FEATURE_COLUMNS = ("volume", "surface_area", "compactness", "height",
+                   "point_density")
+
+
+@dataclass
+class SceneGraphArrays:
+    """Scene graph as CSR adjacency plus node attribute columns.
+
+    Edges of node `i` are `indices[indptr[i]:indptr[i + 1]]`, in the order
+    they were added to the networkx graph. `label_codes` and `edge_codes`
+    index into `labels` and `relationship_types`.
+    """
+
+    node_names: list[str]
+    labels: list[Any]
+    relationship_types: list[str]
+    indptr: NDArray[np.int64]
+    indices: NDArray[np.int32]
+    edge_codes: NDArray[np.uint8]
+    label_codes: NDArray[np.int32]
+    centroids: NDArray[np.float64]
+    point_counts: NDArray[np.int64]
+    features: dict[str, NDArray[np.float64]]
+
+    @property
+    def number_of_nodes(self) -> int:
+        """Number of objects in the graph."""
+        return len(self.node_names)
+
+    @property
+    def number_of_edges(self) -> int:
+        """Number of relationships in the graph."""
+        return len(self.indices)
+
+    def sources(self) -> NDArray[np.int64]:
+        """Return the source node index of every edge."""
+        return np.repeat(np.arange(self.number_of_nodes, dtype=np.int64),
+                         np.diff(self.indptr))
+
+    def degree(self) -> NDArray[np.int64]:
+        """Return in-degree plus out-degree of every node."""
+        return np.diff(self.indptr) + np.bincount(
+            self.indices, minlength=self.number_of_nodes)
+
+    def edges(self) -> list[tuple[str, str, str]]:
+        """Return `(source, target, relationship)` triples by name."""
+        names = self.node_names
+        return [(names[s], names[t], self.relationship_types[code])
+                for s, t, code in zip(self.sources().tolist(),
+                                      self.indices.tolist(),
+                                      self.edge_codes.tolist())]
+
+
+def _plain(value: Any) -> Any:
+    """Convert numpy scalars to their Python equivalent for JSON."""
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def _vocabulary(values: list[Any]) -> tuple[list[Any], NDArray[np.int32]]:
+    """Return the distinct values in first-seen order and their codes."""
+    index: dict[Any, int] = {}
+    codes = np.fromiter((index.setdefault(value, len(index))
+                         for value in values), dtype=np.int32,
+                        count=len(values))
+    return list(index), codes
+
+
+def from_networkx(graph: nx.DiGraph) -> SceneGraphArrays:
+    """Convert a pipeline scene graph to arrays."""
+    names = list(graph.nodes)
+    position = {name: i for i, name in enumerate(names)}
+    nodes = [graph.nodes[name] for name in names]
+
+    labels, label_codes = _vocabulary(
+        [_plain(data.get("semantic_label", "unknown")) for data in nodes])
+
+    targets, types = [], []
+    indptr = np.zeros(len(names) + 1, dtype=np.int64)
+    for i, name in enumerate(names):
+        for target, data in graph.adj[name].items():
+            targets.append(position[target])
+            types.append(str(data.get("relationship", "unknown")))
+        indptr[i + 1] = len(targets)
+    relationship_types, edge_codes = _vocabulary(types)
+    if len(relationship_types) > np.iinfo(np.uint8).max:
+        raise ValueError("Too many relationship types for uint8 codes")
+
+    return SceneGraphArrays(
+        node_names=[str(name) for name in names],
+        labels=labels,
+        relationship_types=relationship_types,
+        indptr=indptr,
+        indices=np.asarray(targets, dtype=np.int32),
+        edge_codes=edge_codes.astype(np.uint8),
+        label_codes=label_codes,
+        centroids=np.asarray(
+            [data.get("centroid", (0.0, 0.0, 0.0)) for data in nodes],
+            dtype=np.float64).reshape(len(names), 3),
+        point_counts=np.asarray(
+            [data.get("point_count", 0) for data in nodes], dtype=np.int64),
+        features={column: np.asarray(
+            [data.get(column, 0.0) for data in nodes], dtype=np.float64)
+            for column in FEATURE_COLUMNS},
+    )
+
+
+def to_networkx(arrays: SceneGraphArrays) -> nx.DiGraph:
+    """Rebuild the networkx graph, e.g. for code that still needs one."""
+    graph = nx.DiGraph()
+    for i, name in enumerate(arrays.node_names):
+        graph.add_node(
+            name,
+            semantic_label=arrays.labels[arrays.label_codes[i]],
+            centroid=arrays.centroids[i].tolist(),
+            point_count=int(arrays.point_counts[i]),
+            **{column: float(values[i])
+               for column, values in arrays.features.items()})
+    graph.add_edges_from((source, target, {"relationship": rel})
+                         for source, target, rel in arrays.edges())
+    return graph
+
+
+def _columns(arrays: SceneGraphArrays) -> dict[str, NDArray[Any]]:
+    columns: dict[str, NDArray[Any]] = {
+        "indptr": arrays.indptr,
+        "indices": arrays.indices,
+        "edge_codes": arrays.edge_codes,
+        "label_codes": arrays.label_codes,
+        "centroids": arrays.centroids,
+        "point_counts": arrays.point_counts,
+    }
+    columns.update({f"feature:{name}": values
+                    for name, values in arrays.features.items()})
+    return columns
+
+
+def _aligned(offset: int) -> int:
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def save_scene_graph(graph: SceneGraphArrays | nx.DiGraph,
+                     path: str | Path) -> None:
+    """Write a scene graph, given as networkx graph or arrays, to `path`."""
+    arrays = graph if isinstance(graph, SceneGraphArrays) else from_networkx(
+        graph)
+    columns = {name: np.ascontiguousarray(values)
+               for name, values in _columns(arrays).items()}
+
+    # Offsets are relative to the end of the header, which is padded so
+    # the first array is aligned in the file as well.
+    layout: dict[str, tuple[str, list[int], int]] = {}
+    offset = 0
+    for name, values in columns.items():
+        offset = _aligned(offset)
+        layout[name] = (values.dtype.str, list(values.shape), offset)
+        offset += values.nbytes
+    header = json.dumps({
+        "node_names": arrays.node_names,
+        "labels": [_plain(label) for label in arrays.labels],
+        "relationship_types": arrays.relationship_types,
+        "arrays": layout,
+    }).encode()
+    prefix = len(MAGIC) + 8
+    header += b" " * (_aligned(prefix + len(header)) - prefix - len(header))
+
+    with open(path, "wb") as f:
+        f.write(MAGIC)
+        f.write(np.uint64(len(header)).tobytes())
+        f.write(header)
+        data_start = f.tell()
+        for name, values in columns.items():
+            f.write(b"\0" * (data_start + layout[name][2] - f.tell()))
+            f.write(values.tobytes())
+
+
+def load_scene_graph(path: str | Path,
+                     use_mmap: bool = True) -> SceneGraphArrays:
+    """Load a scene graph written by `save_scene_graph`.
+
+    With `use_mmap` the arrays are read-only views into the mapped file;
+    otherwise the file is read into memory first.
+
+    Raises:
+        ValueError: If `path` is not a scene graph file.
+    """
+    with open(path, "rb") as f:
+        buffer: Any
+        if use_mmap:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            buffer = f.read()
+    if buffer[:len(MAGIC)] != MAGIC:
+        raise ValueError(f"Not a scene graph file: {path}")
+    header_end = len(MAGIC) + 8
+    header_length = int(np.frombuffer(buffer, np.uint64, 1, len(MAGIC))[0])
+    header = json.loads(bytes(buffer[header_end:header_end + header_length]))
+    data_start = header_end + header_length
+
+    columns = {
+        name: np.ndarray(tuple(shape), dtype=np.dtype(dtype), buffer=buffer,
+                         offset=data_start + offset)
+        for name, (dtype, shape, offset) in header["arrays"].items()
+    }
+    return SceneGraphArrays(
+        node_names=header["node_names"],
+        labels=header["labels"],
+        relationship_types=header["relationship_types"],
+        indptr=columns["indptr"],
+        indices=columns["indices"],
+        edge_codes=columns["edge_codes"],
+        label_codes=columns["label_codes"],
+        centroids=columns["centroids"],
+        point_counts=columns["point_counts"],
+        features={name.split(":", 1)[1]: values
+                  for name, values in columns.items()
+                  if name.startswith("feature:")},
+    )
+
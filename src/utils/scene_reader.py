@@ -0,0 +1,173 @@
+"""Lazy access to USD scenes written by the geo_service pipeline.
+
+Scenes are opened with `Usd.Stage.LoadNone`, so only the prim hierarchy
+and object metadata are read. Scenes exported as `.usdc` keep each
+object's points in a payload, which is loaded the first time a geometry
+query asks for it. The most recently used payloads stay loaded, and
+older ones are unloaded again to bound memory.
+
+Older `.usda` scenes with placeholder cubes are read as well: their
+metadata comes from prim custom data, and they have no point data.
+"""
+
+import re
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+
+import numpy as np
+from numpy.typing import NDArray
+from pxr import Sdf, Usd, UsdGeom  # type: ignore[import-untyped]
+
+GEOMETRY_PATH = "/Scene/Geometry"
+RELATIONSHIP_NAMESPACE = "spatial"
+# Sample relationships stored as custom data by the placeholder-cube export
+_LEGACY_RELATIONSHIP = re.compile(r"^(\S+) -> (\S+) \((\w+)\)$")
+
+
+@dataclass(frozen=True)
+class SceneObject:
+    """Metadata of one scene object, available without loading points."""
+
+    name: str
+    semantic_label: str
+    centroid: tuple[float, float, float]
+    volume: float
+    point_count: int
+    has_points: bool
+
+
+class SceneReader:
+    """Read object metadata eagerly and object points on demand."""
+
+    def __init__(self, path: str, max_loaded: int = 32) -> None:
+        """Open the scene at `path` without loading any payloads.
+
+        Args:
+            path: USD scene file.
+            max_loaded: Number of object payloads kept loaded at once.
+        """
+        self.path = path
+        self.max_loaded = max_loaded
+        self.stage = Usd.Stage.Open(path, Usd.Stage.LoadNone)
+        if not self.stage:
+            raise ValueError(f"Cannot open USD scene: {path}")
+        self._loaded: OrderedDict[str, None] = OrderedDict()
+        self._objects = {obj.name: obj for obj in self._read_objects()}
+
+    def _object_prims(self) -> list[Usd.Prim]:
+        geometry = self.stage.GetPrimAtPath(GEOMETRY_PATH)
+        if not geometry:
+            return []
+        # Unloaded prims are excluded by the default traversal predicate
+        return list(geometry.GetAllChildren())
+
+    def _read_objects(self) -> list[SceneObject]:
+        objects = []
+        for prim in self._object_prims():
+            custom = prim.GetCustomData()
+            centroid = prim.GetAttribute("semantic:centroid").Get()
+            if centroid is None:
+                # Placeholder cubes are translated to the object centroid
+                centroid = prim.GetAttribute("xformOp:translate").Get()
+            x, y, z = centroid or (0.0, 0.0, 0.0)
+            objects.append(SceneObject(
+                name=prim.GetName(),
+                semantic_label=str(custom.get("semantic_label", "unknown")),
+                centroid=(float(x), float(y), float(z)),
+                volume=float(custom.get("volume", 0.0)),
+                point_count=int(custom.get("point_count", 0)),
+                has_points=prim.HasPayload(),
+            ))
+        return objects
+
+    @property
+    def objects(self) -> list[SceneObject]:
+        """All objects of the scene, in prim order."""
+        return list(self._objects.values())
+
+    @property
+    def loaded(self) -> list[str]:
+        """Names of objects whose points are loaded, least recent first."""
+        return list(self._loaded)
+
+    def get(self, name: str) -> SceneObject:
+        """Return the metadata of one object.
+
+        Raises:
+            KeyError: If the scene has no object called `name`.
+        """
+        if name not in self._objects:
+            raise KeyError(f"Unknown object: {name}")
+        return self._objects[name]
+
+    def points(self, name: str) -> NDArray[np.float32]:
+        """Return the points of one object, loading its payload if needed.
+
+        Raises:
+            KeyError: If the scene has no object called `name`.
+            ValueError: If the scene stores no points for the object.
+        """
+        if not self.get(name).has_points:
+            raise ValueError(f"Scene stores no points for {name}")
+        path = Sdf.Path(GEOMETRY_PATH).AppendChild(name)
+        if name in self._loaded:
+            self._loaded.move_to_end(name)
+        else:
+            self.stage.Load(path, Usd.LoadWithoutDescendants)
+            self._loaded[name] = None
+            while len(self._loaded) > self.max_loaded:
+                evicted, _ = self._loaded.popitem(last=False)
+                self.stage.Unload(
+                    Sdf.Path(GEOMETRY_PATH).AppendChild(evicted))
+        points = UsdGeom.Points(self.stage.GetPrimAtPath(path))
+        return np.asarray(points.GetPointsAttr().Get(), dtype=np.float32)
+
+    def extent(
+        self, name: str
+    ) -> tuple[NDArray[np.float32], NDArray[np.float32]] | None:
+        """Return the min and max corner of an object without loading it.
+
+        Returns None for objects without point data, whose placeholder
+        cubes have no meaningful extent.
+        """
+        if not self.get(name).has_points:
+            return None
+        prim = self.stage.GetPrimAtPath(
+            Sdf.Path(GEOMETRY_PATH).AppendChild(name))
+        extent = prim.GetAttribute("extent").Get()
+        if extent is None:
+            return None
+        corners = np.asarray(extent, dtype=np.float32)
+        return corners[0], corners[1]
+
+    def relationships(self) -> list[tuple[str, str, str]]:
+        """Return `(source, relationship, target)` triples of the scene.
+
+        Placeholder-cube scenes only store a sample of their relationships.
+        """
+        triples: list[tuple[str, str, str]] = []
+        prefix = RELATIONSHIP_NAMESPACE + ":"
+        for prim in self._object_prims():
+            for rel in prim.GetRelationships():
+                if not rel.GetName().startswith(prefix):
+                    continue
+                rel_type = rel.GetName()[len(prefix):]
+                triples.extend((prim.GetName(), rel_type, target.name)
+                               for target in rel.GetTargets())
+        if triples:
+            return triples
+        root = self.stage.GetPrimAtPath("/Scene")
+        custom = root.GetCustomData() if root else {}
+        for key, value in sorted(custom.items()):
+            match = _LEGACY_RELATIONSHIP.match(str(value))
+            if key.startswith("relationship_") and match:
+                source, target, rel_type = match.groups()
+                triples.append((source, rel_type, target))
+        return triples
+
+
+@lru_cache(maxsize=8)
+def open_scene(path: str) -> SceneReader:
+    """Return a shared reader for `path`, opening the scene once."""
+    return SceneReader(path)
@@ -0,0 +1,205 @@
+"""Agent tools answering scene questions from USD files in the workspace."""
+
+import os
+from collections.abc import Callable
+from functools import lru_cache
+
+import numpy as np
+from langchain_core.tools import BaseTool, tool
+
+from utils.graph_analytics import GraphAnalytics
+from utils.scene_catalog import SceneCatalog
+from utils.scene_graph_store import load_scene_graph
+from utils.scene_reader import open_scene
+
+
+@lru_cache(maxsize=8)
+def open_graph(scene_path: str) -> GraphAnalytics:
+    """Return analytics over the scene graph stored next to a USD scene.
+
+    Raises:
+        ValueError: If the pipeline wrote no scene graph for the scene.
+    """
+    graph_path = os.path.splitext(scene_path)[0] + "_graph.sgraph"
+    if not os.path.exists(graph_path):
+        raise ValueError(f"No scene graph stored for "
+                         f"{os.path.basename(scene_path)}")
+    return GraphAnalytics(load_scene_graph(graph_path))
+
+
+def make_scene_tools(root_dir: str | Callable[[], str]) -> list[BaseTool]:
+    """Create scene tools that resolve file names inside `root_dir`.
+
+    `root_dir` may be a function returning the directory, which is then
+    looked up on every call so the tools follow a refreshed workspace.
+    """
+
+    def resolve(scene_file: str) -> str:
+        root = root_dir() if callable(root_dir) else root_dir
+        path = os.path.realpath(os.path.join(root, scene_file))
+        if not path.startswith(os.path.realpath(root) + os.sep):
+            raise ValueError(f"{scene_file} is outside the workspace")
+        return path
+
+    @tool
+    def list_scene_objects(scene_file: str, semantic_label: str = "") -> str:
+        """List the objects of a USD scene with label, centroid and volume.
+
+        Args:
+            scene_file: USD file in the workspace, e.g. demo_scene_c.usda.
+            semantic_label: Only list objects with this label, e.g. chair.
+        """
+        reader = open_scene(resolve(scene_file))
+        lines = [
+            f"{obj.name}: {obj.semantic_label}, centroid "
+            f"({obj.centroid[0]:.2f}, {obj.centroid[1]:.2f}, "
+            f"{obj.centroid[2]:.2f}), volume {obj.volume:.2f} m3, "
+            f"{obj.point_count} points"
+            for obj in reader.objects
+            if not semantic_label or obj.semantic_label == semantic_label
+        ]
+        return "\n".join(lines) or "No matching objects."
+
+    @tool
+    def list_scene_relationships(scene_file: str, object_name: str = "") -> str:
+        """List spatial relationships between objects of a USD scene.
+
+        Args:
+            scene_file: USD file in the workspace.
+            object_name: Only list relationships involving this object.
+        """
+        reader = open_scene(resolve(scene_file))
+        lines = [
+            f"{source} {relationship} {target}"
+            for source, relationship, target in reader.relationships()
+            if not object_name or object_name in (source, target)
+        ]
+        return "\n".join(lines) or "No matching relationships."
+
+    @tool
+    def describe_object_geometry(scene_file: str, object_name: str) -> str:
+        """Measure an object from its points: bounds, size and spread.
+
+        Args:
+            scene_file: USD file in the workspace.
+            object_name: Object name as listed by list_scene_objects.
+        """
+        reader = open_scene(resolve(scene_file))
+        points = reader.points(object_name).astype(np.float64)
+        low, high = points.min(axis=0), points.max(axis=0)
+        spread = points.std(axis=0)
+        size = high - low
+        return (f"{object_name}: {len(points)} points, bounds "
+                f"{np.round(low, 2).tolist()} to {np.round(high, 2).tolist()}, "
+                f"size {size[0]:.2f} x {size[1]:.2f} x {size[2]:.2f} m, "
+                f"std {np.round(spread, 2).tolist()}")
+
+    @tool
+    def find_nearby_objects(scene_file: str, object_name: str,
+                            hops: int = 1) -> str:
+        """List objects within a number of relationship hops of an object.
+
+        Args:
+            scene_file: USD file in the workspace.
+            object_name: Object to start from.
+            hops: Maximum number of relationships between the objects.
+        """
+        reached = open_graph(resolve(scene_file)).k_hop(object_name, hops)
+        lines = [f"{name}: {distance} hop(s)"
+                 for name, distance in sorted(reached.items(),
+                                              key=lambda item: item[1])]
+        return "\n".join(lines) or f"No objects related to {object_name}."
+
+    @tool
+    def find_relationship_path(scene_file: str, source_object: str,
+                               target_object: str) -> str:
+        """Find the shortest chain of relationships between two objects.
+
+        Args:
+            scene_file: USD file in the workspace.
+            source_object: Object the chain starts at.
+            target_object: Object the chain ends at.
+        """
+        path = open_graph(resolve(scene_file)).shortest_path(
+            source_object, target_object)
+        if path is None:
+            return f"{source_object} and {target_object} are not related."
+        return "\n".join(f"{source} {relationship} {target}"
+                         for source, relationship, target in path)
+
+    @tool
+    def count_label_relationships(scene_file: str) -> str:
+        """Count relationships between semantic labels, e.g. chair near table.
+
+        Args:
+            scene_file: USD file in the workspace.
+        """
+        counts = open_graph(resolve(scene_file)).label_relationships()
+        return "\n".join(f"{source} {relationship} {target}: {count}"
+                         for source, relationship, target, count in counts)
+
+    return [list_scene_objects, list_scene_relationships,
+            describe_object_geometry, find_nearby_objects,
+            find_relationship_path, count_label_relationships]
+
+
+def make_catalog_tools(catalog: SceneCatalog | Callable[[], SceneCatalog]
+                       ) -> list[BaseTool]:
+    """Create tools answering questions across all catalogued scenes.
+
+    `catalog` may be a function returning the catalogue, which is then
+    looked up on every call so the tools follow a refreshed workspace.
+    """
+
+    def current() -> SceneCatalog:
+        return catalog() if callable(catalog) else catalog
+
+    @tool
+    def list_catalog_scenes() -> str:
+        """List all catalogued scenes with object and relationship counts."""
+        lines = [f"{scene['name']}: {scene['object_count']} objects, "
+                 f"{scene['relationship_count']} relationships"
+                 for scene in current().scenes()]
+        labels = ", ".join(f"{row['label']} {row['objects']}"
+                           for row in current().label_totals())
+        return "\n".join(lines + [f"Objects per label: {labels}"]
+                         ) if lines else "The catalogue is empty."
+
+    @tool
+    def find_scenes_with_label(label: str, min_count: int = 1,
+                               max_count: int | None = None) -> str:
+        """Find scenes by how many objects of a label they contain.
+
+        Args:
+            label: Semantic label, e.g. chair or table.
+            min_count: Minimum number of such objects, e.g. 11 for
+                "more than 10 chairs".
+            max_count: Maximum number of such objects, if any.
+        """
+        rows = current().find_scenes(label, min_count, max_count)
+        return "\n".join(f"{row['name']}: {row['count']} {label}"
+                         for row in rows) or "No matching scenes."
+
+    @tool
+    def find_catalog_objects(label: str = "", scene: str = "",
+                             min_volume: float | None = None,
+                             max_volume: float | None = None) -> str:
+        """Find objects across scenes by label, scene and volume in m3.
+
+        Args:
+            label: Only objects with this semantic label.
+            scene: Only objects of this scene, as listed by
+                list_catalog_scenes.
+            min_volume: Minimum bounding box volume.
+            max_volume: Maximum bounding box volume.
+        """
+        rows = current().find_objects(label or None, scene or None,
+                                    min_volume, max_volume)
+        return "\n".join(
+            f"{row['scene']}/{row['name']}: {row['label']}, centroid "
+            f"({row['cx']:.2f}, {row['cy']:.2f}, {row['cz']:.2f}), "
+            f"volume {row['volume']:.2f} m3" for row in rows
+        ) or "No matching objects."
+
+    return [list_catalog_scenes, find_scenes_with_label,
+            find_catalog_objects]
@@ -0,0 +1,467 @@
+"""Local tracing of agent turns, LLM calls and tool calls.
+
+Spans are appended to a JSONL file or a SQLite database, so latency
+hotspots in real conversations can be found without an external service:
+
+    TRACE_PATH=traces.jsonl langgraph dev
+    python -m utils.tracing summary traces.jsonl
+
+Every span has a `kind` (`turn`, `llm` or `tool`), a duration and kind
+specific attributes: prompt/completion tokens, prompt tokens served from
+the provider's prompt cache and time-to-first-token for LLM calls,
+argument/result sizes and cache hits for tool calls.
+"""
+
+import argparse
+import contextvars
+import json
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import LLMResult
+
+Span = dict[str, Any]
+
+_current_span: contextvars.ContextVar[Span | None] = contextvars.ContextVar(
+    "current_span", default=None)
+
+
+class TraceSink(ABC):
+    """Destination for finished spans."""
+
+    @abstractmethod
+    def write(self, span: Span) -> None:
+        """Persist one finished span."""
+
+    def close(self) -> None:
+        """Release any resources held by the sink."""
+
+
+class JsonlSink(TraceSink):
+    """Append spans as one JSON object per line."""
+
+    def __init__(self, path: str | Path) -> None:
+        """Open `path` for appending."""
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._file = self.path.open("a", encoding="utf-8")
+
+    def write(self, span: Span) -> None:
+        """Append the span and flush so crashes lose at most one line."""
+        line = json.dumps(span, default=str)
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+
+    def close(self) -> None:
+        """Close the underlying file."""
+        self._file.close()
+
+
+class SqliteSink(TraceSink):
+    """Store spans in a SQLite table for ad-hoc SQL queries."""
+
+    def __init__(self, path: str | Path) -> None:
+        """Open or create the database at `path`."""
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS spans ("
+            "trace_id TEXT, span_id TEXT PRIMARY KEY, parent_id TEXT, "
+            "kind TEXT, name TEXT, start REAL, duration_ms REAL, "
+            "status TEXT, error TEXT, attributes TEXT)")
+        self._db.execute(
+            "CREATE INDEX IF NOT EXISTS spans_trace ON spans (trace_id)")
+        self._db.commit()
+
+    def write(self, span: Span) -> None:
+        """Insert the span."""
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO spans VALUES "
+                "(?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (span["trace_id"], span["span_id"], span["parent_id"],
+                 span["kind"], span["name"], span["start"],
+                 span["duration_ms"], span["status"], span["error"],
+                 json.dumps(span["attributes"], default=str)))
+            self._db.commit()
+
+    def close(self) -> None:
+        """Close the database connection."""
+        self._db.close()
+
+
+def open_sink(path: str | Path) -> TraceSink:
+    """Open a SQLite sink for .db/.sqlite paths and a JSONL sink otherwise."""
+    if Path(path).suffix in (".db", ".sqlite", ".sqlite3"):
+        return SqliteSink(path)
+    return JsonlSink(path)
+
+
+def load_spans(path: str | Path) -> list[Span]:
+    """Read every span written to a JSONL or SQLite sink."""
+    path = Path(path)
+    if path.suffix in (".db", ".sqlite", ".sqlite3"):
+        db = sqlite3.connect(path)
+        db.row_factory = sqlite3.Row
+        try:
+            rows = db.execute("SELECT * FROM spans ORDER BY start").fetchall()
+        finally:
+            db.close()
+        return [dict(row) | {"attributes": json.loads(row["attributes"])}
+                for row in rows]
+    with path.open(encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+class Tracer:
+    """Create spans and hand them to a sink; a tracer without sink is a no-op."""
+
+    def __init__(self, sink: TraceSink | None = None) -> None:
+        """Create a tracer writing to `sink`."""
+        self.sink = sink
+
+    @property
+    def enabled(self) -> bool:
+        """Whether spans are recorded at all."""
+        return self.sink is not None
+
+    def record(self, kind: str, name: str, start: float, duration: float,
+               trace_id: str, span_id: str, parent_id: str | None,
+               attributes: dict[str, Any],
+               error: BaseException | None = None) -> None:
+        """Write a finished span; times are in seconds."""
+        if self.sink is None:
+            return
+        self.sink.write({
+            "trace_id": trace_id,
+            "span_id": span_id,
+            "parent_id": parent_id,
+            "kind": kind,
+            "name": name,
+            "start": start,
+            "duration_ms": duration * 1000,
+            "status": "error" if error else "ok",
+            "error": f"{type(error).__name__}: {error}" if error else None,
+            "attributes": attributes,
+        })
+
+    @contextmanager
+    def span(self, kind: str, name: str,
+             **attributes: Any) -> Iterator[dict[str, Any]]:
+        """Time the enclosed block as a span nested in the current one.
+
+        Yields the attribute dict, so callers can add results such as token
+        counts before the span is written.
+        """
+        parent = _current_span.get()
+        span_id = uuid.uuid4().hex
+        trace_id: str = parent["trace_id"] if parent else span_id
+        started_at = time.time()
+        token = _current_span.set({"span_id": span_id, "trace_id": trace_id})
+        start = time.perf_counter()
+        error: BaseException | None = None
+        try:
+            yield attributes
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            _current_span.reset(token)
+            self.record(kind, name, started_at,
+                        time.perf_counter() - start, trace_id, span_id,
+                        parent["span_id"] if parent else None,
+                        attributes, error)
+
+    def close(self) -> None:
+        """Close the sink."""
+        if self.sink is not None:
+            self.sink.close()
+
+
+def _size(value: Any) -> int:
+    """Return the size of a value in bytes once serialised."""
+    if isinstance(value, str):
+        return len(value.encode("utf-8"))
+    return len(json.dumps(value, default=str).encode("utf-8"))
+
+
+class TracingCallbackHandler(BaseCallbackHandler):
+    """Record LangChain/LangGraph runs as turn, LLM and tool spans.
+
+    The outermost run of a graph invocation becomes the `turn` span; LLM
+    and tool runs below it are recorded with the turn as their trace.
+    Tools report cache hits by returning an artifact with a `cache_hit`
+    key (`response_format="content_and_artifact"`).
+    """
+
+    def __init__(self, tracer: Tracer) -> None:
+        """Create a handler writing spans through `tracer`."""
+        self.tracer = tracer
+        self._runs: dict[UUID, dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def _start(self, run_id: UUID, parent_run_id: UUID | None, kind: str,
+               name: str, **attributes: Any) -> None:
+        with self._lock:
+            parent = self._runs.get(parent_run_id) if parent_run_id else None
+            # Chains are not written, so point at the nearest recorded span.
+            parent_id = None
+            if parent is not None:
+                parent_id = (parent["parent_id"] if parent["kind"] == "chain"
+                             else parent["span_id"])
+            self._runs[run_id] = {
+                "kind": kind,
+                "name": name,
+                "span_id": run_id.hex,
+                "trace_id": parent["trace_id"] if parent else run_id.hex,
+                "parent_id": parent_id,
+                "start": time.time(),
+                "clock": time.perf_counter(),
+                "attributes": attributes,
+            }
+
+    def _end(self, run_id: UUID, error: BaseException | None = None,
+             **attributes: Any) -> None:
+        with self._lock:
+            run = self._runs.pop(run_id, None)
+        # Intermediate graph nodes only propagate the trace id.
+        if run is None or run["kind"] == "chain":
+            return
+        run["attributes"].update(attributes)
+        self.tracer.record(run["kind"], run["name"], run["start"],
+                           time.perf_counter() - run["clock"],
+                           run["trace_id"], run_id.hex, run["parent_id"],
+                           run["attributes"], error)
+
+    def on_chain_start(self, serialized: dict[str, Any],
+                       inputs: dict[str, Any], *, run_id: UUID,
+                       parent_run_id: UUID | None = None,
+                       **kwargs: Any) -> None:
+        """Open a turn span for root runs; track nested chains."""
+        name = kwargs.get("name") or (serialized or {}).get("name", "chain")
+        kind = "turn" if parent_run_id is None else "chain"
+        self._start(run_id, parent_run_id, kind, str(name))
+
+    def on_chain_end(self, outputs: dict[str, Any], *, run_id: UUID,
+                     **kwargs: Any) -> None:
+        """Close the chain or turn span."""
+        self._end(run_id)
+
+    def on_chain_error(self, error: BaseException, *, run_id: UUID,
+                       **kwargs: Any) -> None:
+        """Close the chain or turn span with its error."""
+        self._end(run_id, error)
+
+    def on_chat_model_start(self, serialized: dict[str, Any],
+                            messages: list[list[BaseMessage]], *,
+                            run_id: UUID, parent_run_id: UUID | None = None,
+                            **kwargs: Any) -> None:
+        """Open an LLM span."""
+        metadata = kwargs.get("metadata") or {}
+        model = (metadata.get("ls_model_name") or
+                 (serialized or {}).get("name", "chat_model"))
+        prompt = messages[0] if messages else []
+        self._start(run_id, parent_run_id, "llm", str(model),
+                    prompt_messages=len(prompt),
+                    prompt_chars=sum(len(str(m.content)) for m in prompt),
+                    ttft_ms=None)
+
+    def on_llm_new_token(self, token: Any, *, run_id: UUID,
+                         **kwargs: Any) -> None:
+        """Record the time to the first streamed token."""
+        with self._lock:
+            run = self._runs.get(run_id)
+            if run is not None and run["attributes"]["ttft_ms"] is None:
+                run["attributes"]["ttft_ms"] = (
+                    time.perf_counter() - run["clock"]) * 1000
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID,
+                   **kwargs: Any) -> None:
+        """Close the LLM span with its token usage."""
+        usage: dict[str, Any] = {}
+        for generations in response.generations:
+            for generation in generations:
+                message = getattr(generation, "message", None)
+                usage = getattr(message, "usage_metadata", None) or usage
+        if not usage and response.llm_output:
+            token_usage = response.llm_output.get("token_usage") or {}
+            usage = {"input_tokens": token_usage.get("prompt_tokens"),
+                     "output_tokens": token_usage.get("completion_tokens")}
+        details = usage.get("input_token_details") or {}
+        self._end(run_id,
+                  prompt_tokens=usage.get("input_tokens"),
+                  completion_tokens=usage.get("output_tokens"),
+                  cached_tokens=details.get("cache_read"))
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID,
+                     **kwargs: Any) -> None:
+        """Close the LLM span with its error."""
+        self._end(run_id, error)
+
+    def on_tool_start(self, serialized: dict[str, Any], input_str: str, *,
+                      run_id: UUID, parent_run_id: UUID | None = None,
+                      **kwargs: Any) -> None:
+        """Open a tool span."""
+        inputs = kwargs.get("inputs")
+        name = (serialized or {}).get("name") or kwargs.get("name", "tool")
+        self._start(run_id, parent_run_id, "tool", str(name),
+                    args_bytes=_size(inputs if inputs is not None
+                                     else input_str))
+
+    def on_tool_end(self, output: Any, *, run_id: UUID,
+                    **kwargs: Any) -> None:
+        """Close the tool span with the result size and cache status."""
+        content = getattr(output, "content", output)
+        artifact = getattr(output, "artifact", None)
+        cache_hit = (artifact.get("cache_hit")
+                     if isinstance(artifact, dict) else None)
+        self._end(run_id, result_bytes=_size(content), cache_hit=cache_hit)
+
+    def on_tool_error(self, error: BaseException, *, run_id: UUID,
+                      **kwargs: Any) -> None:
+        """Close the tool span with its error."""
+        self._end(run_id, error)
+
+
+def _percentile(values: list[float], q: float) -> float | None:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q / 100 *
+                                                   (len(ordered) - 1))))]
+
+
+def summarize(spans: list[Span], top: int = 5) -> dict[str, Any]:
+    """Aggregate spans into per-operation latency and token statistics."""
+    by_operation: dict[tuple[str, str], list[Span]] = defaultdict(list)
+    children: dict[str, list[Span]] = defaultdict(list)
+    for span in spans:
+        by_operation[(span["kind"], span["name"])].append(span)
+        children[span["trace_id"]].append(span)
+
+    operations = []
+    for (kind, name), group in sorted(by_operation.items()):
+        durations = [span["duration_ms"] for span in group]
+        attributes = [span["attributes"] for span in group]
+        entry: dict[str, Any] = {
+            "kind": kind,
+            "name": name,
+            "count": len(group),
+            "errors": sum(span["status"] == "error" for span in group),
+            "total_ms": sum(durations),
+            "p50_ms": _percentile(durations, 50),
+            "p95_ms": _percentile(durations, 95),
+            "max_ms": max(durations),
+        }
+        if kind == "llm":
+            ttfts = [a["ttft_ms"] for a in attributes
+                     if a.get("ttft_ms") is not None]
+            entry["p50_ttft_ms"] = _percentile(ttfts, 50)
+            entry["prompt_tokens"] = sum(a.get("prompt_tokens") or 0
+                                         for a in attributes)
+            entry["completion_tokens"] = sum(a.get("completion_tokens") or 0
+                                             for a in attributes)
+            entry["cached_tokens"] = sum(a.get("cached_tokens") or 0
+                                         for a in attributes)
+        elif kind == "tool":
+            entry["result_bytes"] = sum(a.get("result_bytes") or 0
+                                        for a in attributes)
+            entry["cache_hits"] = sum(bool(a.get("cache_hit"))
+                                      for a in attributes)
+        operations.append(entry)
+
+    turns = []
+    for span in spans:
+        if span["kind"] != "turn":
+            continue
+        nested = children[span["trace_id"]]
+        llm_spans = [s["attributes"] for s in nested if s["kind"] == "llm"]
+        turns.append({
+            "trace_id": span["trace_id"],
+            "duration_ms": span["duration_ms"],
+            "llm_ms": sum(s["duration_ms"] for s in nested
+                          if s["kind"] == "llm"),
+            "tool_ms": sum(s["duration_ms"] for s in nested
+                           if s["kind"] == "tool"),
+            "llm_calls": sum(s["kind"] == "llm" for s in nested),
+            "tool_calls": sum(s["kind"] == "tool" for s in nested),
+            "prompt_tokens": sum(a.get("prompt_tokens") or 0
+                                 for a in llm_spans),
+            "cached_tokens": sum(a.get("cached_tokens") or 0
+                                 for a in llm_spans),
+        })
+    turns.sort(key=lambda turn: turn["duration_ms"], reverse=True)
+
+    return {"spans": len(spans), "turns": len(turns),
+            "operations": operations, "slowest_turns": turns[:top]}
+
+
+def format_summary(summary: dict[str, Any]) -> str:
+    """Render a summary as a plain text report."""
+    def ms(value: float | None) -> str:
+        return "-" if value is None else f"{value:.0f}"
+
+    lines = [f"{summary['spans']} spans, {summary['turns']} turns", "",
+             f"{'kind':<6} {'name':<28} {'count':>6} {'total ms':>10} "
+             f"{'p50 ms':>8} {'p95 ms':>8} {'max ms':>8}  extra"]
+    for op in sorted(summary["operations"], key=lambda o: -o["total_ms"]):
+        extra = ""
+        if op["kind"] == "llm":
+            extra = (f"ttft p50 {ms(op['p50_ttft_ms'])} ms, "
+                     f"{op['prompt_tokens']} in "
+                     f"({op['cached_tokens']} cached) / "
+                     f"{op['completion_tokens']} out tokens")
+        elif op["kind"] == "tool":
+            extra = (f"{op['result_bytes']} result bytes, "
+                     f"{op['cache_hits']} cache hits")
+        lines.append(f"{op['kind']:<6} {op['name'][:28]:<28} "
+                     f"{op['count']:>6} {ms(op['total_ms']):>10} "
+                     f"{ms(op['p50_ms']):>8} {ms(op['p95_ms']):>8} "
+                     f"{ms(op['max_ms']):>8}  {extra}")
+    if summary["slowest_turns"]:
+        lines += ["", "Slowest turns:"]
+        for turn in summary["slowest_turns"]:
+            lines.append(
+                f"  {turn['trace_id']}: {ms(turn['duration_ms'])} ms "
+                f"(llm {ms(turn['llm_ms'])} ms in {turn['llm_calls']} calls, "
+                f"tools {ms(turn['tool_ms'])} ms in "
+                f"{turn['tool_calls']} calls; prompt tokens "
+                f"{turn['cached_tokens']} cached / "
+                f"{turn['prompt_tokens'] - turn['cached_tokens']} uncached)")
+    return "\n".join(lines)
+
+
+def main() -> None:
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Summarise agent traces.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    summary_parser = commands.add_parser(
+        "summary", help="latency breakdown per LLM call, tool and turn")
+    summary_parser.add_argument("path", type=Path)
+    summary_parser.add_argument("--top", type=int, default=5)
+    summary_parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    summary = summarize(load_spans(args.path), top=args.top)
+    if args.json:
+        sys.stdout.write(json.dumps(summary, indent=2) + "\n")
+    else:
+        sys.stdout.write(format_summary(summary) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,563 @@
+"""Tunnel centreline network and cross-section table of a mine scan.
+
+An offline stage turns the scan into a structural model the agent can
+query without touching points:
+
+1. The points are rasterised onto an XY grid; cells holding floor or
+   roof points form the tunnel footprint.
+2. The footprint is thinned to a one cell wide skeleton, which is split
+   into branches between junctions and dead ends.
+3. Every branch is sampled at a fixed interval along its chainage, the
+   distance from its start, and each station gets a cross-section.
+
+Nodes, branches and sections are stored in SQLite with indexes on
+chainage and on every measurement, so "where is the tunnel narrowest" or
+"clearance at chainage 120 m" are index lookups:
+
+    python -m utils.tunnel_network build mine.csv --db tunnels.db
+    python -m utils.tunnel_network narrowest --db tunnels.db
+    python -m utils.tunnel_network at 120 --db tunnels.db
+
+Branches are numbered by length, so branch 1 is the longest drive. The
+same cross-section measurement is available for any path the agent asks
+about through `tunnel_profile`.
+"""
+
+import argparse
+import json
+import sqlite3
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+from numpy.typing import NDArray
+from scipy import ndimage  # type: ignore[import-untyped]
+from scipy.spatial import (  # type: ignore[import-untyped]
+    ConvexHull,
+    QhullError,
+)
+
+from utils.point_cache import PointCache, PointCacheStore
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS nodes (
+    id INTEGER PRIMARY KEY, x REAL, y REAL, z REAL, degree INTEGER);
+CREATE TABLE IF NOT EXISTS branches (
+    id INTEGER PRIMARY KEY, start_node INTEGER, end_node INTEGER,
+    length REAL, section_count INTEGER);
+CREATE TABLE IF NOT EXISTS sections (
+    branch INTEGER, chainage REAL, x REAL, y REAL, z REAL, area REAL,
+    width REAL, height REAL, deviation REAL, point_count INTEGER,
+    PRIMARY KEY (branch, chainage));
+CREATE INDEX IF NOT EXISTS sections_area ON sections (area);
+CREATE INDEX IF NOT EXISTS sections_width ON sections (width);
+CREATE INDEX IF NOT EXISTS sections_height ON sections (height);
+"""
+METRICS = ("area", "width", "height", "deviation")
+CELL_SIZE = 1.0
+SECTION_SPACING = 5.0
+CHUNK_POINTS = 10_000_000
+# Dead-end branches shorter than this are thinning artefacts
+SPUR_LENGTH = 3.0
+# Window in cells for smoothing the stair-stepped skeleton
+SMOOTHING = 5
+MAX_HALF_WIDTH = 30.0
+# Sections with fewer points are scan gaps, not measurements
+MIN_SECTION_POINTS = 10
+# Bounds the size of a cross-section answer measured on request
+MAX_STATIONS = 100
+SLAB_THICKNESS = 0.5
+
+_NEIGHBOURS = ((-1, 0), (-1, 1), (0, 1), (1, 1), (1, 0), (1, -1), (0, -1),
+               (-1, -1))
+
+
+@dataclass(frozen=True)
+class CrossSection:
+    """Tunnel profile at one station of a path."""
+
+    chainage: float
+    station: tuple[float, float, float]
+    point_count: int
+    area: float
+    width: float
+    height: float
+    offset: float
+
+
+def parse_path(path: str) -> NDArray[np.float64]:
+    """Parse "x,y[,z];x,y[,z];..." into path vertices.
+
+    Vertices without z get NaN, meaning the whole height of the scan.
+
+    Raises:
+        ValueError: If the path has fewer than two vertices.
+    """
+    vertices = []
+    for vertex in path.split(";"):
+        if not vertex.strip():
+            continue
+        values = [float(value) for value in vertex.split(",")]
+        if len(values) not in (2, 3):
+            raise ValueError(f"Path vertex {vertex!r} needs 2 or 3 numbers")
+        vertices.append(values + [np.nan] * (3 - len(values)))
+    if len(vertices) < 2:
+        raise ValueError("A path needs at least two vertices")
+    return np.asarray(vertices, dtype=np.float64)
+
+
+def path_stations(vertices: NDArray[np.float64], spacing: float
+                  ) -> list[tuple[float, NDArray[np.float64],
+                                  NDArray[np.float64]]]:
+    """Return `(chainage, position, direction)` every `spacing` metres."""
+    stations = []
+    chainage = 0.0
+    for start, end in zip(vertices[:-1], vertices[1:]):
+        # Horizontal length when the path has no heights
+        delta = np.nan_to_num(end - start)
+        length = float(np.linalg.norm(delta))
+        if length == 0:
+            continue
+        direction = delta / length
+        first = (-chainage) % spacing
+        for offset in np.arange(first, length, spacing):
+            stations.append((chainage + float(offset),
+                             start + direction * offset, direction))
+        chainage += length
+    if stations and stations[-1][0] < chainage - 1e-9:
+        stations.append((chainage, vertices[-1], stations[-1][2]))
+    return stations
+
+
+def cross_section(points: NDArray[np.float64],
+                  station: NDArray[np.float64],
+                  direction: NDArray[np.float64],
+                  half_width: float,
+                  thickness: float = SLAB_THICKNESS
+                  ) -> tuple[int, float, float, float, float]:
+    """Measure the tunnel profile in a slab across `direction`.
+
+    Points within `thickness / 2` of the plane through `station` are
+    projected onto it; the area is the one of their convex hull, the
+    width and height the extents across and along the vertical. Without
+    a station height the profile spans the whole height of the points.
+
+    Returns:
+        Point count, area in m2, width and height in m, and the offset
+        of the profile's horizontal centre from the station in m,
+        positive to the left of `direction`.
+    """
+    horizontal = np.array([-direction[1], direction[0], 0.0])
+    norm = np.linalg.norm(horizontal)
+    horizontal = (horizontal / norm if norm > 0
+                  else np.array([1.0, 0.0, 0.0]))
+    vertical = np.cross(direction, horizontal)
+    origin = np.nan_to_num(station)
+    offsets = points - origin
+    along = offsets @ direction
+    across = offsets @ horizontal
+    up = offsets @ vertical
+    keep = (np.abs(along) <= thickness / 2) & (np.abs(across) <= half_width)
+    if not np.isnan(station[2]):
+        keep &= np.abs(up) <= half_width
+    profile = np.column_stack([across[keep], up[keep]])
+    if len(profile) < 3:
+        return len(profile), 0.0, 0.0, 0.0, 0.0
+    low, high = profile.min(axis=0), profile.max(axis=0)
+    extent = high - low
+    try:
+        # For 2D input ConvexHull.volume is the enclosed area
+        area = float(ConvexHull(profile).volume)
+    except QhullError:
+        area = 0.0
+    return (len(profile), area, float(extent[0]), float(extent[1]),
+            float(low[0] + high[0]) / 2)
+
+
+def tunnel_profile(cache: PointCache, path: str, spacing: float,
+                   half_width: float, label: str | None = None
+                   ) -> list[CrossSection]:
+    """Measure cross-sections every `spacing` metres along a path."""
+    vertices = parse_path(path)
+    spacing = max(spacing, 0.1)
+    stations = path_stations(vertices, spacing)[:MAX_STATIONS]
+    z_low, z_high = cache.meta["bounds"][0][2], cache.meta["bounds"][1][2]
+    sections = []
+    for chainage, station, direction in stations:
+        reach = half_width + SLAB_THICKNESS
+        if np.isnan(station[2]):
+            low_z, high_z = z_low, z_high
+        else:
+            low_z, high_z = station[2] - reach, station[2] + reach
+        box = (station[0] - reach, station[1] - reach, low_z,
+               station[0] + reach, station[1] + reach, high_z)
+        sections.append(CrossSection(
+            chainage, (float(station[0]), float(station[1]),
+                       float(station[2])),
+            *cross_section(cache.points(box, label), station, direction,
+                           half_width)))
+    return sections
+
+
+@dataclass
+class _Raster:
+    """Per-cell occupancy and height range of the scan."""
+
+    origin: NDArray[np.float64]
+    cell_size: float
+    footprint: NDArray[np.bool_]
+    z_low: NDArray[np.float64]
+    z_high: NDArray[np.float64]
+
+    def world(self, cells: NDArray[np.int64]) -> NDArray[np.float64]:
+        """Return the XY centre of grid cells given as `(row, col)`."""
+        return self.origin + (cells + 0.5) * self.cell_size
+
+
+def _rasterise(cache: PointCache, cell_size: float) -> _Raster:
+    """Bin the points onto an XY grid in chunks of the mapped columns."""
+    low, high = (np.asarray(corner) for corner in cache.meta["bounds"])
+    shape = tuple(np.floor((high[:2] - low[:2]) / cell_size).astype(int) + 1)
+    size = shape[0] * shape[1]
+    counts = np.zeros(size, dtype=np.int64)
+    z_low = np.full(size, np.inf)
+    z_high = np.full(size, -np.inf)
+    columns = [cache.column(axis) for axis in "xyz"]
+    for start in range(0, cache.number_of_points, CHUNK_POINTS):
+        x, y, z = (np.asarray(column[start:start + CHUNK_POINTS])
+                   for column in columns)
+        cells = (np.minimum(((x - low[0]) / cell_size).astype(np.int64),
+                            shape[0] - 1) * shape[1]
+                 + np.minimum(((y - low[1]) / cell_size).astype(np.int64),
+                              shape[1] - 1))
+        counts += np.bincount(cells, minlength=size)
+        np.minimum.at(z_low, cells, z)
+        np.maximum.at(z_high, cells, z)
+    # Closing bridges cells the scanner happened to miss
+    footprint = ndimage.binary_closing(counts.reshape(shape) > 0,
+                                       structure=np.ones((3, 3)))
+    return _Raster(low[:2], cell_size, footprint, z_low.reshape(shape),
+                   z_high.reshape(shape))
+
+
+def _transitions(image: NDArray[np.int8]) -> tuple[NDArray[np.int8], ...]:
+    """Return the 8 neighbours of every interior pixel of a padded image."""
+    rows, cols = image.shape
+    return tuple(image[1 + dr:rows - 1 + dr, 1 + dc:cols - 1 + dc]
+                 for dr, dc in _NEIGHBOURS)
+
+
+def thin(mask: NDArray[np.bool_]) -> NDArray[np.bool_]:
+    """Thin a binary image to a one pixel wide skeleton (Zhang-Suen)."""
+    image = np.pad(mask, 1).astype(np.int8)
+    while True:
+        changed = False
+        for step in (0, 1):
+            p = _transitions(image)
+            neighbours = sum(p[1:], p[0])
+            # 0 -> 1 transitions in the cyclic sequence p2, p3, ..., p9, p2
+            crossings = sum(((p[i] == 0) & (p[(i + 1) % 8] == 1))
+                            .astype(np.int8) for i in range(8))
+            if step == 0:
+                side = (p[0] * p[2] * p[4] == 0) & (p[2] * p[4] * p[6] == 0)
+            else:
+                side = (p[0] * p[2] * p[6] == 0) & (p[0] * p[4] * p[6] == 0)
+            remove = ((image[1:-1, 1:-1] == 1) & (neighbours >= 2)
+                      & (neighbours <= 6) & (crossings == 1) & side)
+            if remove.any():
+                image[1:-1, 1:-1][remove] = 0
+                changed = True
+        if not changed:
+            return image[1:-1, 1:-1].astype(bool)
+
+
+@dataclass
+class _Branch:
+    """Skeleton path between two nodes, as grid cells."""
+
+    start: int
+    end: int
+    cells: list[tuple[int, int]]
+
+
+def skeleton_graph(skeleton: NDArray[np.bool_]
+                   ) -> tuple[list[list[tuple[int, int]]], list[_Branch]]:
+    """Split a skeleton into nodes and the branches connecting them.
+
+    Nodes are dead ends and junctions, found by the number of 0 -> 1
+    transitions around a pixel, so the corners of a stair-stepped line
+    are not mistaken for junctions. Adjacent junction pixels form one
+    node. Returns the pixels of every node and the branches.
+    """
+    padded = np.pad(skeleton, 1).astype(np.int8)
+    p = _transitions(padded)
+    crossings = sum(((p[i] == 0) & (p[(i + 1) % 8] == 1)).astype(np.int8)
+                    for i in range(8))
+    node_mask = skeleton & (crossings != 2)
+    labels, n_nodes = ndimage.label(node_mask, structure=np.ones((3, 3)))
+    rows, cols = skeleton.shape
+    node_of = {}
+    nodes: list[list[tuple[int, int]]] = [[] for _ in range(n_nodes)]
+    for r, c in zip(*np.nonzero(labels)):
+        node_of[(int(r), int(c))] = int(labels[r, c]) - 1
+        nodes[int(labels[r, c]) - 1].append((int(r), int(c)))
+
+    def neighbours(cell: tuple[int, int]) -> list[tuple[int, int]]:
+        # Orthogonal neighbours first, so corners are not skipped
+        order = sorted(_NEIGHBOURS, key=lambda step: abs(step[0] * step[1]))
+        return [(cell[0] + dr, cell[1] + dc) for dr, dc in order
+                if 0 <= cell[0] + dr < rows and 0 <= cell[1] + dc < cols
+                and skeleton[cell[0] + dr, cell[1] + dc]]
+
+    visited: set[tuple[int, int]] = set()
+    branches = []
+
+    def trace(node: int, first: tuple[int, int]) -> None:
+        start = nodes[node][0]
+        cells = [start, first]
+        previous, current = start, first
+        while current not in node_of:
+            visited.add(current)
+            options = [cell for cell in neighbours(current)
+                       if cell != previous and cell not in visited
+                       and (cell in node_of or cell not in cells)]
+            ends = [cell for cell in options if cell in node_of
+                    and (node_of[cell] != node or len(cells) > 3)]
+            if ends:
+                cells.append(ends[0])
+                break
+            lines = [cell for cell in options if cell not in node_of]
+            if not lines:
+                return
+            previous, current = current, lines[0]
+            cells.append(current)
+        branches.append(_Branch(node, node_of[cells[-1]], cells))
+
+    for node, pixels in enumerate(nodes):
+        for pixel in pixels:
+            for cell in neighbours(pixel):
+                if cell in node_of:
+                    continue
+                if cell not in visited:
+                    trace(node, cell)
+    # Closed loops without junctions get a node of their own
+    for r, c in zip(*np.nonzero(skeleton)):
+        cell = (int(r), int(c))
+        if cell in visited or cell in node_of:
+            continue
+        node_of[cell] = len(nodes)
+        nodes.append([cell])
+        for first in neighbours(cell)[:1]:
+            trace(len(nodes) - 1, first)
+    return nodes, branches
+
+
+def _smooth(points: NDArray[np.float64]) -> NDArray[np.float64]:
+    """Return the moving average of a polyline, keeping its end points."""
+    if len(points) <= SMOOTHING:
+        return points
+    kernel = np.ones(SMOOTHING) / SMOOTHING
+    half = SMOOTHING // 2
+    smoothed = points.copy()
+    for axis in range(points.shape[1]):
+        smoothed[half:-half, axis] = np.convolve(points[:, axis], kernel,
+                                                 mode="valid")
+    return smoothed
+
+
+class TunnelNetwork:
+    """Centreline graph and cross-section table in one SQLite database."""
+
+    def __init__(self, path: str | Path) -> None:
+        """Open or create the tunnel database at `path`."""
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        # Agent tools run in worker threads; access is serialised by _lock
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._db.executescript(SCHEMA)
+
+    def close(self) -> None:
+        """Close the database connection once running queries finish."""
+        with self._lock:
+            self._db.close()
+
+    def _query(self, sql: str, params: tuple[Any, ...] = ()
+               ) -> list[dict[str, Any]]:
+        with self._lock:
+            return [dict(row) for row in self._db.execute(sql, params)]
+
+    @property
+    def is_built(self) -> bool:
+        """Whether the database holds a network."""
+        return bool(self._query("SELECT 1 FROM meta WHERE key = 'source'"))
+
+    def build(self, cache: PointCache, spacing: float = SECTION_SPACING,
+              cell_size: float = CELL_SIZE) -> dict[str, Any]:
+        """Replace the stored network with the one of a point cloud."""
+        started = time.perf_counter()
+        raster = _rasterise(cache, cell_size)
+        distance = ndimage.distance_transform_edt(raster.footprint
+                                                  ) * cell_size
+        node_cells, branches = skeleton_graph(thin(raster.footprint))
+        degree = np.zeros(len(node_cells), dtype=np.int64)
+        for branch in branches:
+            degree[branch.start] += 1
+            degree[branch.end] += 1
+        branches = [branch for branch in branches
+                    if not (min(degree[branch.start], degree[branch.end]) == 1
+                            and len(branch.cells) * cell_size < SPUR_LENGTH)]
+
+        def centre(cells: NDArray[np.int64]) -> NDArray[np.float64]:
+            z = (raster.z_low[cells[:, 0], cells[:, 1]]
+                 + raster.z_high[cells[:, 0], cells[:, 1]]) / 2
+            return np.column_stack([raster.world(cells), z])
+
+        polylines = [_smooth(centre(np.asarray(branch.cells)))
+                     for branch in branches]
+        lengths = [float(np.linalg.norm(np.diff(line, axis=0), axis=1).sum())
+                   for line in polylines]
+        order = np.argsort(lengths)[::-1]
+
+        section_rows = []
+        branch_rows = []
+        for number, index in enumerate(order.tolist(), start=1):
+            branch, line = branches[index], polylines[index]
+            cells = np.asarray(branch.cells)
+            count = 0
+            for chainage, station, direction in path_stations(line, spacing):
+                nearest = cells[np.argmin(np.linalg.norm(
+                    raster.world(cells) - station[:2], axis=1))]
+                half_width = min(2 * distance[nearest[0], nearest[1]]
+                                 + 2 * cell_size, MAX_HALF_WIDTH)
+                reach = half_width + 1
+                box = (*(station - reach), *(station + reach))
+                points, area, width, height, offset = cross_section(
+                    cache.points(box), station, direction, half_width)
+                if points < MIN_SECTION_POINTS:
+                    continue
+                section_rows.append((number, round(chainage, 3),
+                                     *station.tolist(), area, width, height,
+                                     offset, points))
+                count += 1
+            branch_rows.append((number, branch.start, branch.end,
+                                lengths[index], count))
+
+        used = {row[1] for row in branch_rows} | {row[2] for row in
+                                                  branch_rows}
+        node_rows = []
+        for node in sorted(used):
+            pixels = np.asarray(node_cells[node], dtype=np.int64)
+            x, y, z = centre(pixels).mean(axis=0).tolist()
+            node_rows.append((node, x, y, z, int(degree[node])))
+
+        with self._lock, self._db:
+            for table in ("meta", "nodes", "branches", "sections"):
+                self._db.execute(f"DELETE FROM {table}")
+            self._db.executemany(
+                "INSERT INTO meta VALUES (?, ?)",
+                [("source", cache.meta["source"]),
+                 ("spacing", str(spacing)), ("cell_size", str(cell_size)),
+                 ("built_at", str(time.time()))])
+            self._db.executemany("INSERT INTO nodes VALUES (?, ?, ?, ?, ?)",
+                                 node_rows)
+            self._db.executemany(
+                "INSERT INTO branches VALUES (?, ?, ?, ?, ?)", branch_rows)
+            self._db.executemany(
+                "INSERT INTO sections VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                section_rows)
+        return {"nodes": len(node_rows), "branches": len(branch_rows),
+                "sections": len(section_rows),
+                "length": round(sum(lengths), 1),
+                "seconds": round(time.perf_counter() - started, 2)}
+
+    def branches(self) -> list[dict[str, Any]]:
+        """Return every branch with its end nodes and length."""
+        return self._query(
+            "SELECT b.id, b.length, b.section_count, b.start_node, "
+            "b.end_node, s.x AS start_x, s.y AS start_y, e.x AS end_x, "
+            "e.y AS end_y FROM branches b JOIN nodes s ON s.id = b.start_node "
+            "JOIN nodes e ON e.id = b.end_node ORDER BY b.id")
+
+    def section_at(self, chainage: float, branch: int = 1
+                   ) -> dict[str, Any] | None:
+        """Return the section of `branch` nearest to `chainage`."""
+        rows = self._query(
+            "SELECT * FROM (SELECT * FROM sections WHERE branch = ? AND "
+            "chainage <= ? ORDER BY chainage DESC LIMIT 1) UNION ALL "
+            "SELECT * FROM (SELECT * FROM sections WHERE branch = ? AND "
+            "chainage > ? ORDER BY chainage LIMIT 1)",
+            (branch, chainage, branch, chainage))
+        if not rows:
+            return None
+        return min(rows, key=lambda row: abs(row["chainage"] - chainage))
+
+    def extremes(self, metric: str, largest: bool = False, limit: int = 5,
+                 branch: int | None = None) -> list[dict[str, Any]]:
+        """Return the sections with the smallest or largest `metric`.
+
+        Deviation is signed and compared by magnitude: the largest are
+        the sections furthest off the centreline, the smallest the ones
+        closest to it.
+
+        Raises:
+            ValueError: If `metric` is not a stored measurement.
+        """
+        if metric not in METRICS:
+            raise ValueError(f"Unknown metric {metric}; use one of "
+                             f"{', '.join(METRICS)}")
+        where = "WHERE branch = ? " if branch is not None else ""
+        params: tuple[Any, ...] = (branch,) if branch is not None else ()
+        key = "ABS(deviation)" if metric == "deviation" else metric
+        order = "DESC" if largest else "ASC"
+        return self._query(f"SELECT * FROM sections {where}ORDER BY {key} "
+                           f"{order} LIMIT ?", (*params, limit))
+
+
+def main() -> None:
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(
+        description="Build and query the tunnel network of a mine scan.")
+    parser.add_argument("--db", type=Path, default=Path("tunnels.db"))
+    commands = parser.add_subparsers(dest="command", required=True)
+    build_parser = commands.add_parser(
+        "build", help="extract centrelines and cross-sections")
+    build_parser.add_argument("csv", type=Path)
+    build_parser.add_argument("--cache-dir", type=Path,
+                              default=Path(".point_cache"))
+    build_parser.add_argument("--spacing", type=float,
+                              default=SECTION_SPACING)
+    build_parser.add_argument("--cell-size", type=float, default=CELL_SIZE)
+    commands.add_parser("branches", help="list branches")
+    extreme_parser = commands.add_parser(
+        "narrowest", help="sections with the smallest measurement")
+    extreme_parser.add_argument("--metric", choices=METRICS,
+                                default="width")
+    extreme_parser.add_argument("--limit", type=int, default=5)
+    at_parser = commands.add_parser("at", help="section at a chainage")
+    at_parser.add_argument("chainage", type=float)
+    at_parser.add_argument("--branch", type=int, default=1)
+    args = parser.parse_args()
+
+    network = TunnelNetwork(args.db)
+    result: Any
+    if args.command == "build":
+        cache = PointCacheStore(args.cache_dir).open(args.csv)[0]
+        result = network.build(cache, args.spacing, args.cell_size)
+    elif args.command == "branches":
+        result = network.branches()
+    elif args.command == "narrowest":
+        result = network.extremes(args.metric, limit=args.limit)
+    else:
+        result = network.section_at(args.chainage, args.branch)
+    network.close()
+    sys.stdout.write(json.dumps(result, indent=2) + "\n")
+
+
+if __name__ == "__main__":
+    main()
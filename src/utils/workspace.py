@@ -0,0 +1,291 @@
+"""Workspace of source files shared by all agent processes.
+
+The agent's file tools are sandboxed to a workspace directory holding a
+selection of the DATA files. Instead of copying them into a new temporary
+directory per process, workspaces are content addressed: the directory
+name is a digest of the selected files' names, sizes and modification
+times, so every process and restart that serves the same data reuses the
+same directory.
+
+Files are hardlinked into the workspace, which costs the same for a 1 KB
+and a 10 GB file. The workspace directory is read-only, so entries
+cannot be added, renamed or removed, but a hardlink shares its inode with
+the source: the file tools only read, and anything writing a workspace
+file changes the DATA file. Besides fixed file names, a workspace can
+select files by glob pattern; `refresh` then picks up files published
+into the source directory later by moving to the workspace of the new
+selection, which running agents see on their next file access. Where
+hardlinks are impossible (DATA on another filesystem), the file is
+copied once into a shared object store next to
+the workspaces and hardlinked from there. Files are materialised the
+first time the workspace is accessed, and workspaces not used for
+`max_age` seconds are removed together with store objects nobody links
+to anymore.
+"""
+
+import fnmatch
+import hashlib
+import logging
+import os
+import shutil
+import stat
+import tempfile
+import threading
+import time
+import uuid
+from collections.abc import Callable, Sequence
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ROOT = Path(tempfile.gettempdir()) / "geodata_workspaces"
+MARKER = ".last_used"
+STORE = "objects"
+CACHE = "cache"
+WORKSPACE_PREFIX = "ws-"
+DEFAULT_MAX_AGE = 7 * 24 * 3600
+# Store objects younger than this may be about to be linked by their creator
+STORE_GRACE = 60
+
+
+def workspace_root(root: str | Path | None = None) -> Path:
+    """Return the directory holding all workspaces."""
+    return Path(root or os.environ.get("GEODATA_WORKSPACE_ROOT")
+                or DEFAULT_ROOT)
+
+
+class SharedWorkspace:
+    """Content-addressed directory of hardlinks to selected source files."""
+
+    def __init__(self, source_dir: str | Path, files: list[str],
+                 root: str | Path | None = None,
+                 max_age: float = DEFAULT_MAX_AGE,
+                 patterns: Sequence[str] = (),
+                 refresh_interval: float | None = None) -> None:
+        """Describe a workspace; nothing is written until first access.
+
+        Args:
+            source_dir: Directory holding the source files.
+            files: File names in `source_dir`; missing files are skipped.
+            root: Directory holding all workspaces and the object store.
+            max_age: Seconds after which unused workspaces are removed.
+            patterns: Glob patterns of further files in `source_dir`.
+            refresh_interval: Seconds between automatic refreshes on
+                access; None only refreshes when `refresh` is called.
+        """
+        self.source_dir = Path(source_dir)
+        self.root = workspace_root(root)
+        self.max_age = max_age
+        self.files = list(files)
+        self.patterns = list(patterns)
+        self.refresh_interval = refresh_interval
+        self.sources = self._select_sources()
+        self.path = self.root / (WORKSPACE_PREFIX + self._digest())
+        self._ready = False
+        self._lock = threading.RLock()
+        self._checked = time.monotonic()
+        self._listeners: list[Callable[[Path, Path], None]] = []
+
+    def _select_sources(self) -> dict[str, Path]:
+        names = set(self.files)
+        if self.patterns and self.source_dir.is_dir():
+            names.update(name for name in os.listdir(self.source_dir)
+                         if any(fnmatch.fnmatch(name, pattern)
+                                for pattern in self.patterns))
+        return {name: self.source_dir / name for name in sorted(names)
+                if (self.source_dir / name).is_file()}
+
+    @staticmethod
+    def _fingerprint(path: Path) -> str:
+        info = path.stat()
+        return f"{path.resolve()}:{info.st_size}:{info.st_mtime_ns}"
+
+    def _digest(self, sources: dict[str, Path] | None = None) -> str:
+        digest = hashlib.sha256()
+        for name, path in sorted((self.sources if sources is None
+                                  else sources).items()):
+            digest.update(f"{name}\0{self._fingerprint(path)}\0".encode())
+        return digest.hexdigest()[:16]
+
+    def __str__(self) -> str:
+        """Return the workspace path."""
+        return str(self.path)
+
+    @property
+    def cache_dir(self) -> Path:
+        """Writable directory for indexes derived from workspace files."""
+        return self.root / CACHE
+
+    def resolve(self, relative_path: str) -> Path:
+        """Return the path of a workspace entry, materialising if needed.
+
+        Raises:
+            ValueError: If the path points outside the workspace.
+        """
+        root = self.materialize().resolve()
+        path = (root / relative_path).resolve()
+        if not path.is_relative_to(root):
+            raise ValueError(f"{relative_path} is outside the workspace")
+        return path
+
+    def add_listener(self, callback: Callable[[Path, Path], None]) -> None:
+        """Call `callback(old_path, new_path)` when a refresh moves.
+
+        Exceptions raised by `callback` are logged and otherwise ignored.
+        """
+        self._listeners.append(callback)
+
+    def refresh(self) -> bool:
+        """Move to the workspace of the current source files if they changed.
+
+        The previous workspace stays in place for readers still using it
+        and is removed by `cleanup` once unused. Returns True if the
+        workspace moved.
+        """
+        with self._lock:
+            self._checked = time.monotonic()
+            sources = self._select_sources()
+            try:
+                digest = self._digest(sources)
+            except FileNotFoundError:
+                # A source was replaced while listing; retry next time
+                return False
+            path = self.root / (WORKSPACE_PREFIX + digest)
+            if path == self.path:
+                return False
+            old_path = self.path
+            self.sources, self.path, self._ready = sources, path, False
+            self._materialize()
+        for listener in self._listeners:
+            # A failing listener must not stop the others or the refresh
+            try:
+                listener(old_path, path)
+            except Exception:
+                logger.exception("Workspace listener %r failed", listener)
+        return True
+
+    def materialize(self) -> Path:
+        """Create the workspace if needed and return its path."""
+        if (self.refresh_interval is not None and time.monotonic()
+                - self._checked >= self.refresh_interval):
+            self.refresh()
+        with self._lock:
+            return self._materialize()
+
+    def _materialize(self) -> Path:
+        if self._ready and self.path.is_dir():
+            return self.path
+        self.root.mkdir(parents=True, exist_ok=True)
+        if not self.path.is_dir():
+            self._build()
+        # Marks the workspace as in use for stale workspace cleanup
+        (self.root / (self.path.name + MARKER)).touch()
+        self._ready = True
+        self.cleanup()
+        return self.path
+
+    def _build(self) -> None:
+        """Populate a private directory, then rename it into place."""
+        staging = self.root / f".staging-{uuid.uuid4().hex}"
+        staging.mkdir()
+        try:
+            for name, source in self.sources.items():
+                self._link(source, staging / name)
+            staging.chmod(stat.S_IRUSR | stat.S_IXUSR | stat.S_IRGRP
+                          | stat.S_IXGRP | stat.S_IROTH | stat.S_IXOTH)
+            try:
+                staging.rename(self.path)
+            except OSError:
+                # Another process created the same workspace first
+                if not self.path.is_dir():
+                    raise
+        finally:
+            if staging.exists():
+                _remove_tree(staging)
+
+    def _link(self, source: Path, target: Path) -> None:
+        try:
+            os.link(source, target)
+            return
+        except OSError:
+            pass
+        # Cross-device: share one read-only copy per source version
+        key = hashlib.sha256(self._fingerprint(source).encode()).hexdigest()
+        stored = self.root / STORE / key
+        if not stored.exists():
+            stored.parent.mkdir(exist_ok=True)
+            partial = stored.with_name(f"{key}.{uuid.uuid4().hex}.partial")
+            shutil.copyfile(source, partial)
+            partial.chmod(stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)
+            os.replace(partial, stored)
+        os.link(stored, target)
+
+    def cleanup(self) -> list[Path]:
+        """Remove workspaces unused for `max_age` and unreferenced objects.
+
+        Files next to a workspace whose name starts with the workspace name,
+        such as `ws-<digest>_catalog.db`, are removed with it, or once
+        unused for `max_age` if the workspace was never materialised.
+        Cached indexes not used for `max_age` are removed as well.
+        """
+        removed = []
+        now = time.time()
+        for marker in self.root.glob(WORKSPACE_PREFIX + "*" + MARKER):
+            workspace = self.root / marker.name[:-len(MARKER)]
+            if workspace == self.path:
+                continue
+            try:
+                if now - marker.stat().st_mtime < self.max_age:
+                    continue
+                marker.unlink()
+            except FileNotFoundError:
+                # Removed concurrently by another process
+                continue
+            if workspace.is_dir():
+                _remove_tree(workspace)
+                removed.append(workspace)
+            for companion in self.root.glob(workspace.name + "_*"):
+                companion.unlink(missing_ok=True)
+                removed.append(companion)
+        for companion in self.root.glob(WORKSPACE_PREFIX + "*_*"):
+            owner = companion.name.split("_", 1)[0]
+            if (owner == self.path.name
+                    or (self.root / (owner + MARKER)).exists()):
+                continue
+            try:
+                if now - companion.stat().st_mtime < self.max_age:
+                    continue
+            except FileNotFoundError:
+                continue
+            companion.unlink(missing_ok=True)
+            removed.append(companion)
+        cache = self.root / CACHE
+        if cache.is_dir():
+            for cached in cache.iterdir():
+                if now - cached.stat().st_mtime > self.max_age:
+                    if cached.is_dir():
+                        shutil.rmtree(cached, ignore_errors=True)
+                    else:
+                        cached.unlink(missing_ok=True)
+                    removed.append(cached)
+        store = self.root / STORE
+        if store.is_dir():
+            for stored in store.iterdir():
+                info = stored.stat()
+                if stored.name.endswith(".partial"):
+                    # Left behind by a copy that was interrupted
+                    unused = now - info.st_mtime > self.max_age
+                else:
+                    # A link count of 1 means no workspace uses the object
+                    unused = (info.st_nlink == 1
+                              and now - info.st_ctime > STORE_GRACE)
+                if unused:
+                    stored.unlink(missing_ok=True)
+                    removed.append(stored)
+        return removed
+
+
+def _remove_tree(path: Path) -> None:
+    """Remove a directory that may have been made read-only."""
+    path.chmod(stat.S_IRWXU)
+    shutil.rmtree(path, ignore_errors=True)
@@ -0,0 +1,218 @@
+"""File tools over the shared workspace, backed by cached file indexes.
+
+They replace the generic file management toolkit: `read_file` returns a
+page of lines instead of the whole file, `search_files` greps prebuilt
+prim, label and column indexes instead of file contents, and
+`csv_column_stats` summarises CSV files the agent must not read in full
+and `query_point_cloud` answers aggregate questions about point clouds
+from a memory-mapped columnar cache. Every tool reports whether its index
+came from the cache.
+"""
+
+import fnmatch
+import json
+from typing import Any
+
+from langchain_core.tools import BaseTool, tool
+
+from utils.file_index import FileIndexCache
+from utils.point_cache import HEIGHT_BINS, PointCacheStore, parse_box
+from utils.workspace import SharedWorkspace
+
+DEFAULT_PAGE_LINES = 200
+MAX_PAGE_LINES = 1000
+MAX_PAGE_CHARS = 20_000
+MAX_SEARCH_RESULTS = 50
+# Binary or tabular files are summarised, never paged into the context
+TEXT_SUFFIXES = (".usda", ".txt", ".md", ".json")
+
+POINT_QUERIES = ("count", "bounds", "labels", "density", "height_profile")
+
+ToolResult = tuple[str, dict[str, Any]]
+
+
+def _format_bounds(bounds: tuple[list[float], list[float]] | None) -> str:
+    if bounds is None:
+        return "no points"
+    low, high = bounds
+    return (f"min ({low[0]:.2f}, {low[1]:.2f}, {low[2]:.2f}), "
+            f"max ({high[0]:.2f}, {high[1]:.2f}, {high[2]:.2f})")
+
+
+def make_workspace_tools(workspace: SharedWorkspace,
+                         index: FileIndexCache | None = None,
+                         point_caches: PointCacheStore | None = None
+                         ) -> list[BaseTool]:
+    """Create file tools sandboxed to `workspace`."""
+    index = index or FileIndexCache(workspace.cache_dir)
+    point_caches = point_caches or PointCacheStore(workspace.cache_dir)
+
+    def files(dir_path: str) -> list[str]:
+        root = workspace.resolve(".")
+        directory = workspace.resolve(dir_path)
+        return sorted(str(path.relative_to(root))
+                      for path in directory.rglob("*") if path.is_file())
+
+    @tool
+    def list_directory(dir_path: str = ".") -> str:
+        """List the files in a workspace directory.
+
+        Args:
+            dir_path: Directory relative to the workspace root.
+        """
+        directory = workspace.resolve(dir_path)
+        names = sorted(path.name for path in directory.iterdir())
+        return "\n".join(names) or f"No files found in directory {dir_path}"
+
+    @tool
+    def file_search(pattern: str, dir_path: str = ".") -> str:
+        """Find workspace files whose name matches a pattern like *.usda.
+
+        Args:
+            pattern: Unix shell style file name pattern.
+            dir_path: Directory to search, relative to the workspace root.
+        """
+        matches = [name for name in files(dir_path)
+                   if fnmatch.fnmatch(name.rsplit("/", 1)[-1], pattern)]
+        return "\n".join(matches) or f"No files found for pattern {pattern}"
+
+    @tool(response_format="content_and_artifact")
+    def read_file(file_path: str, offset: int = 1,
+                  limit: int = DEFAULT_PAGE_LINES,
+                  char_offset: int = 0) -> ToolResult:
+        """Read a page of lines from a text file such as a USDA scene.
+
+        Use search_files first to find the line to start at. CSV files
+        are summarised by csv_column_stats and binary .usdc scenes are
+        read through the scene tools instead.
+
+        Args:
+            file_path: File relative to the workspace root.
+            offset: First line to read, starting at 1.
+            limit: Number of lines to read, at most 1000.
+            char_offset: Characters to skip of the first line, to continue
+                a line too long for one page.
+        """
+        path = workspace.resolve(file_path)
+        if path.suffix not in TEXT_SUFFIXES:
+            return (f"{file_path} is not a text file; use csv_column_stats "
+                    f"for CSV files and the scene tools for USD scenes.",
+                    {"cache_hit": False})
+        start = max(offset, 1)
+        text, total, hit = index.read_lines(
+            path, start, min(max(limit, 1), MAX_PAGE_LINES))
+        first_line = text.find("\n")
+        skip = min(max(char_offset, 0),
+                   len(text) if first_line < 0 else first_line)
+        text = text[skip:]
+        if not text:
+            return f"{file_path} has {total} lines.", {"cache_hit": hit}
+        if len(text) > MAX_PAGE_CHARS:
+            # Cut at a line boundary so the next offset stays exact
+            cut = text.rfind("\n", 0, MAX_PAGE_CHARS) + 1
+            if not cut:
+                # A single line longer than a page continues mid-line
+                text = text[:MAX_PAGE_CHARS]
+                return (f"{file_path}: line {start} characters {skip + 1}-"
+                        f"{skip + len(text)}, continue with offset={start}, "
+                        f"char_offset={skip + len(text)}\n{text}",
+                        {"cache_hit": hit})
+            text = text[:cut]
+        end = start - 1 + text.count("\n") + (not text.endswith("\n"))
+        header = f"{file_path}: lines {start}-{end} of {total}"
+        if end < total:
+            header += f", continue with offset={end + 1}"
+        return f"{header}\n{text}", {"cache_hit": hit}
+
+    @tool(response_format="content_and_artifact")
+    def search_files(query: str, file_path: str = "") -> ToolResult:
+        """Search prim paths, object labels and CSV columns and values.
+
+        Results list file, line, kind and text; pass the line as offset
+        to read_file to see the surrounding content.
+
+        Args:
+            query: Case-insensitive text to find, e.g. chair or /World.
+            file_path: Only search this file; all files if empty.
+        """
+        names = [file_path] if file_path else files(".")
+        needle = query.lower()
+        results, hits = [], []
+        for name in names:
+            entries, hit = index.entries(workspace.resolve(name))
+            hits.append(hit)
+            results += [f"{name}:{entry.line} {entry.kind} {entry.text}"
+                        for entry in entries if needle in entry.text.lower()]
+        artifact = {"cache_hit": bool(hits) and all(hits)}
+        if not results:
+            return f"No matches for {query}.", artifact
+        shown = results[:MAX_SEARCH_RESULTS]
+        if len(results) > len(shown):
+            shown.append(f"... {len(results) - len(shown)} more matches")
+        return "\n".join(shown), artifact
+
+    @tool(response_format="content_and_artifact")
+    def csv_column_stats(file_path: str, columns: str = "") -> ToolResult:
+        """Summarise CSV columns: count, mean, std, min, max and categories.
+
+        Args:
+            file_path: CSV file relative to the workspace root.
+            columns: Comma-separated column names; all columns if empty.
+        """
+        stats, hit = index.csv_stats(workspace.resolve(file_path))
+        selected = [name.strip() for name in columns.split(",")
+                    if name.strip()] or list(stats["columns"])
+        unknown = [name for name in selected if name not in stats["columns"]]
+        if unknown:
+            return (f"Unknown columns {', '.join(unknown)}; available: "
+                    f"{', '.join(stats['columns'])}", {"cache_hit": hit})
+        lines = [f"{file_path}: {stats['rows']} rows"]
+        lines += [f"{name}: {json.dumps(stats['columns'][name])}"
+                  for name in selected]
+        return "\n".join(lines), {"cache_hit": hit}
+
+    @tool(response_format="content_and_artifact")
+    def query_point_cloud(file_path: str, query: str, label: str = "",
+                          box: str = "", bins: int = HEIGHT_BINS
+                          ) -> ToolResult:
+        """Run an aggregate query over the points of a point cloud CSV.
+
+        Queries: count (number of points), bounds (min and max corner),
+        labels (points per label), density (points per m3 in the box) and
+        height_profile (points per height slice).
+
+        Args:
+            file_path: Point cloud CSV relative to the workspace root.
+            query: One of count, bounds, labels, density, height_profile.
+            label: Only points with this label value, e.g. 3.
+            box: Only points inside "xmin,ymin,zmin,xmax,ymax,zmax".
+            bins: Number of height slices for height_profile, at most 100.
+        """
+        if query not in POINT_QUERIES:
+            return (f"Unknown query {query}; use one of "
+                    f"{', '.join(POINT_QUERIES)}.", {"cache_hit": False})
+        cache, hit = point_caches.open(workspace.resolve(file_path))
+        selected = label or None
+        region = parse_box(box)
+        if query == "count":
+            text = f"{cache.count(selected, region)} points"
+        elif query == "bounds":
+            text = _format_bounds(cache.bounds(selected, region))
+        elif query == "labels":
+            text = "\n".join(f"{name}: {count} points" for name, count
+                             in cache.label_counts(region).items())
+        elif query == "density":
+            if region is None:
+                low, high = cache.meta["bounds"]
+                region = (*low, *high)
+            text = (f"{cache.density(region, selected):.2f} points per m3 "
+                    f"in {_format_bounds((list(region[:3]), list(region[3:])))}")
+        else:
+            text = "\n".join(
+                f"z {low:.2f} to {high:.2f}: {count} points"
+                for low, high, count in cache.height_profile(
+                    bins, selected, region))
+        return text or "no points", {"cache_hit": hit}
+
+    return [list_directory, file_search, read_file, search_files,
+            csv_column_stats, query_point_cloud]
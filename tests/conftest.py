@@ -9,7 +9,45 @@ SRC = ROOT / "src"
 if str(SRC) not in sys.path:
     sys.path.insert(0, str(SRC))
 
+# Clustering parameters the synthetic scenes are generated for
+SYNTHETIC_PARAMS = {"eps": 0.35, "min_samples": 10}
+
 
 @pytest.fixture(scope="session")
 def anyio_backend():
     return "asyncio"
+
+
+@pytest.fixture
+def synthetic_scene(tmp_path):
+    """Return a function writing a synthetic scene to `<name>.csv`."""
+    from benchmarks.synthetic import make_scene, write_scene_csv
+
+    def write(name="scene", n_points=5_000, n_objects=6):
+        csv_path = tmp_path / f"{name}.csv"
+        write_scene_csv(make_scene(n_points, n_objects, seed=1), csv_path)
+        return csv_path
+
+    return write
+
+
+@pytest.fixture
+def processed_scene(tmp_path, synthetic_scene):
+    """Return a function running the pipeline on a synthetic scene.
+
+    The scene is written to `<name>.csv` and exported to `<name><suffix>`;
+    further keyword arguments go to the pipeline, whose results are
+    returned once it succeeded.
+    """
+    from geo_service.app import process_semantic_pointcloud_to_usd
+
+    def process(name="scene", suffix=".usda", n_points=5_000, n_objects=6,
+                **kwargs):
+        csv_path = synthetic_scene(name, n_points, n_objects)
+        results = process_semantic_pointcloud_to_usd(
+            str(csv_path), str(tmp_path / f"{name}{suffix}"),
+            **{**SYNTHETIC_PARAMS, **kwargs})
+        assert results["success"], results.get("traceback")
+        return results
+
+    return process
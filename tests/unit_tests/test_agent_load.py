@@ -0,0 +1,71 @@
+from types import SimpleNamespace
+
+import pytest
+
+
+def test_fake_llm_calls_the_probe_tool_then_replies() -> None:
+    from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+    from langchain_core.tools import tool
+
+    from utils.fake_llm import DeterministicChatModel
+
+    @tool
+    def list_directory() -> str:
+        """List files."""
+        return "scene.usda"
+
+    model = DeterministicChatModel().bind_tools([list_directory])
+    question = HumanMessage("What is in the room?")
+    call = model.invoke([question])
+    assert [c["name"] for c in call.tool_calls] == ["list_directory"]
+
+    history = [question, call,
+               ToolMessage("scene.usda", tool_call_id=call.tool_calls[0]["id"])]
+    reply = model.invoke(history)
+    assert isinstance(reply, AIMessage) and not reply.tool_calls
+    assert reply.content.endswith("(1 tool results seen).")
+    assert model.invoke(history).content == reply.content
+    streamed = "".join(str(chunk.content) for chunk in model.stream(history))
+    assert streamed == reply.content
+
+
+class _FakeRuns:
+    async def stream(self, thread_id, assistant_id, input, stream_mode):
+        text = input["messages"][0]["content"]
+        yield SimpleNamespace(event="messages", data=(
+            {"type": "AIMessageChunk", "content": "",
+             "tool_call_chunks": [{"name": "list_directory"}]}, {}))
+        if text == "fail":
+            raise ConnectionError("stream dropped")
+        for word in ("two", " words"):
+            yield SimpleNamespace(event="messages", data=(
+                {"type": "AIMessageChunk", "content": word}, {}))
+
+
+class _FakeClient:
+    def __init__(self) -> None:
+        self.runs = _FakeRuns()
+        self.threads = SimpleNamespace(create=self._create)
+
+    async def _create(self) -> dict:
+        return {"thread_id": "t"}
+
+    async def aclose(self) -> None:
+        pass
+
+
+@pytest.mark.anyio
+async def test_load_report_counts_tool_calls_of_failed_turns(
+        monkeypatch) -> None:
+    from benchmarks import agent_load
+
+    monkeypatch.setattr(agent_load, "get_client", lambda url: _FakeClient())
+    report = await agent_load.run_load_test(
+        "http://test", [{"name": "s", "turns": ["hello", "fail"]}],
+        conversations=2, concurrency=2, rate=0)
+
+    assert report["turns"] == 4
+    assert report["errors_by_type"] == {"ConnectionError": 2}
+    assert report["turn_latency_s"]["count"] == 2
+    assert report["tool_calls"]["total"] == 4
+    assert report["tool_calls"]["per_turn"] == 1.0
@@ -0,0 +1,47 @@
+import csv
+from pathlib import Path
+
+import pytest
+
+
+def test_batch_runs_scans_once_and_writes_a_summary(tmp_path) -> None:
+    from benchmarks.synthetic import make_scene, write_scene_csv
+    from geo_service.batch import SUMMARY_NAME, run_batch
+
+    scans = []
+    for seed in (1, 2):
+        path = tmp_path / f"scan_{seed}.csv"
+        write_scene_csv(make_scene(3_000, 4, seed=seed), path)
+        scans.append(str(path))
+    output_dir = tmp_path / "out"
+    options = {"eps": 0.35, "min_samples": 10}
+
+    records = run_batch(scans, output_dir, workers=2, **options)
+    assert [record["status"] for record in records] == ["done", "done"]
+    assert (output_dir / "scan_1_graph.sgraph").exists()
+    assert all(record["objects"] > 0 for record in records)
+
+    records = run_batch(scans, output_dir, workers=2, **options)
+    assert [record["status"] for record in records] == ["skipped", "skipped"]
+
+    with open(output_dir / SUMMARY_NAME) as f:
+        rows = list(csv.DictReader(f))
+    assert [row["input"] for row in rows] == scans
+
+    # The same scans under another spelling of their paths
+    respelled = [str(tmp_path / "out" / ".." / Path(scan).name)
+                 for scan in scans]
+    records = run_batch(respelled, output_dir, workers=2, **options)
+    assert [record["status"] for record in records] == ["skipped", "skipped"]
+    assert [record["input"] for record in records] == respelled
+
+
+def test_batch_reports_missing_scans(tmp_path) -> None:
+    from geo_service.batch import expand_inputs, run_batch
+
+    with pytest.raises(ValueError, match="missing_"):
+        expand_inputs([str(tmp_path / "missing_*.csv")])
+
+    records = run_batch([str(tmp_path / "gone.csv")], tmp_path / "out")
+    assert records[0]["status"] == "failed"
+    assert "FileNotFoundError" in records[0]["error"]
@@ -0,0 +1,55 @@
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from langgraph_sdk.schema import StreamPart
+
+pytestmark = pytest.mark.anyio
+
+
+def _token(text: str, event_id: str) -> StreamPart:
+    return StreamPart(
+        "messages", [{"type": "AIMessageChunk", "content": text}, {}],
+        event_id)
+
+
+class FakeRuns:
+    def __init__(self) -> None:
+        self.joined: list[tuple[str, str, str | None]] = []
+        self.thread_ids: list[str] = []
+
+    async def stream(self, thread_id, assistant_id, **kwargs):
+        self.thread_ids.append(thread_id)
+        yield StreamPart("metadata", {"run_id": "run-1"}, "0")
+        yield _token("Hello", "1")
+        raise httpx.ReadError("connection dropped")
+
+    async def join_stream(self, thread_id, run_id, **kwargs):
+        self.joined.append((thread_id, run_id, kwargs["last_event_id"]))
+        yield _token(" world", "2")
+
+
+class FakeThreads:
+    def __init__(self) -> None:
+        self.created = 0
+
+    async def create(self, **kwargs):
+        self.created += 1
+        return {"thread_id": "thread-1"}
+
+
+async def test_session_reuses_thread_and_resumes_stream(monkeypatch) -> None:
+    from utils import chat_session
+
+    runs, threads = FakeRuns(), FakeThreads()
+    fake_client = SimpleNamespace(runs=runs, threads=threads)
+    monkeypatch.setattr(chat_session, "get_shared_client",
+                        lambda url: fake_client)
+
+    session = chat_session.ChatSession(reconnect_delay=0)
+    assert await session.send("hi") == "Hello world"
+    assert await session.send("again") == "Hello world"
+
+    assert threads.created == 1
+    assert runs.thread_ids == ["thread-1", "thread-1"]
+    assert runs.joined[0] == ("thread-1", "run-1", "1")
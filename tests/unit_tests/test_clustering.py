@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+
+
+def _blobs(spacing, offsets):
+    axis = np.arange(10) * spacing
+    grid = np.stack(np.meshgrid(axis, axis, axis), axis=-1).reshape(-1, 3)
+    return np.concatenate([grid + offset for offset in offsets])
+
+
+def test_estimated_eps_follows_each_labels_point_spacing() -> None:
+    from geo_service.app import extract_semantic_objects
+    from geo_service.clustering import estimate_label_eps
+
+    coarse = _blobs(0.1, [[0, 0, 0], [3, 0, 0]])
+    fine = _blobs(0.02, [[0, 3, 0], [1, 3, 0], [2, 3, 0]])
+    df = pd.DataFrame(np.concatenate([coarse, fine]), columns=["x", "y", "z"])
+    df["semantic_label"] = ["wall"] * len(coarse) + ["chair"] * len(fine)
+
+    eps = estimate_label_eps(df, min_samples=10)
+    assert 0.1 <= eps["wall"] < 0.5
+    assert 0.02 <= eps["chair"] < 0.1
+
+    objects = extract_semantic_objects(df, eps="auto", min_samples=10)
+    assert sorted(objects) == ["chair_0", "chair_1", "chair_2",
+                               "wall_0", "wall_1"]
+
+
+def test_coinciding_points_and_labels_without_eps() -> None:
+    from geo_service.app import extract_semantic_objects
+    from geo_service.clustering import MIN_EPS, estimate_label_eps
+
+    wall = _blobs(0.1, [[0, 0, 0]])
+    df = pd.DataFrame(np.concatenate([wall, np.ones((20, 3))]),
+                      columns=["x", "y", "z"])
+    df["semantic_label"] = ["wall"] * len(wall) + ["chair"] * 20
+
+    assert estimate_label_eps(df, min_samples=10)["chair"] == MIN_EPS
+    objects = extract_semantic_objects(df, eps="auto", min_samples=10)
+    assert objects["chair_0"]["point_count"] == 20
+
+    objects = extract_semantic_objects(df, eps={"wall": 0.2}, min_samples=10)
+    assert sorted(objects) == ["wall_0"]
+
+
+def test_hierarchy_cuts_match_dbscan() -> None:
+    from sklearn.cluster import DBSCAN
+
+    from geo_service.clustering import LabelHierarchy
+
+    rng = np.random.default_rng(0)
+    coords = np.concatenate([rng.normal(center, 0.1, (300, 3))
+                             for center in ([0, 0, 0], [2, 0, 0], [2.6, 0, 0])])
+    hierarchy = LabelHierarchy(coords, min_samples=10)
+
+    for eps in (0.1, 0.3):
+        expected = DBSCAN(eps=eps, min_samples=10).fit(coords).labels_
+        assert hierarchy.cut(eps).max() == expected.max()
+
+
+def test_compact_mode_matches_float64_pipeline(synthetic_scene) -> None:
+    from geo_service.app import (
+        compute_spatial_relationships,
+        extract_semantic_objects,
+        load_semantic_point_cloud,
+    )
+
+    csv_path = synthetic_scene()
+
+    full = load_semantic_point_cloud(csv_path, sample_size=None)
+    compact = load_semantic_point_cloud(csv_path, sample_size=None,
+                                        compact=True)
+    assert compact["x"].dtype == np.float32
+    assert compact["R"].dtype == np.uint8
+    assert isinstance(compact["semantic_label"].dtype, pd.CategoricalDtype)
+    assert compact.memory_usage(deep=True).sum() < \
+        full.memory_usage(deep=True).sum() / 2
+
+    full_objects = extract_semantic_objects(full, eps=0.35, min_samples=10)
+    compact_objects = extract_semantic_objects(compact, eps=0.35,
+                                               min_samples=10)
+    assert sorted(compact_objects) == sorted(full_objects)
+    for name, obj in compact_objects.items():
+        assert obj["points"]["cluster"].dtype == np.int32
+        assert obj["point_count"] == full_objects[name]["point_count"]
+        np.testing.assert_allclose(obj["centroid"],
+                                   full_objects[name]["centroid"], atol=1e-5)
+
+    assert sorted(compute_spatial_relationships(compact_objects)) == \
+        sorted(compute_spatial_relationships(full_objects))
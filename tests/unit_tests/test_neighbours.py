@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+
+
+def _frame(seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    # Two touching blobs share border points; the scatter is noise
+    coords = np.concatenate([rng.normal([0, 0, 0], 0.1, (300, 3)),
+                             rng.normal([0.5, 0, 0], 0.1, (300, 3)),
+                             rng.uniform(-1, 2, (60, 3))])
+    df = pd.DataFrame(coords, columns=["x", "y", "z"])
+    df["semantic_label"] = ["chair"] * 600 + ["wall"] * 60
+    return df
+
+
+def test_graph_dbscan_matches_sklearn() -> None:
+    from sklearn.cluster import DBSCAN
+
+    from geo_service.neighbours import NeighbourIndex
+
+    df = _frame()
+    index = NeighbourIndex.from_frame(df)
+    chairs = df[df["semantic_label"] == "chair"][["x", "y", "z"]].values
+    # The widest radius first, so the narrower ones reuse its graph
+    for eps in (0.2, 0.1, 0.05):
+        expected = DBSCAN(eps=eps, min_samples=10).fit(chairs).labels_
+        np.testing.assert_array_equal(index.dbscan("chair", eps, 10),
+                                      expected)
+    assert index.graph("chair", 0.1).nnz < index.graph("chair", 0.2).nnz
+
+
+def test_saved_graphs_are_reused_for_the_same_points(tmp_path) -> None:
+    from geo_service.neighbours import NeighbourIndex
+
+    df = _frame()
+    index = NeighbourIndex.from_frame(df)
+    labels = index.dbscan("chair", 0.1, 10)
+    index.dbscan("wall", 0.5, 3)
+    assert index.modified
+    index.save(tmp_path / "scan.neighbours")
+
+    loaded = NeighbourIndex.load(tmp_path / "scan.neighbours", df)
+    np.testing.assert_array_equal(loaded.dbscan("chair", 0.1, 10), labels)
+    assert not loaded.modified
+
+    moved = df.copy()
+    moved.loc[moved["semantic_label"] == "wall", "x"] += 1.0
+    reloaded = NeighbourIndex.load(tmp_path / "scan.neighbours", moved)
+    reloaded.dbscan("chair", 0.1, 10)
+    assert not reloaded.modified
+    reloaded.dbscan("wall", 0.5, 3)
+    assert reloaded.modified
@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("scipy")
+
+
+def _rotated_box(rng, size, angle, offset, n=2_000):
+    cos, sin = np.cos(angle), np.sin(angle)
+    rotation = np.array([[cos, -sin, 0], [sin, cos, 0], [0, 0, 1]])
+    return (rng.uniform(-0.5, 0.5, (n, 3)) * size) @ rotation.T + offset
+
+
+def test_oriented_boxes_fit_rotated_objects_and_measure_gaps() -> None:
+    from geo_service.obb import box_contains, box_separation, fit_oriented_boxes
+
+    rng = np.random.default_rng(0)
+    angle = np.pi / 6
+    direction = np.array([np.cos(angle), np.sin(angle), 0])
+    side = np.array([-np.sin(angle), np.cos(angle), 0])
+    boxes = [_rotated_box(rng, [4, 1, 0.5], angle, [0, 0, 0]),
+             # Alongside the first box, 0.5 m away across its width
+             _rotated_box(rng, [4, 1, 0.5], angle, side * 1.5),
+             # A small box inside the first
+             _rotated_box(rng, [1, 0.4, 0.2], angle, direction)]
+    centers, axes, half_extents = fit_oriented_boxes(boxes)
+
+    assert abs(abs(axes[0, 0] @ direction) - 1) < 1e-3
+    np.testing.assert_allclose(half_extents[0], [2, 0.5, 0.25], atol=0.03)
+
+    first, second = np.array([0, 0]), np.array([1, 2])
+    gap = box_separation(centers, axes, half_extents, first, second)
+    assert gap[0] == pytest.approx(0.5, abs=0.06)
+    assert gap[1] < 0
+    assert box_contains(centers, axes, half_extents, first,
+                        second).tolist() == [False, True]
+
+
+def test_relationships_ignore_objects_apart_on_other_axes() -> None:
+    from geo_service.app import compute_spatial_relationships
+
+    # chair_1 is as close to the table along x as chair_0, but 4 m
+    # away along y
+    rng = np.random.default_rng(1)
+    objects = {}
+    for name, offset in (("table_0", [0, 0, 0]), ("chair_0", [1.05, 0, 0]),
+                         ("chair_1", [1.05, 5, 0])):
+        points = rng.uniform(0, 1, (500, 3)) + offset
+        objects[name] = {"points": _frame(points), "centroid": points.mean(0)}
+
+    assert compute_spatial_relationships(objects) == [
+        ("table_0", "chair_0", "adjacent")]
+
+
+def _frame(points):
+    import pandas as pd
+
+    return pd.DataFrame(points, columns=["x", "y", "z"])
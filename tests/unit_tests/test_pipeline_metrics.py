@@ -0,0 +1,32 @@
+def test_pipeline_reports_stage_metrics(tmp_path, processed_scene) -> None:
+    import pandas as pd
+
+    results = processed_scene(
+        profile_path=str(tmp_path / "profile.folded"),
+        metrics_path=str(tmp_path / "metrics.prom"))
+
+    metrics = results["metrics"]
+    assert {"load", "extract_objects", "compute_relationships",
+            "export_usd"} <= set(metrics["stages"])
+    assert all(stage["peak_rss_growth_mb"] >= 0
+               for stage in metrics["stages"].values())
+    assert metrics["counters"]["points"] == len(
+        pd.read_csv(tmp_path / "scene.csv"))
+    assert metrics["counters"]["edges"] == results["analysis"]["edge_count"]
+    assert sum(metrics["clusters_per_label"].values()) == \
+        metrics["counters"]["objects"]
+    assert "stage:extract_objects" in (
+        tmp_path / "profile.folded").read_text()
+    assert 'geodata_pipeline_stage_seconds{stage="load"}' in (
+        tmp_path / "metrics.prom").read_text()
+
+
+def test_pipeline_reports_failed_stage(tmp_path) -> None:
+    from geo_service.app import process_semantic_pointcloud_to_usd
+
+    results = process_semantic_pointcloud_to_usd(
+        str(tmp_path / "missing.csv"), str(tmp_path / "scene.usda"))
+
+    assert not results["success"]
+    assert results["error_stage"] == "load"
+    assert results["metrics"]["stages"]["load"]["status"] == "failed"
@@ -0,0 +1,58 @@
+import multiprocessing
+import tempfile
+import uuid
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+
+def _attach_and_measure(name, queue) -> None:
+    from geo_service.point_store import SharedPointStore
+
+    with SharedPointStore.attach(name) as store:
+        queue.put((store.reference_count,
+                   store.object_points("chair_0")["coords"].sum()))
+
+
+def test_workers_share_one_reference_counted_store() -> None:
+    from geo_service.point_store import SharedPointStore
+
+    rng = np.random.default_rng(0)
+    coords = rng.uniform(0, 1, (30, 3))
+    arrays = {
+        "coords": coords,
+        "colors": np.zeros((30, 3), dtype=np.uint8),
+        "labels": np.repeat([0, 1], [10, 20]).astype(np.int16),
+        "object_label": np.array([0, 1], dtype=np.int32),
+        "object_start": np.array([0, 10]),
+        "object_count": np.array([10, 20]),
+        "object_centroid": np.array([coords[:10].mean(0),
+                                     coords[10:].mean(0)]),
+        "object_min": np.array([coords[:10].min(0), coords[10:].min(0)]),
+        "object_max": np.array([coords[:10].max(0), coords[10:].max(0)]),
+    }
+    name = uuid.uuid4().hex[:16]
+    store, created = SharedPointStore.open(name, lambda: (
+        arrays, ["chair", "table"], ["chair_0", "table_0"]))
+    assert created
+    assert store.object_label("table_0") == "table"
+    np.testing.assert_allclose(store.centroid("chair_0"), coords[:10].mean(0))
+
+    context = multiprocessing.get_context("spawn")
+    queue = context.Queue()
+    worker = context.Process(target=_attach_and_measure, args=(name, queue))
+    worker.start()
+    worker.join()
+    count, total = queue.get()
+    assert count == 2
+    assert total == coords[:10].sum()
+    assert store.reference_count == 1
+
+    other, created = SharedPointStore.open(name, lambda: None)
+    assert not created and store.reference_count == 2
+    other.detach()
+    store.detach()
+    with pytest.raises(FileNotFoundError):
+        SharedPointStore.attach(name)
+    assert not list(Path(tempfile.gettempdir()).glob(f"*{name}.lock"))
@@ -0,0 +1,64 @@
+def test_prefix_is_byte_identical_per_scene_version() -> None:
+    from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+    from utils.prompt_prefix import PromptPrefix, scene_digest
+
+    scene = '#usda 1.0\ndef Xform "chair_0"\n{\n}\n'
+    # The same scene read on another platform, listed in another order
+    variant = scene.replace("\n", "  \r\n")
+    prefix = PromptPrefix("Answer questions about the scene.",
+                          scene_digest({"b.usda": scene, "a.usda": "x"}))
+    same = PromptPrefix("Answer questions about the scene.",
+                        scene_digest({"a.usda": "x\n", "b.usda": variant}))
+    assert prefix.text().encode() == same.text().encode()
+    assert prefix.cache_key == same.cache_key
+    assert prefix.text().startswith("Answer questions about the scene.\n")
+    assert prefix.text().index("## a.usda") < prefix.text().index("## b.usda")
+
+    first = prefix.messages([HumanMessage("Where is the chair?")])
+    later = prefix.messages([
+        HumanMessage("Where is the chair?"),
+        AIMessage("", tool_calls=[{"name": "read_file", "args": {},
+                                   "id": "call_1"}]),
+        ToolMessage("chair_0 at 1, 2, 0", tool_call_id="call_1"),
+        HumanMessage("And the table?")])
+    assert first[0].content == later[0].content
+    assert len(later) == 5
+
+    edited = PromptPrefix("Answer questions about the scene.",
+                          scene_digest({"a.usda": "x", "b.usda": scene
+                                        + 'def Xform "table_0"\n{\n}\n'}))
+    assert edited.cache_key != prefix.cache_key
+
+
+def test_agent_prompt_prefix_is_stable_across_turns() -> None:
+    from langchain_core.messages import AIMessage, HumanMessage
+
+    from agent.graph import assemble_prompt
+
+    first = assemble_prompt({"messages": [HumanMessage("What is here?")]})
+    later = assemble_prompt({"messages": [
+        HumanMessage("What is here?"), AIMessage("A chair."),
+        HumanMessage("Anything else?")]})
+    assert first[0].content == later[0].content
+    assert [type(message) for message in later[1:]] == [
+        HumanMessage, AIMessage, HumanMessage]
+
+
+def test_turn_summary_reports_cached_tokens() -> None:
+    from utils.tracing import summarize
+
+    def span(kind: str, span_id: str, **attributes: int) -> dict:
+        return {"trace_id": "t", "span_id": span_id, "parent_id": None,
+                "kind": kind, "name": kind, "start": 0.0,
+                "duration_ms": 10.0, "status": "ok", "error": None,
+                "attributes": attributes}
+
+    summary = summarize([
+        span("turn", "t"),
+        span("llm", "a", prompt_tokens=1200, cached_tokens=1024),
+        span("llm", "b", prompt_tokens=1300, cached_tokens=1152)])
+    turn = summary["slowest_turns"][0]
+    assert (turn["prompt_tokens"], turn["cached_tokens"]) == (2500, 2176)
+    llm = next(op for op in summary["operations"] if op["kind"] == "llm")
+    assert llm["cached_tokens"] == 2176
@@ -0,0 +1,26 @@
+import numpy as np
+import pandas as pd
+
+
+def test_stratified_sampling_keeps_rare_labels() -> None:
+    from geo_service.sampling import sample_points
+
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(rng.uniform(0, 5, (11_000, 3)), columns=["x", "y", "z"])
+    df["semantic_label"] = ["wall"] * 10_000 + ["chair"] * 1_000
+
+    for strategy in ("quota", "voxel"):
+        sampled, report = sample_points(df, 2_000, strategy, seed=3)
+        assert len(sampled) == 2_000
+        assert report["chair"]["rate"] > report["wall"]["rate"]
+        again, _ = sample_points(df, 2_000, strategy, seed=3)
+        assert sampled.index.equals(again.index)
+
+    _, report = sample_points(df, 2_000, "quota")
+    assert report["chair"]["sampled"] == report["wall"]["sampled"] == 1_000
+
+    sampled, _ = sample_points(df, None, "poisson", radius=0.3)
+    chairs = sampled[sampled["semantic_label"] == "chair"]
+    coords = chairs[["x", "y", "z"]].values
+    gaps = np.linalg.norm(coords[:, None] - coords[None], axis=2)
+    assert gaps[np.triu_indices(len(coords), 1)].min() >= 0.3
@@ -0,0 +1,24 @@
+def test_catalog_indexes_scenes_incrementally(tmp_path,
+                                              processed_scene) -> None:
+    from utils.scene_catalog import SceneCatalog
+
+    catalog_path = tmp_path / "scenes.db"
+    for name, n_objects in [("small", 3), ("large", 12)]:
+        processed_scene(name, ".usdc", n_points=500 * n_objects,
+                        n_objects=n_objects, catalog_path=str(catalog_path))
+
+    catalog = SceneCatalog(catalog_path)
+    assert [row["name"] for row in catalog.find_scenes("chair", 2)] == \
+        ["large"]
+    assert {row["name"] for row in catalog.find_scenes("CHAIR", 0, 1)} == \
+        {"small"}
+    assert catalog.find_objects(label="table", scene="large")
+
+    # Scenes recorded by the pipeline are unchanged on the first scan
+    assert catalog.scan(tmp_path) == {"indexed": 0, "unchanged": 2,
+                                      "failed": 0, "removed": 0}
+    (tmp_path / "broken.usdc").write_bytes(b"PXR-USDC not a crate")
+    assert catalog.scan(tmp_path)["failed"] == 1
+    (tmp_path / "small.usdc").unlink()
+    assert catalog.scan(tmp_path)["removed"] == 1
+    assert [row["name"] for row in catalog.scenes()] == ["large"]
@@ -0,0 +1,45 @@
+import json
+
+
+def test_scene_graph_round_trip_matches_networkx(tmp_path,
+                                                 processed_scene) -> None:
+    from geo_service.app import analyze_scene_graph
+    from utils.scene_graph_store import load_scene_graph, to_networkx
+
+    results = processed_scene()
+
+    graph_path = tmp_path / "scene_graph.sgraph"
+    assert str(graph_path) in results["files_created"]
+    arrays = load_scene_graph(graph_path)
+    assert not arrays.indices.flags.writeable
+    assert analyze_scene_graph(arrays) == results["analysis"]
+    assert analyze_scene_graph(to_networkx(arrays)) == results["analysis"]
+
+    summary = json.loads((tmp_path / "scene_summary.json").read_text())
+    assert summary["graph_file"] == graph_path.name
+    assert summary["edge_count"] == arrays.number_of_edges
+
+
+def test_graph_analytics_queries() -> None:
+    import networkx as nx
+
+    from utils.graph_analytics import GraphAnalytics
+    from utils.scene_graph_store import from_networkx
+
+    graph = nx.DiGraph()
+    for name, label in [("table_0", "table"), ("chair_0", "chair"),
+                        ("chair_1", "chair"), ("lamp_0", "lamp")]:
+        graph.add_node(name, semantic_label=label)
+    graph.add_edge("chair_0", "table_0", relationship="near")
+    graph.add_edge("table_0", "chair_1", relationship="adjacent")
+    graph.add_edge("chair_1", "lamp_0", relationship="below")
+
+    analytics = GraphAnalytics(from_networkx(graph))
+    assert analytics.k_hop("chair_0", 2) == {"table_0": 1, "chair_1": 2}
+    assert analytics.shortest_path("lamp_0", "chair_0") == [
+        ("chair_1", "below", "lamp_0"),
+        ("table_0", "adjacent", "chair_1"),
+        ("chair_0", "near", "table_0"),
+    ]
+    assert ("chair", "near", "table", 1) in analytics.label_relationships()
+    assert analytics.degree().tolist() == [2, 1, 2, 1]
@@ -0,0 +1,48 @@
+import pytest
+
+
+@pytest.mark.parametrize("filename", ["traces.jsonl", "traces.db"])
+def test_agent_turn_is_traced(tmp_path, filename) -> None:
+    from langchain_core.tools import tool
+    from langgraph.prebuilt import create_react_agent
+
+    from utils.fake_llm import DeterministicChatModel
+    from utils.tracing import (
+        Tracer,
+        TracingCallbackHandler,
+        load_spans,
+        open_sink,
+        summarize,
+    )
+
+    @tool(response_format="content_and_artifact")
+    def list_directory() -> tuple[str, dict]:
+        """List files."""
+        return "scene.usda", {"cache_hit": True}
+
+    path = tmp_path / filename
+    tracer = Tracer(open_sink(path))
+    graph = create_react_agent(DeterministicChatModel(), [list_directory])
+    graph = graph.with_config(callbacks=[TracingCallbackHandler(tracer)])
+
+    for _ in graph.stream({"messages": [("human", "What is here?")]},
+                          stream_mode="messages"):
+        pass
+    tracer.close()
+
+    spans = load_spans(path)
+    kinds = [span["kind"] for span in spans]
+    assert kinds.count("turn") == 1
+    assert kinds.count("llm") == 2
+    assert kinds.count("tool") == 1
+    assert len({span["trace_id"] for span in spans}) == 1
+
+    tool_span = next(span for span in spans if span["kind"] == "tool")
+    assert tool_span["attributes"]["cache_hit"] is True
+    assert tool_span["attributes"]["result_bytes"] == len("scene.usda")
+
+    summary = summarize(spans)
+    assert summary["slowest_turns"][0]["tool_calls"] == 1
+    llm = next(op for op in summary["operations"] if op["kind"] == "llm")
+    assert llm["completion_tokens"] > 0
+    assert llm["p50_ttft_ms"] is not None
@@ -0,0 +1,33 @@
+def test_tunnel_network_finds_branches_and_clearances(tmp_path) -> None:
+    from benchmarks.synthetic import make_tunnel_scan, write_scene_csv
+    from utils.point_cache import PointCacheStore
+    from utils.tunnel_network import TunnelNetwork
+
+    write_scene_csv(make_tunnel_scan(60000), tmp_path / "mine.csv")
+    cache, _ = PointCacheStore(tmp_path / "cache").open(tmp_path / "mine.csv")
+    network = TunnelNetwork(tmp_path / "tunnels.db")
+    summary = network.build(cache, spacing=5.0)
+
+    # The crosscut splits the drive: three branches meet at one junction
+    assert summary["branches"] == 3
+    branches = network.branches()
+    assert {row["start_node"] for row in branches} & \
+        {row["end_node"] for row in branches}
+    assert 20 < branches[-1]["length"] < branches[0]["length"] < 30
+
+    section = network.section_at(11.0, branch=1)
+    assert section is not None and section["chainage"] == 10.0
+    assert abs(section["width"] - 4.0) < 0.05
+    assert abs(section["height"] - 3.0) < 0.05
+    assert abs(section["area"] - 12.0) < 0.2
+    # The junction, where the crosscut widens the drive, is the widest
+    widest = network.extremes("width", largest=True, limit=1)[0]
+    assert widest["width"] > 6 and abs(widest["x"] - 30) < 3
+    assert network.extremes("width", limit=1)[0]["width"] < 4.1
+    closest = network.extremes("deviation", limit=1)[0]["deviation"]
+    furthest = network.extremes("deviation", largest=True,
+                                limit=1)[0]["deviation"]
+    assert abs(closest) < abs(furthest)
+
+    reopened = TunnelNetwork(tmp_path / "tunnels.db")
+    assert reopened.is_built and len(reopened.branches()) == 3
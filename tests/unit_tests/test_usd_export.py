@@ -0,0 +1,54 @@
+import pytest
+
+pxr = pytest.importorskip("pxr")
+
+
+@pytest.fixture
+def exported_scene(tmp_path, processed_scene):
+    return tmp_path / "scene.usdc", processed_scene(suffix=".usdc")
+
+
+def test_usdc_export_writes_points_and_all_relationships(
+        exported_scene) -> None:
+    usd_path, results = exported_scene
+
+    layer = pxr.Sdf.Layer.FindOrOpen(str(usd_path))
+    assert layer.GetFileFormat().formatId == "usdc"
+
+    stage = pxr.Usd.Stage.Open(layer)
+    points = [prim for prim in stage.Traverse() if prim.IsA(pxr.UsdGeom.Points)]
+    assert len(points) == results["analysis"]["node_count"]
+    for prim in points:
+        count = prim.GetAttribute("semantic:pointCount").Get()
+        assert len(pxr.UsdGeom.Points(prim).GetPointsAttr().Get()) == count
+
+    targets = sum(len(rel.GetTargets()) for prim in points
+                  for rel in prim.GetRelationships())
+    edge_types = stage.GetPrimAtPath("/Scene").GetAttribute(
+        "spatial:edgeType").Get()
+    assert targets == len(edge_types) == results["analysis"]["edge_count"]
+
+
+def test_scene_reader_loads_points_on_demand(exported_scene) -> None:
+    from utils.scene_reader import SceneReader
+
+    usd_path, results = exported_scene
+    reader = SceneReader(str(usd_path), max_loaded=2)
+    assert reader.loaded == []
+    names = [obj.name for obj in reader.objects]
+    for name in names[:3]:
+        assert len(reader.points(name)) == reader.get(name).point_count
+    assert reader.loaded == names[1:3]
+    assert not reader.stage.GetPrimAtPath(
+        f"/Scene/Geometry/{names[0]}").IsLoaded()
+    assert len(reader.relationships()) == results["analysis"]["edge_count"]
+
+
+def test_export_replaces_a_scene_open_in_this_process(
+        exported_scene, processed_scene) -> None:
+    usd_path, results = exported_scene
+    stage = pxr.Usd.Stage.Open(str(usd_path))
+    processed_scene(suffix=".usdc")
+    edge_types = stage.GetPrimAtPath("/Scene").GetAttribute(
+        "spatial:edgeType").Get()
+    assert len(edge_types) == results["analysis"]["edge_count"]
@@ -0,0 +1,45 @@
+import time
+
+
+def test_watcher_publishes_new_scans_into_a_refreshing_workspace(
+        tmp_path) -> None:
+    from benchmarks.synthetic import make_scene, write_scene_csv
+    from geo_service.watch import ScanWatcher
+    from utils.workspace import SharedWorkspace
+
+    data_dir = tmp_path / "data"
+    data_dir.mkdir()
+    workspace = SharedWorkspace(data_dir, [], root=tmp_path / "workspaces",
+                                patterns=["*.usdc", "*_graph.sgraph"])
+    moves = []
+    workspace.add_listener(lambda old, new: moves.append(new))
+    first = workspace.materialize()
+
+    watcher = ScanWatcher(data_dir, settle=0.2, poll_interval=0.05,
+                          eps=0.35, min_samples=10)
+    try:
+        write_scene_csv(make_scene(3_000, 4, seed=1), data_dir / "room.csv")
+        deadline = time.monotonic() + 120
+        while "room.csv" not in watcher.state:
+            assert time.monotonic() < deadline
+            watcher.step()
+            time.sleep(0.05)
+    finally:
+        watcher.close()
+
+    assert watcher.state["room.csv"]["error"] is None
+    assert (data_dir / "room_graph.sgraph").exists()
+    assert not list(data_dir.glob(".staging-*"))
+
+    assert workspace.refresh()
+    assert moves == [workspace.path] and workspace.path != first
+    assert workspace.resolve("room_graph.sgraph").exists()
+    assert not workspace.refresh()
+
+    # Unchanged scans are not processed again
+    watcher = ScanWatcher(data_dir, settle=0.0, eps=0.35, min_samples=10)
+    try:
+        watcher.step()
+        assert not watcher._running
+    finally:
+        watcher.close()
@@ -0,0 +1,55 @@
+import os
+
+
+def test_shared_workspace_links_and_reuses_files(tmp_path) -> None:
+    from utils.workspace import MARKER, SharedWorkspace
+
+    data = tmp_path / "data"
+    data.mkdir()
+    (data / "scene.usda").write_text("#usda 1.0\n")
+    root = tmp_path / "workspaces"
+
+    first = SharedWorkspace(data, ["scene.usda", "missing.csv"], root=root)
+    assert not root.exists()
+    path = first.materialize()
+    assert os.listdir(path) == ["scene.usda"]
+    assert (path / "scene.usda").stat().st_ino == \
+        (data / "scene.usda").stat().st_ino
+
+    # Another process serving the same data reuses the directory
+    assert SharedWorkspace(data, ["scene.usda"], root=root).path == path
+
+    # A changed source gets a new workspace; the old one goes once stale
+    (data / "scene.usda").write_text("#usda 1.0\n# changed\n")
+    os.utime(root / (path.name + MARKER), (0, 0))
+    catalog = root / (path.name + "_catalog.db")
+    catalog.touch()
+    # Companion of a workspace that was never materialised
+    orphan = root / "ws-0123456789abcdef_tunnels.db"
+    orphan.touch()
+    os.utime(orphan, (0, 0))
+    second = SharedWorkspace(data, ["scene.usda"], root=root)
+    assert second.path != path
+    second.materialize()
+    assert not path.exists()
+    assert not catalog.exists() and not orphan.exists()
+
+
+def test_failing_listener_does_not_stop_a_refresh(tmp_path) -> None:
+    from utils.workspace import SharedWorkspace
+
+    data = tmp_path / "data"
+    data.mkdir()
+    workspace = SharedWorkspace(data, [], root=tmp_path / "workspaces",
+                                patterns=["*.usda"])
+    moves = []
+
+    def fail(old, new):
+        raise RuntimeError("listener failed")
+
+    workspace.add_listener(fail)
+    workspace.add_listener(lambda old, new: moves.append(new))
+    workspace.materialize()
+    (data / "scene.usda").write_text("#usda 1.0\n")
+    assert workspace.refresh()
+    assert moves == [workspace.path]
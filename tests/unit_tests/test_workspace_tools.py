@@ -0,0 +1,161 @@
+def test_workspace_tools_page_search_and_summarise(tmp_path) -> None:
+    from utils.workspace import SharedWorkspace
+    from utils.workspace_tools import make_workspace_tools
+
+    data = tmp_path / "data"
+    data.mkdir()
+    lines = ["#usda 1.0", 'def Xform "World"', "{"]
+    for i in range(300):
+        lines += [f'    def Points "chair_{i}"', '    {',
+                  '        string semantic_label = "chair"', '    }']
+    (data / "scene.usda").write_text("\n".join(lines + ["}"]) + "\n")
+    (data / "points.csv").write_text(
+        "x,y,label\n1.0,2,wall\n3.0,4,floor\n5.0,,wall\n")
+    workspace = SharedWorkspace(data, ["scene.usda", "points.csv"],
+                                root=tmp_path / "workspaces")
+    tools = {t.name: t for t in make_workspace_tools(workspace)}
+
+    def call(name: str, **args):
+        message = tools[name].invoke({"name": name, "args": args, "id": "1",
+                                      "type": "tool_call"})
+        return message.content, message.artifact["cache_hit"]
+
+    assert tools["list_directory"].invoke({}) == "points.csv\nscene.usda"
+    text, hit = call("read_file", file_path="scene.usda", offset=4, limit=3)
+    assert not hit
+    assert text.splitlines() == [
+        "scene.usda: lines 4-6 of 1204, continue with offset=7",
+        '    def Points "chair_0"', "    {",
+        '        string semantic_label = "chair"']
+    assert call("read_file", file_path="scene.usda", offset=1200)[0] \
+        .startswith("scene.usda: lines 1200-1204 of 1204\n")
+    assert call("read_file", file_path="scene.usda", offset=7)[1]
+
+    text, _ = call("search_files", query="CHAIR_12", file_path="scene.usda")
+    assert text.splitlines()[0] == \
+        "scene.usda:52 prim /World/chair_12 Points"
+    assert call("search_files", query="wall")[0] == \
+        "points.csv:2 value label=wall"
+
+    text, hit = call("csv_column_stats", file_path="points.csv",
+                     columns="y,label")
+    assert not hit
+    assert text.splitlines() == [
+        "points.csv: 3 rows",
+        'y: {"count": 2, "mean": 3.0, "std": 1.0, "min": 2.0, "max": 4.0, '
+        '"values": {"2.0": 1, "4.0": 1}}',
+        'label: {"count": 3, "values": {"wall": 2, "floor": 1}}']
+    # A new process reuses the indexes written by the first one
+    fresh = {t.name: t for t in make_workspace_tools(workspace)}
+    assert fresh["csv_column_stats"].invoke({
+        "name": "csv_column_stats", "args": {"file_path": "points.csv"},
+        "id": "2", "type": "tool_call"}).artifact["cache_hit"]
+
+
+
+def test_workspace_tools_handle_long_lines_and_large_offsets(
+        tmp_path) -> None:
+    import json
+
+    import numpy as np
+
+    from utils.workspace import SharedWorkspace
+    from utils.workspace_tools import MAX_PAGE_CHARS, make_workspace_tools
+
+    data = tmp_path / "data"
+    data.mkdir()
+    long_line = "".join(str(i % 10) for i in range(MAX_PAGE_CHARS + 500))
+    (data / "long.txt").write_text(f"{long_line}\nend\n")
+    eastings = 500_000_000.0 + np.arange(1000) * 0.001
+    (data / "utm.csv").write_text(
+        "x\n" + "\n".join(f"{x:.3f}" for x in eastings) + "\n")
+    workspace = SharedWorkspace(data, ["long.txt", "utm.csv"],
+                                root=tmp_path / "workspaces")
+    tools = {t.name: t for t in make_workspace_tools(workspace)}
+
+    def call(name: str, **args):
+        return tools[name].invoke({"name": name, "args": args, "id": "1",
+                                   "type": "tool_call"}).content
+
+    header, first = call("read_file", file_path="long.txt").split("\n", 1)
+    assert header.endswith(f"char_offset={MAX_PAGE_CHARS}")
+    header, rest = call("read_file", file_path="long.txt", offset=1,
+                        char_offset=MAX_PAGE_CHARS).split("\n", 1)
+    assert first + rest == f"{long_line}\nend\n"
+    assert header == "long.txt: lines 1-2 of 2"
+
+    stats = json.loads(call("csv_column_stats", file_path="utm.csv")
+                       .splitlines()[1].split(": ", 1)[1])
+    assert np.isclose(stats["std"], eastings.std(), rtol=1e-6)
+
+def test_point_cloud_queries_match_a_full_scan(tmp_path) -> None:
+    import numpy as np
+    import pandas as pd
+
+    from utils.point_cache import PointCacheStore
+
+    rng = np.random.default_rng(0)
+    points = pd.DataFrame(rng.random((5000, 3)) * [20, 10, 3],
+                          columns=["x", "y", "z"])
+    points["semantic_label"] = rng.integers(0, 3, len(points)).astype(float)
+    points.to_csv(tmp_path / "cloud.csv", sep=";", index=False)
+
+    store = PointCacheStore(tmp_path / "cache")
+    cache, hit = store.open(tmp_path / "cloud.csv")
+    assert not hit
+    assert sorted(cache.labels) == ["0", "1", "2"]
+
+    box = (2.5, 1.0, 0.5, 13.3, 7.7, 2.0)
+    inside = points[((points[["x", "y", "z"]] >= box[:3])
+                     & (points[["x", "y", "z"]] <= box[3:])).all(axis=1)]
+    assert cache.count(box=box) == len(inside)
+    assert cache.count("1", box) == int((inside.semantic_label == 1).sum())
+    chairs = inside[inside.semantic_label == 2][["x", "y", "z"]]
+    low, high = cache.bounds("2", box)
+    assert np.allclose(low, chairs.min()) and np.allclose(high, chairs.max())
+    profile = cache.height_profile(4, box=box)
+    assert sum(count for _, _, count in profile) == len(inside)
+    # Whole-cloud answers come from the stored aggregates
+    assert sum(count for _, _, count in cache.height_profile()) == 5000
+    assert PointCacheStore(tmp_path / "cache").open(
+        tmp_path / "cloud.csv")[1]
+
+
+def test_mining_tools_measure_a_tunnel(tmp_path) -> None:
+    import numpy as np
+    import pandas as pd
+
+    from utils.mining_tools import make_mining_tools
+    from utils.point_cache import PointCacheStore
+
+    # A 4 m wide, 3 m high box tunnel along x, scanned on its walls
+    rng = np.random.default_rng(0)
+    x = rng.random(40000) * 50
+    side = rng.integers(0, 4, len(x))
+    t = rng.random(len(x))
+    y = np.select([side == 0, side == 1], [0.0, 4.0], t * 4)
+    z = np.select([side == 2, side == 3], [0.0, 3.0], t * 3)
+    pd.DataFrame({"x": x, "y": y, "z": z, "label": "wall"}).to_csv(
+        tmp_path / "mine.csv", index=False)
+
+    store = PointCacheStore(tmp_path / "cache")
+    tools = {t.name: t for t in make_mining_tools(
+        lambda: store.open(tmp_path / "mine.csv"))}
+
+    def call(name: str, **args):
+        return tools[name].invoke({"name": name, "args": args, "id": "1",
+                                   "type": "tool_call"})
+
+    sections = call("measure_tunnel_cross_sections", path="0,2;40,2",
+                    spacing=10).content.splitlines()
+    assert [line.split(" m at")[0] for line in sections] == [
+        f"chainage {c:.1f}" for c in (0, 10, 20, 30, 40)]
+    area = float(sections[2].split("area ")[1].split(" m2")[0])
+    assert 11.5 < area <= 12.0
+    assert "width 4.00 m, height 3.00 m" in sections[2]
+
+    message = call("summarize_region", box="10,0,0,20,4,3")
+    inside = int(((x >= 10) & (x <= 20)).sum())
+    assert message.content.startswith(f"{inside} points")
+    assert message.artifact["cache_hit"]
+    assert call("estimate_section_volumes").content.startswith("wall: ")